@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the pocket-dba MCP server
+
+Compares the original ``",".join(map(str, row))`` path with the CSV, JSON
+and typed writers on a synthetic result shaped like SalesLT.Product.
+
+Usage: python benchmarks/bench_serialization.py [rows]
+"""
+import datetime
+import decimal
+import sys
+import os
+import time
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.serialization import FORMATS, get_writer
+
+DESCRIPTION = [
+    ("ProductID", int),
+    ("Name", str),
+    ("ProductNumber", str),
+    ("Color", str),
+    ("ListPrice", decimal.Decimal),
+    ("Weight", decimal.Decimal),
+    ("SellStartDate", datetime.datetime),
+    ("rowguid", uuid.UUID),
+]
+
+
+def make_rows(count):
+    start = datetime.datetime(2008, 1, 1)
+    return [
+        (
+            i,
+            f"Product {i}, size {i % 60}",
+            f"PR-{i:06d}",
+            None if i % 7 == 0 else "Black",
+            decimal.Decimal(i % 5000) / 100,
+            None if i % 3 == 0 else decimal.Decimal("1.25"),
+            start + datetime.timedelta(minutes=i),
+            uuid.UUID(int=i),
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_join(rows):
+    columns = [desc[0] for desc in DESCRIPTION]
+    lines = [",".join(columns)]
+    for row in rows:
+        lines.append(",".join(map(str, row)))
+    return "\n".join(lines)
+
+
+def writer_path(fmt):
+    def run(rows):
+        writer = get_writer(fmt, DESCRIPTION)
+        return writer.render(rows, writer.encode_rows(rows), [])
+    return run
+
+
+def best_of(fn, rows, repeat=3):
+    best, output = float("inf"), ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best, len(output.encode("utf-8"))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(count)
+    print(f"{count} rows x {len(DESCRIPTION)} columns")
+    print(f"{'path':<12}{'seconds':>10}{'rows/s':>14}{'bytes':>14}")
+    paths = [("legacy-join", legacy_join)] + [(fmt, writer_path(fmt)) for fmt in FORMATS]
+    for name, fn in paths:
+        seconds, size = best_of(fn, rows)
+        print(f"{name:<12}{seconds:>10.3f}{count / seconds:>14,.0f}{size:>14,}")
+
+
+if __name__ == "__main__":
+    main()
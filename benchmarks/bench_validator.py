@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Read-only validator benchmark for the pocket-dba MCP server
+
+Times the original substring-based ``is_read_only_query`` against the
+tokenizer in src/mssql/tsql.py (uncached and memoized), and shows that
+validation time grows linearly with query length.
+
+Usage: python benchmarks/bench_validator.py [iterations]
+"""
+import re
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.tsql import is_read_only
+
+QUERIES = [
+    "SELECT * FROM SalesLT.Customer",
+    "SELECT TOP 10 c.FirstName, c.LastName, SUM(h.TotalDue) AS total "
+    "FROM SalesLT.Customer c JOIN SalesLT.SalesOrderHeader h ON h.CustomerID = c.CustomerID "
+    "WHERE h.OrderDate >= '2008-06-01' GROUP BY c.FirstName, c.LastName ORDER BY total DESC",
+    "WITH recent AS (SELECT ProductID, ModifiedDate FROM SalesLT.Product WHERE ModifiedDate > '2008-01-01') "
+    "SELECT p.Name, r.ModifiedDate FROM recent r JOIN SalesLT.Product p ON p.ProductID = r.ProductID",
+    "/* monthly report */ SELECT YEAR(OrderDate) AS y, MONTH(OrderDate) AS m, COUNT(*) AS orders "
+    "FROM SalesLT.SalesOrderHeader -- all orders\nGROUP BY YEAR(OrderDate), MONTH(OrderDate)",
+    "DECLARE @since DATE = '2008-06-01'; SELECT COUNT(*) FROM SalesLT.SalesOrderHeader WHERE OrderDate >= @since",
+]
+
+
+def legacy_is_read_only_query(query: str) -> bool:
+    """is_read_only_query as it was before the tokenizer (for comparison)"""
+    clean_query = query.strip().upper()
+
+    allowed_statements = ['SELECT', 'WITH', 'DECLARE']
+    forbidden_statements = [
+        'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE',
+        'ALTER', 'TRUNCATE', 'MERGE', 'UPSERT', 'REPLACE',
+        'GRANT', 'REVOKE', 'EXEC', 'EXECUTE', 'SP_'
+    ]
+
+    starts_with_allowed = any(clean_query.startswith(stmt) for stmt in allowed_statements)
+    if not starts_with_allowed:
+        return False
+
+    contains_forbidden = any(stmt in clean_query for stmt in forbidden_statements)
+    if contains_forbidden:
+        return False
+
+    has_dangerous_chars = re.search(r';\s*\w+', clean_query)
+    if has_dangerous_chars:
+        return False
+
+    return True
+
+
+def per_call(fn, queries, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for query in queries:
+            fn(query)
+    return (time.perf_counter() - started) / (iterations * len(queries))
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    uncached = is_read_only.__wrapped__
+    print(f"{'validator':<16}{'us/query':>10}")
+    for name, fn in [("legacy", legacy_is_read_only_query), ("tokenizer", uncached), ("tokenizer+memo", is_read_only)]:
+        print(f"{name:<16}{per_call(fn, QUERIES, iterations) * 1e6:>10.2f}")
+
+    print()
+    print(f"{'query chars':>12}{'ms/query':>10}")
+    for repeat in (10, 100, 1000):
+        query = "SELECT " + ", ".join(f"col{i} AS [alias {i}]" for i in range(repeat)) + " FROM t WHERE name = 'x'"
+        print(f"{len(query):>12}{per_call(uncached, [query], 20) * 1e3:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
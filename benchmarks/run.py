@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the pocket-dba MCP server
+
+Runs offline against the SQLite stand-in and times:
+
+- validation: ``is_read_only_query`` over the bench_validator corpus
+- execution: ``execute_sql_raw`` at 1k, 100k and 1M rows in each output format
+- schema: list_tables / describe_table / get_relationships on the fixture
+  catalog and on one with 5000 extra tables, cold (catalog reload) and warm
+- mcp: ``fastmcp.Client(mcp)`` round trips, one at a time and concurrently
+
+Each case reports the best and median time per call. The best times,
+which are far less noisy than medians, are compared with
+benchmarks/baselines.json and the run exits with status 1 if any case is
+slower than its baseline by more than the threshold. Timings within
+NOISE_FLOOR of the baseline never count as regressions, so
+sub-millisecond cases only fail on real slowdowns, and a case that looks
+slower is measured up to CONFIRM_RUNS more times before it is reported.
+Baselines recorded on a different environment (Python, platform, CPU
+count) are not compared at all.
+
+Usage: python benchmarks/run.py [--quick] [--filter TEXT] [--save] [--threshold 0.25]
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, List, NamedTuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configure the server before importing it: offline backend, no caching, budgets large enough for 1M rows
+os.environ["MSSQL_BACKEND"] = "sqlite"
+os.environ["MSSQL_MAX_ROWS"] = "2000000"
+os.environ["MSSQL_MAX_RESULT_BYTES"] = str(1 << 31)
+os.environ["MSSQL_RESULT_CACHE_MB"] = "0"
+os.environ["MSSQL_QUERY_TIMEOUT"] = "0"
+
+from fastmcp import Client
+
+from benchmarks.bench_validator import QUERIES
+from src.mssql import server
+from src.mssql.pool import ConnectionPool
+from src.mssql.sqlite_backend import SqliteBackend
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+LARGE_CATALOG = 5000
+# Absolute slack in seconds on top of the relative threshold: scheduler and
+# GC jitter of this size would otherwise fail micro-cases at random
+NOISE_FLOOR = 0.0005
+# Extra measurements of a case that looks slower before calling it a regression
+CONFIRM_RUNS = 3
+
+
+class Case(NamedTuple):
+    name: str
+    fn: Callable[[], object]
+    number: int = 1  # calls per timed sample
+    repeat: int = 9
+    slow: bool = False  # skipped with --quick
+
+
+def measure(case: Case) -> dict:
+    """Best and median seconds per call over ``repeat`` samples, after one warm-up call
+
+    The garbage collector is off while a sample runs, as in timeit.
+    """
+    case.fn()
+    samples = []
+    for _ in range(case.repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for _ in range(case.number):
+                case.fn()
+            samples.append((time.perf_counter() - started) / case.number)
+        finally:
+            gc.enable()
+    return {"best": min(samples), "median": statistics.median(samples)}
+
+
+def slowdown(result: dict, baseline: dict) -> float:
+    """Relative change of the best time against the baseline"""
+    return result["best"] / baseline["best"] - 1
+
+
+def allowed_slowdown(baseline: float, threshold: float) -> float:
+    """Relative slowdown tolerated for a case whose baseline best time is ``baseline`` seconds"""
+    return threshold + NOISE_FLOOR / baseline
+
+
+def environment() -> dict:
+    """What baselines depend on besides the code"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# --- Catalog ----------------------------------------------------------------
+
+def use_catalog(extra_tables: int) -> None:
+    """Point the server at a fixture database with ``extra_tables`` synthetic tables"""
+    if getattr(server.backend, "extra_tables", None) == extra_tables:
+        return
+    server.connection_pool.close()
+    server.backend.close()
+    server.backend = SqliteBackend(extra_tables=extra_tables)
+    server.connection_pool = ConnectionPool(server.create_connection, **server.POOL_CONFIG)
+    server.metadata_cache.invalidate()
+
+
+def cold(fn: Callable[..., str], *args) -> Callable[[], str]:
+    """Run ``fn`` with an empty metadata cache, so the catalog snapshot is reloaded"""
+    def run():
+        server.metadata_cache.invalidate()
+        return checked(fn, *args)()
+    return run
+
+
+def checked(fn: Callable[..., str], *args) -> Callable[[], str]:
+    def run():
+        result = fn(*args)
+        if result.startswith("Error:"):
+            raise RuntimeError(f"{fn.__name__}{args}: {result}")
+        return result
+    return run
+
+
+# --- Cases ------------------------------------------------------------------
+
+def rows_query(count: int) -> str:
+    # 847 customers x 295 products x 41 categories covers the 1M case
+    return (
+        f"SELECT TOP ({count}) c.CustomerID, c.LastName, p.ProductID, p.Name, p.ListPrice, p.SellStartDate, k.Name "
+        "FROM SalesLT.Customer c CROSS JOIN SalesLT.Product p CROSS JOIN SalesLT.ProductCategory k"
+    )
+
+
+def validation_cases() -> List[Case]:
+    uncached = server.is_read_only.__wrapped__
+    corpus = QUERIES * 20
+    return [
+        Case("validation/tokenizer", lambda: [uncached(q) for q in corpus], number=10),
+        Case("validation/memoized", lambda: [server.is_read_only_query(q) for q in corpus], number=100),
+    ]
+
+
+def execution_cases() -> List[Case]:
+    cases = []
+    for count, repeat, slow in [(1000, 9, False), (100000, 5, False), (1000000, 1, True)]:
+        for fmt in ("csv", "json", "typed"):
+            run = checked(server.execute_sql_raw, rows_query(count), None, None, None, False, fmt)
+            cases.append(Case(f"execute/{count}/{fmt}", run, repeat=repeat, slow=slow))
+    return cases
+
+
+def schema_cases(label: str, extra_tables: int, table: str) -> List[Case]:
+    def on_catalog(fn):
+        def run():
+            use_catalog(extra_tables)
+            return fn()
+        return run
+
+    slow = extra_tables > 0
+    return [
+        Case(f"schema/{label}/catalog_load", on_catalog(cold(server.list_tables_raw)), repeat=3, slow=slow),
+        Case(f"schema/{label}/list_tables", on_catalog(checked(server.list_tables_raw.__wrapped__)), number=5, slow=slow),
+        Case(f"schema/{label}/describe_table", on_catalog(checked(server.describe_table_raw.__wrapped__, table)), number=200, slow=slow),
+        Case(f"schema/{label}/get_relationships", on_catalog(checked(server.get_relationships_raw.__wrapped__, table)), number=200, slow=slow),
+    ]
+
+
+def mcp_cases(loop: asyncio.AbstractEventLoop, client: Client) -> List[Case]:
+    def call(tool: str, arguments: dict) -> Callable[[], object]:
+        return lambda: loop.run_until_complete(client.call_tool(tool, arguments))
+
+    def read(uri: str) -> Callable[[], object]:
+        return lambda: loop.run_until_complete(client.read_resource(uri))
+
+    def concurrent(count: int) -> Callable[[], object]:
+        async def run():
+            await asyncio.gather(*[
+                client.call_tool("execute_sql", {"query": rows_query(100), "use_cache": False}) for _ in range(count)
+            ])
+        return lambda: loop.run_until_complete(run())
+
+    def on_fixture(fn):
+        def run():
+            use_catalog(0)
+            return fn()
+        return run
+
+    return [
+        Case("mcp/execute_sql", on_fixture(call("execute_sql", {"query": rows_query(100), "use_cache": False})), number=20),
+        Case("mcp/describe_table", on_fixture(call("describe_table", {"table_name": "SalesLT.Product"})), number=50),
+        Case("mcp/list_tables", on_fixture(read("mssql://tables")), number=50),
+        Case("mcp/execute_sql_x10_concurrent", on_fixture(concurrent(10)), number=5),
+    ]
+
+
+# --- Runner -----------------------------------------------------------------
+
+def load_baselines() -> dict:
+    if not os.path.exists(BASELINES):
+        return {}
+    with open(BASELINES) as f:
+        return json.load(f)
+
+
+def save_baselines(results: dict) -> None:
+    data = load_baselines()
+    # Baselines from another environment are not comparable with the new ones
+    cases = data.get("cases", {}) if data.get("environment") == environment() else {}
+    cases.update(results)
+    data = {"environment": environment(), "cases": dict(sorted(cases.items()))}
+    with open(BASELINES, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="skip the 1M-row and large-catalog cases")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--save", action="store_true", help="write the results to baselines.json")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown against the baseline best time")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    client = Client(server.mcp)
+    loop.run_until_complete(client.__aenter__())
+    try:
+        cases = (
+            validation_cases()
+            + execution_cases()
+            + schema_cases("fixture", 0, "SalesLT.Product")
+            + schema_cases(f"{LARGE_CATALOG}_tables", LARGE_CATALOG, "dbo.Synthetic02500")
+            + mcp_cases(loop, client)
+        )
+        cases = [case for case in cases if args.filter in case.name and not (args.quick and case.slow)]
+
+        stored = load_baselines()
+        baselines = stored.get("cases", {})
+        if baselines and stored.get("environment") != environment():
+            print(
+                f"Baselines were recorded on {stored.get('environment')}, this is {environment()}; "
+                "not comparing (regenerate them with --save)\n"
+            )
+            baselines = {}
+        results, regressions = {}, []
+        print(f"{'case':<44}{'best ms':>12}{'median ms':>12}{'baseline':>12}{'change':>9}{'allowed':>9}")
+        for case in cases:
+            result = results[case.name] = measure(case)
+            baseline = baselines.get(case.name)
+            if baseline:
+                allowed = allowed_slowdown(baseline["best"], args.threshold)
+                for _ in range(CONFIRM_RUNS):
+                    if slowdown(result, baseline) <= allowed:
+                        break
+                    retry = measure(case)
+                    if slowdown(retry, baseline) < slowdown(result, baseline):
+                        result = results[case.name] = retry
+            line = f"{case.name:<44}{result['best'] * 1e3:>12.3f}{result['median'] * 1e3:>12.3f}"
+            if baseline:
+                change = slowdown(result, baseline)
+                line += f"{baseline['best'] * 1e3:>12.3f}{change:>+9.0%}{allowed:>+9.0%}"
+                if change > allowed:
+                    regressions.append(case.name)
+                    line += "  REGRESSION"
+            print(line, flush=True)
+    finally:
+        loop.run_until_complete(client.__aexit__(None, None, None))
+        loop.close()
+
+    if args.save:
+        save_baselines(results)
+        print(f"\nSaved {len(results)} baselines to {os.path.relpath(BASELINES)}")
+    elif regressions:
+        print(f"\n{len(regressions)} case(s) slower than baseline by more than allowed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,16 +4,20 @@ Pocket DBA Chat Interface
 Business-friendly chat interface for database queries using natural language
 """
 import asyncio
+import csv
+import io
+import itertools
 import os
 import sys
 import json
-from typing import List, Dict, Any, Union
+import time
+from typing import List, Dict, Any, Optional, Tuple, Union
 from contextlib import AsyncExitStack
 
 import gradio as gr
 from gradio.components.chatbot import ChatMessage
 from fastmcp import Client
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 
 # Add src to path for imports
@@ -23,6 +27,222 @@ from src.mssql.server import mcp
 # Load environment variables
 load_dotenv()
 
+MODEL = "claude-3-5-sonnet-20241022"
+
+# Budget for one reply: rounds of tool calls, and seconds after which Claude
+# must answer with what it has
+MAX_TOOL_ROUNDS = int(os.getenv("CHAT_MAX_TOOL_ROUNDS", "8"))
+TURN_BUDGET_SECONDS = float(os.getenv("CHAT_TURN_BUDGET_SECONDS", "120"))
+# Longest tool result sent back to Claude
+TOOL_RESULT_CHARS = int(os.getenv("CHAT_TOOL_RESULT_CHARS", "20000"))
+# Tables summarized in the system prompt's schema digest; 0 leaves it out
+SCHEMA_DIGEST_TABLES = int(os.getenv("CHAT_SCHEMA_DIGEST_TABLES", "100"))
+
+# Estimated input tokens per Claude request (tools, system prompt, history and
+# this turn's tool rounds), and how many of the latest earlier turns are sent
+# word for word if they fit
+REQUEST_TOKEN_BUDGET = int(os.getenv("CHAT_REQUEST_TOKEN_BUDGET", "32000"))
+HISTORY_RECENT_TURNS = int(os.getenv("CHAT_HISTORY_RECENT_TURNS", "3"))
+
+# Prompt caching: the tools, system prompt and schema digest are the same on
+# every request, so they are marked as a cached prefix
+CACHE_CONTROL = {"type": "ephemeral"}
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+SYSTEM_PROMPT = """You are a helpful database assistant called "Pocket DBA". You help business owners query their SQL Server database using natural language.
+
+Available tools:
+1. execute_sql - Run SELECT queries to get data
+2. describe_table / describe_tables - Get table structure and columns of one or several tables
+3. get_relationships / get_relationships_bulk - Find foreign key relationships between tables
+4. get_indexes - See which columns are indexed
+5. table_stats - Row counts and sizes without scanning tables
+6. preview_table - Sample rows of a table
+
+Guidelines:
+- Always be helpful and explain what you're doing
+- Use execute_sql for data queries
+- Use describe_table to understand table structure before writing complex queries
+- Use get_relationships to understand how tables connect
+- When a database schema summary follows, use it instead of describing the tables it lists
+- Tool results come back to you; look at them and keep going until you can answer
+- Request independent lookups (e.g. several tables' structure) in the same turn; they run in parallel
+- Use table_stats instead of COUNT(*) to find out how big a table is
+- Format query results in a readable way
+- Only run SELECT queries (read-only)
+- If you need to understand the database structure, start with describe_table or get_relationships"""
+
+class HistoryManager:
+    """Fits each Claude request into a token budget
+    
+    The tool definitions and system prompt are counted first, then the
+    current turn: the user's message and the tool rounds so far. Results of
+    earlier rounds shrink to a note, and the latest round's results are cut,
+    until the turn fits. Earlier turns of the chat get what is left. Going
+    back from the newest, the latest turns are sent verbatim; older turns
+    keep their text but their markdown result tables shrink to a one-line
+    summary. Once a turn no longer fits, it and every older turn are folded
+    into a rolling summary of one line per turn, which gets a fifth of the
+    history's share and loses its oldest lines first. Tokens are estimated
+    at four characters each.
+    """
+    
+    CHARS_PER_TOKEN = 4
+    MESSAGE_OVERHEAD = 4  # tokens for the role and framing of each message
+    SUMMARY_HEADER = "Summary of earlier turns of this conversation:"
+    
+    def __init__(self, budget: int = REQUEST_TOKEN_BUDGET, recent_turns: int = HISTORY_RECENT_TURNS):
+        self.budget = budget
+        self.recent_turns = recent_turns
+    
+    @classmethod
+    def estimate_tokens(cls, text: str) -> int:
+        return len(text) // cls.CHARS_PER_TOKEN + cls.MESSAGE_OVERHEAD
+    
+    @classmethod
+    def estimate(cls, content: Any) -> int:
+        """Tokens of a message's content, a list of content blocks or tool definitions"""
+        if not isinstance(content, str):
+            content = json.dumps(content, default=str)
+        return cls.estimate_tokens(content)
+    
+    def fit(
+        self,
+        history: List[Union[Dict[str, Any], ChatMessage]],
+        turn: List[Dict[str, Any]],
+        reserved: int,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Messages for one request and the rolling summary (or None), within the budget
+        
+        ``turn`` holds this turn's messages (the question, then the tool
+        rounds so far) and ``reserved`` the tokens of the tools and system
+        prompt.
+        """
+        available = max(0, self.budget - reserved)
+        turn = self.fit_turn(turn, available)
+        used = sum(self.estimate(msg["content"]) for msg in turn)
+        messages, summary = self.build(history, max(0, available - used))
+        return messages + turn, summary
+    
+    def fit_turn(self, turn: List[Dict[str, Any]], available: int) -> List[Dict[str, Any]]:
+        """This turn's messages cut down to ``available`` tokens where tool results allow
+        
+        Results of earlier tool rounds are replaced by a note first (Claude
+        has already read them), then the latest round's results are cut to
+        equal shares of what is left. The question itself is never cut.
+        """
+        def used() -> int:
+            return sum(self.estimate(msg["content"]) for msg in turn)
+        
+        if used() <= available:
+            return turn
+        turn = [dict(msg) for msg in turn]
+        rounds = [msg for msg in turn if isinstance(msg["content"], list)
+                  and any(block.get("type") == "tool_result" for block in msg["content"])]
+        for msg in rounds[:-1]:
+            msg["content"] = [
+                dict(block, content=f"[Result of {len(block['content'])} characters left out to stay "
+                                    "within the token budget; call the tool again if it is needed]")
+                for block in msg["content"]
+            ]
+            if used() <= available:
+                return turn
+        if rounds:
+            latest = rounds[-1]
+            note = "\n-- Result cut to fit the token budget; narrow the query for the rest."
+            empty = [dict(block, content="") for block in latest["content"]]
+            room = available - (used() - self.estimate(latest["content"])) - self.estimate(empty)
+            share = max(0, room * self.CHARS_PER_TOKEN // len(empty) - len(note))
+            latest["content"] = [
+                dict(block, content=block["content"] if len(block["content"]) <= share
+                     else block["content"][:share] + note)
+                for block in latest["content"]
+            ]
+        return turn
+    
+    def build(
+        self, history: List[Union[Dict[str, Any], ChatMessage]], budget: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Claude messages for the history, and the rolling summary of older turns (or None)
+        
+        ``budget`` defaults to the whole request budget.
+        """
+        budget = self.budget if budget is None else budget
+        summary_budget = budget // 5 - self.estimate_tokens(self.SUMMARY_HEADER)
+        budget -= budget // 5
+        kept, folded = [], []
+        for age, (question, answer) in enumerate(reversed(self._turns(history))):
+            if not folded:
+                candidates = [answer] if age < self.recent_turns else []
+                candidates.append(self.compact(answer))
+                for reply in candidates:
+                    cost = self.estimate_tokens(question) + self.estimate_tokens(reply)
+                    if cost <= budget:
+                        budget -= cost
+                        kept.append((question, reply))
+                        break
+                else:
+                    folded.append(self._summary_line(question, answer))
+            else:
+                folded.append(self._summary_line(question, answer))
+        
+        messages = []
+        for question, reply in reversed(kept):
+            messages.append({"role": "user", "content": question})
+            messages.append({"role": "assistant", "content": reply})
+        
+        # The summary keeps the most recent of the folded turns that fit
+        lines = []
+        for line in folded:
+            cost = self.estimate_tokens(line)
+            if cost > summary_budget:
+                break
+            summary_budget -= cost
+            lines.append(line)
+        summary = "\n".join([self.SUMMARY_HEADER] + lines[::-1]) if lines else None
+        return messages, summary
+    
+    @staticmethod
+    def _turns(history: List[Union[Dict[str, Any], ChatMessage]]) -> List[Tuple[str, str]]:
+        """(user message, assistant messages joined) per turn"""
+        turns = []
+        for msg in history:
+            if isinstance(msg, ChatMessage):
+                role, content = msg.role, msg.content
+            else:
+                role, content = msg.get("role"), msg.get("content")
+            if not isinstance(content, str):
+                continue  # files and components have no text for Claude
+            if role == "user":
+                turns.append([content, []])
+            elif role == "assistant" and turns:
+                turns[-1][1].append(content)
+        return [(question, "\n\n".join(replies) or "(no reply)") for question, replies in turns]
+    
+    @staticmethod
+    def compact(text: str) -> str:
+        """Replace each markdown table with a one-line note of its size and columns"""
+        out, table = [], []
+        for line in text.split("\n") + [""]:
+            if line.startswith("|"):
+                table.append(line)
+                continue
+            if table:
+                columns = [cell.strip() for cell in table[0].strip().strip("|").split("|")]
+                rows = max(0, len(table) - 2)  # header and separator
+                out.append(f"[table of {rows} rows: {', '.join(columns)}]")
+                table = []
+            out.append(line)
+        return "\n".join(out[:-1])
+    
+    @classmethod
+    def _summary_line(cls, question: str, answer: str) -> str:
+        def clip(text: str, limit: int) -> str:
+            text = " ".join(text.split())
+            return text if len(text) <= limit else text[:limit - 3] + "..."
+        return f"- User: {clip(question, 160)} | Assistant: {clip(cls.compact(answer), 240)}"
+
+
 class PocketDBAClient:
     def __init__(self):
         self.mcp_client = None
@@ -33,30 +253,37 @@ class PocketDBAClient:
             api_key = os.getenv('ANTHROPIC_API_KEY')
             if not api_key:
                 raise ValueError("ANTHROPIC_API_KEY not found in environment. Please add it to your .env file.")
-            self.anthropic = Anthropic(api_key=api_key)
+            self.anthropic = AsyncAnthropic(api_key=api_key)
         else:
             self.anthropic = None  # No API client needed in test mode
             
         self.tools = []
+        self.schema_digest = None
+        self.usage = dict.fromkeys(("requests",) + USAGE_FIELDS, 0)
+        self.history = HistoryManager()
         self.connected = False
         self.exit_stack = None
+        self._connect_lock = asyncio.Lock()
     
-    def connect_to_server(self) -> str:
-        """Connect to the pocket-dba MCP server"""
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+    async def connect_to_server(self) -> str:
+        """Connect to the pocket-dba MCP server
         
-        return loop.run_until_complete(self._connect_to_server())
+        Gradio runs async handlers on its own long-lived event loop, so the
+        MCP client opened here stays on that loop and every chat shares it;
+        concurrent chats overlap their Claude and database waits on it.
+        """
+        async with self._connect_lock:
+            if self.connected:
+                return self._connected_status()
+            return await self._connect_to_server()
     
     async def _connect_to_server(self) -> str:
         """Async connection to MCP server"""
+        self.exit_stack = AsyncExitStack()
         try:
             # Connect to our FastMCP server instance directly (in-memory)
             self.mcp_client = Client(mcp)
-            await self.mcp_client.__aenter__()
+            await self.exit_stack.enter_async_context(self.mcp_client)
             
             # List available tools
             tools_response = await self.mcp_client.list_tools()
@@ -65,123 +292,274 @@ class PocketDBAClient:
                 "description": tool.description,
                 "input_schema": tool.inputSchema
             } for tool in tools_response]
+            self.schema_digest = await self._build_schema_digest()
             
             self.connected = True
-            tool_names = [tool["name"] for tool in self.tools]
-            return f"✅ Connected to Pocket DBA Server. Available tools: {', '.join(tool_names)}"
+            return self._connected_status()
             
         except Exception as e:
             self.connected = False
+            await self.exit_stack.aclose()
             return f"❌ Connection failed: {str(e)}"
     
-    def process_message(self, message: str, history: List[Union[Dict[str, Any], ChatMessage]]) -> tuple:
-        """Process user message and return updated chat history"""
+    def _connected_status(self) -> str:
+        tool_names = [tool["name"] for tool in self.tools]
+        return f"✅ Connected to Pocket DBA Server. Available tools: {', '.join(tool_names)}"
+    
+    async def process_message(self, message: str, history: List[Union[Dict[str, Any], ChatMessage]]):
+        """Stream the reply to a user message into the chat history as it arrives"""
         if not self.connected:
-            return history + [
+            yield history + [
                 {"role": "user", "content": message},
                 {"role": "assistant", "content": "❌ Please connect to the database server first using the Connect button."}
             ], gr.Textbox(value="")
+            return
         
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        
-        new_messages = loop.run_until_complete(self._process_query(message, history))
-        return history + [{"role": "user", "content": message}] + new_messages, gr.Textbox(value="")
+        turn = history + [{"role": "user", "content": message}]
+        yield turn, gr.Textbox(value="")  # show the question right away
+        async for new_messages in self._stream_query(message, history):
+            yield turn + new_messages, gr.Textbox(value="")
     
     async def _process_query(self, message: str, history: List[Union[Dict[str, Any], ChatMessage]]):
-        """Async processing of user query with Claude and MCP tools"""
+        """Assistant messages for a user message once the reply is complete"""
+        new_messages = []
+        async for new_messages in self._stream_query(message, history):
+            pass
+        return new_messages
+    
+    async def _stream_query(self, message: str, history: List[Union[Dict[str, Any], ChatMessage]]):
+        """Process a user query with Claude and MCP tools
+        
+        Claude may call tools over several rounds: all tool calls of a round
+        run concurrently and their results go back to Claude as tool_result
+        blocks, until it answers without calling tools. After
+        MAX_TOOL_ROUNDS rounds or TURN_BUDGET_SECONDS it must answer with
+        what it has. Yields the reply's assistant messages every time they
+        change: text grows token by token, and each tool call shows as a
+        progress message that is replaced by its result.
+        """
+        result_messages = []
         try:
             # TEST MODE: Return canned responses without API calls
             if self.test_mode:
-                return await self._process_query_test_mode(message)
+                yield await self._process_query_test_mode(message)
+                return
             
-            # Convert history to Claude format
-            claude_messages = []
-            for msg in history:
-                if isinstance(msg, ChatMessage):
-                    role, content = msg.role, msg.content
-                else:
-                    role, content = msg.get("role"), msg.get("content")
-                
-                if role in ["user", "assistant", "system"]:
-                    claude_messages.append({"role": role, "content": content})
-            
-            # Add current message
-            claude_messages.append({"role": "user", "content": message})
+            # This turn's messages: the question, then a pair of messages per tool round
+            turn = [{"role": "user", "content": message}]
+            tools = self._cached_tools()
+            reserved = self.history.estimate(tools) + self.history.estimate(self._system_blocks())
             
-            # Call Claude with our MCP tools
-            response = self.anthropic.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=2000,
-                messages=claude_messages,
-                tools=self.tools,
-                system="""You are a helpful database assistant called "Pocket DBA". You help business owners query their SQL Server database using natural language.
-
-Available tools:
-1. execute_sql - Run SELECT queries to get data
-2. describe_table - Get table structure and columns  
-3. get_relationships - Find foreign key relationships between tables
-
-Guidelines:
-- Always be helpful and explain what you're doing
-- Use execute_sql for data queries
-- Use describe_table to understand table structure before writing complex queries
-- Use get_relationships to understand how tables connect
-- Format query results in a readable way
-- Only run SELECT queries (read-only)
-- If you need to understand the database structure, start with describe_table or get_relationships"""
-            )
-
-            result_messages = []
-            
-            # Process Claude's response
-            for content in response.content:
-                if content.type == 'text':
-                    result_messages.append({
-                        "role": "assistant", 
-                        "content": content.text
-                    })
-                    
-                elif content.type == 'tool_use':
-                    tool_name = content.name
-                    tool_args = content.input
-                    
-                    # Execute the MCP tool
-                    try:
-                        tool_result = await self.mcp_client.call_tool(tool_name, tool_args)
-                        result_data = tool_result[0].text if tool_result else "No data returned"
-                        
-                        # Format the result nicely
-                        if tool_name == "execute_sql":
-                            formatted_result = self._format_sql_results(result_data)
-                        elif tool_name == "describe_table":
-                            formatted_result = self._format_table_description(result_data)
-                        elif tool_name == "get_relationships":
-                            formatted_result = self._format_relationships(result_data)
-                        else:
-                            formatted_result = result_data
-                        
-                        result_messages.append({
-                            "role": "assistant",
-                            "content": f"📊 **{tool_name.replace('_', ' ').title()}**\n\n{formatted_result}"
-                        })
-                        
-                    except Exception as e:
+            started = time.monotonic()
+            for round_number in itertools.count():
+                # Fit history and tool rounds into the request budget before every call
+                claude_messages, summary = self.history.fit(history, turn, reserved)
+                request = dict(
+                    model=MODEL,
+                    max_tokens=2000,
+                    messages=claude_messages,
+                    tools=tools,
+                    system=self._system_blocks(summary)
+                )
+                elapsed = time.monotonic() - started
+                out_of_budget = round_number >= MAX_TOOL_ROUNDS or elapsed >= TURN_BUDGET_SECONDS
+                if out_of_budget:
+                    request["tool_choice"] = {"type": "none"}
+                    if round_number:
                         result_messages.append({
                             "role": "assistant",
-                            "content": f"❌ Error executing {tool_name}: {str(e)}"
+                            "content": f"⚠️ *Stopped looking after {round_number} rounds of tool calls "
+                                       f"({elapsed:.0f}s); answering with what was found so far.*"
                         })
-            
-            return result_messages
+                        yield self._copy(result_messages)
+                
+                # Call Claude with our MCP tools, showing text as it is generated
+                progress = {}  # content block index -> its progress message
+                async with self.anthropic.messages.stream(**request) as stream:
+                    text = None
+                    async for event in stream:
+                        if event.type == 'text':
+                            if text is None:
+                                text = {"role": "assistant", "content": ""}
+                                result_messages.append(text)
+                            text["content"] = event.snapshot
+                            yield self._copy(result_messages)
+                        elif event.type == 'content_block_start' and event.content_block.type == 'tool_use':
+                            progress[event.index] = {
+                                "role": "assistant",
+                                "content": f"⏳ Preparing {self._tool_title(event.content_block.name)}..."
+                            }
+                            result_messages.append(progress[event.index])
+                            yield self._copy(result_messages)
+                        elif event.type == 'content_block_stop':
+                            text = None  # the next text block gets its own message
+                    response = await stream.get_final_message()
+                self._record_usage(response)
+                
+                tool_calls = [(index, block) for index, block in enumerate(response.content) if block.type == 'tool_use']
+                if not tool_calls or out_of_budget:
+                    break
+                
+                # Run this round's tools concurrently, replacing each progress message with its result
+                statuses = []
+                for index, block in tool_calls:
+                    status = progress.get(index)
+                    if status is None:
+                        status = {"role": "assistant", "content": ""}
+                        result_messages.append(status)
+                    status["content"] = f"⏳ Running {self._tool_title(block.name)}..."
+                    statuses.append(status)
+                yield self._copy(result_messages)
+                
+                results = await asyncio.gather(*(self._call_tool(block) for _, block in tool_calls))
+                tool_results = []
+                for (_, block), status, (result_data, failed) in zip(tool_calls, statuses, results):
+                    if failed:
+                        status["content"] = f"❌ Error executing {block.name}: {result_data}"
+                    else:
+                        status["content"] = (
+                            f"📊 **{self._tool_title(block.name)}**\n\n{self._format_tool_result(block.name, result_data)}"
+                        )
+                    tool_results.append({
+                        "type": "tool_result",
+                        "tool_use_id": block.id,
+                        "content": self._clip(result_data),
+                        "is_error": failed or result_data.startswith("Error:")
+                    })
+                yield self._copy(result_messages)
+                
+                turn.append({"role": "assistant", "content": self._assistant_blocks(response.content)})
+                turn.append({"role": "user", "content": tool_results})
             
         except Exception as e:
-            return [{
+            result_messages.append({
                 "role": "assistant",
                 "content": f"❌ Error processing your request: {str(e)}"
-            }]
+            })
+            yield self._copy(result_messages)
+    
+    async def _build_schema_digest(self) -> Optional[str]:
+        """Compact list of tables, columns and foreign keys for the system prompt
+        
+        Covers the first SCHEMA_DIGEST_TABLES tables, so Claude can often write
+        a query without describing tables first. Returns None when disabled or
+        when the schema cannot be read; the digest is only a shortcut.
+        """
+        if SCHEMA_DIGEST_TABLES <= 0:
+            return None
+        try:
+            names = self._result_text(await self.mcp_client.read_resource("mssql://tables")).split("\n")
+            names = [name for name in names if name]
+            shown = names[:SCHEMA_DIGEST_TABLES]
+            columns, relationships = await asyncio.gather(
+                self.mcp_client.call_tool("describe_tables", {"table_names": shown}),
+                self.mcp_client.call_tool("get_relationships_bulk", {"table_names": shown}),
+            )
+            references = {}
+            for table, _, column, ref_table, ref_column in self._parse_csv(self._result_text(relationships))[0][1:]:
+                references[(table, column)] = f"{ref_table}.{ref_column}"
+            tables = {}
+            for table, column, data_type, *_ in self._parse_csv(self._result_text(columns))[0][1:]:
+                reference = references.get((table, column))
+                tables.setdefault(table, []).append(
+                    f"{column} {data_type}" + (f" -> {reference}" if reference else "")
+                )
+        except Exception:
+            return None
+        if not tables:
+            return None
+        
+        lines = ["Database schema (table: column type, -> marks a foreign key):"]
+        lines.extend(f"{table}: {', '.join(cols)}" for table, cols in tables.items())
+        if len(names) > len(shown):
+            lines.append(f"...and {len(names) - len(shown)} more tables not listed here.")
+        return "\n".join(lines)
+    
+    def _system_blocks(self, summary: Optional[str] = None) -> List[Dict[str, Any]]:
+        """System prompt and schema digest, cached as a prefix together with the tools
+        
+        The rolling summary of older turns changes every turn, so it comes
+        after the cache breakpoint.
+        """
+        blocks = [{"type": "text", "text": SYSTEM_PROMPT}]
+        if self.schema_digest:
+            blocks.append({"type": "text", "text": self.schema_digest})
+        blocks[-1]["cache_control"] = CACHE_CONTROL
+        if summary:
+            blocks.append({"type": "text", "text": summary})
+        return blocks
+    
+    def _cached_tools(self) -> List[Dict[str, Any]]:
+        """Tool definitions with a cache breakpoint after the last one"""
+        if not self.tools:
+            return self.tools
+        return self.tools[:-1] + [dict(self.tools[-1], cache_control=CACHE_CONTROL)]
+    
+    def _record_usage(self, response: Any) -> None:
+        """Add a response's token counts, including prompt cache reads and writes, to self.usage"""
+        self.usage["requests"] += 1
+        usage = getattr(response, "usage", None)
+        for field in USAGE_FIELDS:
+            value = getattr(usage, field, None)
+            if isinstance(value, int):
+                self.usage[field] += value
+    
+    def usage_summary(self) -> str:
+        """Token usage so far, with the share of input tokens read from the prompt cache"""
+        usage = self.usage
+        if not usage["requests"]:
+            return ""
+        prompt = usage["input_tokens"] + usage["cache_creation_input_tokens"] + usage["cache_read_input_tokens"]
+        hit_rate = usage["cache_read_input_tokens"] / prompt if prompt else 0.0
+        return (
+            f"📈 {usage['requests']} Claude requests · {prompt:,} input tokens "
+            f"({usage['cache_read_input_tokens']:,} from cache, {usage['cache_creation_input_tokens']:,} written to cache, "
+            f"{hit_rate:.0%} cached) · {usage['output_tokens']:,} output tokens"
+        )
+    
+    async def _call_tool(self, block: Any) -> Tuple[str, bool]:
+        """Run one tool call on the MCP server: (result text, whether the call itself failed)"""
+        try:
+            return self._result_text(await self.mcp_client.call_tool(block.name, block.input)), False
+        except Exception as e:
+            return str(e), True
+    
+    @staticmethod
+    def _assistant_blocks(content: List[Any]) -> List[Dict[str, Any]]:
+        """An assistant response's text and tool_use blocks as request parameters"""
+        blocks = []
+        for block in content:
+            if block.type == 'text' and block.text:
+                blocks.append({"type": "text", "text": block.text})
+            elif block.type == 'tool_use':
+                blocks.append({"type": "tool_use", "id": block.id, "name": block.name, "input": block.input})
+        return blocks
+    
+    @staticmethod
+    def _clip(data: str) -> str:
+        """A tool result cut to TOOL_RESULT_CHARS characters for Claude"""
+        if len(data) <= TOOL_RESULT_CHARS:
+            return data
+        return data[:TOOL_RESULT_CHARS] + f"\n-- Result cut to {TOOL_RESULT_CHARS} characters; narrow the query for the rest."
+    
+    @staticmethod
+    def _copy(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Snapshot of messages that are still being updated"""
+        return [dict(msg) for msg in messages]
+    
+    @staticmethod
+    def _tool_title(tool_name: str) -> str:
+        return tool_name.replace('_', ' ').title()
+    
+    def _format_tool_result(self, tool_name: str, result_data: str) -> str:
+        """Format a tool's result nicely for display"""
+        if tool_name == "execute_sql":
+            return self._format_sql_results(result_data)
+        elif tool_name == "describe_table":
+            return self._format_table_description(result_data)
+        elif tool_name == "get_relationships":
+            return self._format_relationships(result_data)
+        return result_data
     
     async def _process_query_test_mode(self, message: str):
         """Process queries in test mode with canned responses"""
@@ -196,7 +574,7 @@ Guidelines:
             result = await self.mcp_client.call_tool("execute_sql", {
                 "query": "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'"
             })
-            formatted = self._format_sql_results(result[0].text if result else "")
+            formatted = self._format_sql_results(self._result_text(result))
             return [
                 {"role": "assistant", "content": "I'll check what tables are in your database."},
                 {"role": "assistant", "content": f"📊 **Execute Sql**\n\n{formatted}"}
@@ -207,7 +585,7 @@ Guidelines:
             result = await self.mcp_client.call_tool("execute_sql", {
                 "query": "SELECT COUNT(*) as customer_count FROM SalesLT.Customer"
             })
-            formatted = self._format_sql_results(result[0].text if result else "")
+            formatted = self._format_sql_results(self._result_text(result))
             return [
                 {"role": "assistant", "content": "Let me count the customers for you."},
                 {"role": "assistant", "content": f"📊 **Execute Sql**\n\n{formatted}"}
@@ -219,7 +597,7 @@ Guidelines:
                 result = await self.mcp_client.call_tool("describe_table", {
                     "table_name": "SalesLT.Customer"
                 })
-                formatted = self._format_table_description(result[0].text if result else "")
+                formatted = self._format_table_description(self._result_text(result))
                 return [
                     {"role": "assistant", "content": "I'll show you the Customer table structure."},
                     {"role": "assistant", "content": f"📊 **Describe Table**\n\n{formatted}"}
@@ -230,7 +608,7 @@ Guidelines:
             result = await self.mcp_client.call_tool("get_relationships", {
                 "table_name": "SalesLT.SalesOrderHeader"
             })
-            formatted = self._format_relationships(result[0].text if result else "")
+            formatted = self._format_relationships(self._result_text(result))
             return [
                 {"role": "assistant", "content": "I'll show you the table relationships."},
                 {"role": "assistant", "content": f"📊 **Get Relationships**\n\n{formatted}"}
@@ -242,29 +620,54 @@ Guidelines:
             "content": "TEST MODE: I understand your question. In production, I would use Claude to generate the appropriate SQL query and return results."
         }]
     
+    @staticmethod
+    def _result_text(result: Any) -> str:
+        """Text of a call_tool result (a CallToolResult or a list of content blocks)"""
+        content = getattr(result, "content", result)
+        return str(content[0].text) if content else "No data returned"
+    
+    @staticmethod
+    def _parse_csv(data: str) -> tuple:
+        """Split server CSV output into parsed rows and trailing "-- " notes"""
+        lines = data.strip().split('\n')
+        notes = []
+        while lines and lines[-1].startswith('-- '):
+            notes.insert(0, lines.pop()[3:])
+        rows = list(csv.reader(io.StringIO('\n'.join(lines))))
+        return rows, notes
+    
+    @staticmethod
+    def _cell(value: str) -> str:
+        """Make a value safe inside a markdown table cell"""
+        return value.replace('|', '\\|').replace('\r', ' ').replace('\n', ' ')
+    
     def _format_sql_results(self, data: str) -> str:
         """Format SQL query results for display"""
         if data.startswith("Error:"):
             return f"❌ {data}"
         
-        lines = data.strip().split('\n')
+        lines, notes = self._parse_csv(data)
         if len(lines) <= 1:
             return "No results found."
         
         # Create a simple table format
-        header = lines[0].split(',')
-        rows = [line.split(',') for line in lines[1:]]
+        header = lines[0]
+        rows = lines[1:]
         
         result = f"**Results ({len(rows)} rows):**\n\n"
-        result += "| " + " | ".join(header) + " |\n"
+        result += "| " + " | ".join(map(self._cell, header)) + " |\n"
         result += "|" + "|".join([" --- " for _ in header]) + "|\n"
         
         for row in rows[:10]:  # Limit to first 10 rows for display
-            result += "| " + " | ".join(row) + " |\n"
+            result += "| " + " | ".join(map(self._cell, row)) + " |\n"
         
         if len(rows) > 10:
             result += f"\n*Showing first 10 of {len(rows)} rows*"
         
+        for note in notes:
+            icon = "⏱️" if note.startswith("Queue wait") else "⚠️"
+            result += f"\n\n{icon} *{note}*"
+        
         return result
     
     def _format_table_description(self, data: str) -> str:
@@ -272,7 +675,7 @@ Guidelines:
         if data.startswith("Error:"):
             return f"❌ {data}"
         
-        lines = data.strip().split('\n')
+        lines, _ = self._parse_csv(data)
         if len(lines) <= 1:
             return "No table information found."
         
@@ -280,8 +683,7 @@ Guidelines:
         result += "| Column | Type | Nullable | Default | Max Length |\n"
         result += "|--------|------|----------|---------|------------|\n"
         
-        for line in lines[1:]:  # Skip header
-            parts = line.split(',')
+        for parts in lines[1:]:  # Skip header
             if len(parts) >= 5:
                 col_name, data_type, nullable, default, max_len = parts[:5]
                 result += f"| {col_name} | {data_type} | {nullable} | {default or 'None'} | {max_len or 'N/A'} |\n"
@@ -293,7 +695,7 @@ Guidelines:
         if data.startswith("Error:"):
             return f"❌ {data}"
         
-        lines = data.strip().split('\n')
+        lines, _ = self._parse_csv(data)
         if len(lines) <= 1:
             return "No relationships found for this table."
         
@@ -301,8 +703,7 @@ Guidelines:
         result += "| Constraint | Column | References |\n"
         result += "|------------|--------|------------|\n"
         
-        for line in lines[1:]:  # Skip header
-            parts = line.split(',')
+        for parts in lines[1:]:  # Skip header
             if len(parts) >= 4:
                 constraint, column, ref_table, ref_column = parts[:4]
                 result += f"| {constraint} | {column} | {ref_table}.{ref_column} |\n"
@@ -339,6 +740,8 @@ def create_interface():
             bubble_full_width=False
         )
         
+        usage = gr.Markdown()
+        
         with gr.Row():
             msg = gr.Textbox(
                 label="Ask about your database",
@@ -363,10 +766,17 @@ def create_interface():
             outputs=status
         )
         
+        # No per-event limit: handlers only await Claude and the MCP server,
+        # so many chats can be in flight on Gradio's event loop at once
         msg.submit(
             client.process_message, 
             [msg, chatbot], 
-            [chatbot, msg]
+            [chatbot, msg],
+            concurrency_limit=None
+        ).then(
+            client.usage_summary,
+            None,
+            usage
         )
         
         clear_btn.click(
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Database backends for the pocket-dba MCP server
+
+The server only talks DB-API to the connections a backend hands out, plus
+two pyodbc extras every backend's connections support: a ``timeout``
+attribute (query timeout in seconds, 0 for none) and ``cursor.cancel()``.
+
+- ``pyodbc``: SQL Server / Azure SQL through the ODBC driver
+- ``sqlite``: offline stand-in with a SalesLT-shaped fixture, see
+  sqlite_backend.py
+"""
+from typing import Any, Dict, Optional
+
+
+class Backend:
+    """Source of database connections"""
+
+    name = ""
+
+    def connect(self) -> Any:
+        """Open a new read-only connection"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources held by the backend itself"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class PyodbcBackend(Backend):
+    """SQL Server over ODBC"""
+
+    name = "pyodbc"
+
+    def __init__(
+        self,
+        server: Optional[str] = None,
+        database: Optional[str] = None,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        driver: Optional[str] = None,
+    ):
+        self.conn_str = (
+            f"DRIVER={driver};"
+            f"SERVER={server};"
+            f"DATABASE={database};"
+            f"UID={user};"
+            f"PWD={password};"
+            "TrustServerCertificate=yes"
+        )
+
+    def connect(self) -> Any:
+        # Imported here so the other backends work without the ODBC driver manager installed
+        import pyodbc
+        return pyodbc.connect(self.conn_str, readonly=True)
+
+
+def create_backend(name: str, **options: Any) -> Backend:
+    """Backend by name (``pyodbc`` or ``sqlite``)"""
+    name = name.lower()
+    if name == "pyodbc":
+        return PyodbcBackend(**options)
+    if name == "sqlite":
+        from src.mssql.sqlite_backend import SqliteBackend
+        return SqliteBackend(**options)
+    raise ValueError(f"Unknown database backend '{name}'; use pyodbc or sqlite")
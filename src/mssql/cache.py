@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+In-memory caches for the pocket-dba MCP server
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from src.mssql.tsql import fingerprint
+
+_UNSET = object()
+
+
+class MetadataCache:
+    """LRU cache for schema metadata that follows catalog changes
+
+    Entries expire after ``ttl`` seconds and the least recently used entry is
+    dropped once ``max_entries`` is reached. In addition, ``version_loader``
+    (a cheap query such as ``MAX(modify_date)`` over ``sys.objects``) is run
+    at most every ``check_interval`` seconds; when its value changes the whole
+    cache is cleared, so DDL is picked up without waiting for the TTL.
+    Lookups between version checks never touch the database.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 600.0,
+        check_interval: float = 5.0,
+        version_loader: Optional[Callable[[], Any]] = None,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._version_loader = version_loader
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self._version: Any = _UNSET
+        self._last_check = float("-inf")
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "version_check_errors": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss"""
+        self._check_version()
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[1] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return item[0]
+            if item is not None:
+                del self._entries[key]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """Return the cached value, calling loader() and caching its result on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.put(key, value, ttl)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _check_version(self) -> None:
+        """Clear the cache if the catalog version changed since the last check"""
+        if self._version_loader is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+        try:
+            version = self._version_loader()
+        except Exception:
+            # Keep serving; entries are still bounded by their TTL
+            with self._lock:
+                self._stats["version_check_errors"] += 1
+            return
+        with self._lock:
+            # The first check only records a baseline
+            changed = self._version is not _UNSET and version != self._version
+            self._version = version
+            if changed and self._entries:
+                self._entries.clear()
+                self._stats["invalidations"] += 1
+
+
+def query_fingerprint(query: str) -> str:
+    """Normalize a query so trivially different spellings share a cache key
+
+    Comments are dropped, tokens are separated by single spaces and keywords
+    and names are upper-cased. String literals and quoted identifiers are
+    kept verbatim because their case can matter.
+    """
+    return fingerprint(query)
+
+
+class QueryResultCache:
+    """LRU cache for query results bounded by TTL and total size
+
+    Entries expire after ``ttl`` seconds. When the stored results exceed
+    ``max_bytes`` the least recently used ones are evicted.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = 60.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, size, expires_at)
+        self._bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "too_large": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return the cached result, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None and item[2] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return item[0]
+            if item is not None:
+                self._remove_locked(key)
+                self._stats["expirations"] += 1
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: Hashable, value: str, ttl: Optional[float] = None) -> None:
+        """Store a result, evicting least recently used results to stay within max_bytes"""
+        size = len(value.encode("utf-8"))
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+            if size > self.max_bytes:
+                self._stats["too_large"] += 1
+                return
+            while self._entries and self._bytes + size > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters, entry count and memory use"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _remove_locked(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
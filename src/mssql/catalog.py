@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Whole-database catalog snapshot
+Loads every table, column, index and foreign key in a fixed number of
+set-based queries against the sys.* catalog views, then answers schema
+questions from in-memory indexes.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# The queries stick to plain joins (no T-SQL-only functions) so they also run
+# against catalog emulations such as the offline test backend.
+OBJECTS_QUERY = """
+SELECT o.object_id, s.name, o.name, o.type
+FROM sys.objects o
+INNER JOIN sys.schemas s ON s.schema_id = o.schema_id
+WHERE o.type IN ('U', 'V')
+"""
+
+COLUMNS_QUERY = """
+SELECT
+    c.object_id,
+    c.column_id,
+    c.name,
+    COALESCE(bt.name, ut.name),
+    c.is_nullable,
+    dc.definition,
+    c.max_length,
+    c.precision,
+    c.scale
+FROM sys.columns c
+INNER JOIN sys.objects o ON o.object_id = c.object_id
+INNER JOIN sys.types ut ON ut.user_type_id = c.user_type_id
+LEFT JOIN sys.types bt ON bt.user_type_id = c.system_type_id
+LEFT JOIN sys.default_constraints dc ON dc.object_id = c.default_object_id
+WHERE o.type IN ('U', 'V')
+ORDER BY c.object_id, c.column_id
+"""
+
+INDEXES_QUERY = """
+SELECT
+    i.object_id,
+    i.index_id,
+    i.name,
+    i.type_desc,
+    i.is_unique,
+    i.is_primary_key,
+    i.is_unique_constraint,
+    i.filter_definition,
+    c.name,
+    ic.is_included_column,
+    ic.is_descending_key
+FROM sys.indexes i
+INNER JOIN sys.objects o ON o.object_id = i.object_id
+INNER JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+WHERE o.type IN ('U', 'V') AND i.index_id > 0
+ORDER BY i.object_id, i.index_id, ic.is_included_column, ic.key_ordinal, ic.index_column_id
+"""
+
+FOREIGN_KEYS_QUERY = """
+SELECT
+    fk.parent_object_id,
+    fk.name,
+    pc.name,
+    fk.referenced_object_id,
+    rc.name
+FROM sys.foreign_keys fk
+INNER JOIN sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+INNER JOIN sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+INNER JOIN sys.columns rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+ORDER BY fk.parent_object_id, fk.name, fkc.constraint_column_id
+"""
+
+_UNICODE_TYPES = {"nchar", "nvarchar"}
+_CHARACTER_TYPES = {"char", "varchar", "binary", "varbinary", "nchar", "nvarchar"}
+_LOB_LENGTHS = {"text": 2147483647, "image": 2147483647, "ntext": 1073741823, "xml": -1}
+_NUMERIC_TYPES = {
+    "tinyint", "smallint", "int", "bigint", "decimal", "numeric",
+    "money", "smallmoney", "float", "real",
+}
+_SCALED_TYPES = _NUMERIC_TYPES - {"float", "real"}
+
+
+@dataclass
+class ColumnInfo:
+    """A table or view column"""
+    name: str
+    data_type: str
+    is_nullable: bool
+    default: Optional[str]
+    max_length: int  # bytes, -1 for (max), as stored in sys.columns
+    precision: int
+    scale: int
+    ordinal: int
+
+    @property
+    def character_maximum_length(self) -> Optional[int]:
+        """Length in characters, matching INFORMATION_SCHEMA.COLUMNS.CHARACTER_MAXIMUM_LENGTH"""
+        if self.data_type in _CHARACTER_TYPES:
+            if self.data_type in _UNICODE_TYPES and self.max_length > 0:
+                return self.max_length // 2
+            return self.max_length
+        return _LOB_LENGTHS.get(self.data_type)
+
+    @property
+    def is_lob(self) -> bool:
+        """Large object type: (max) lengths, xml, text, ntext and image"""
+        return self.max_length == -1 or self.data_type in _LOB_LENGTHS
+
+    @property
+    def numeric_precision(self) -> Optional[int]:
+        return self.precision if self.data_type in _NUMERIC_TYPES else None
+
+    @property
+    def numeric_scale(self) -> Optional[int]:
+        return self.scale if self.data_type in _SCALED_TYPES else None
+
+
+@dataclass
+class IndexInfo:
+    """An index with its key and included columns"""
+    name: Optional[str]
+    index_id: int
+    type_desc: str
+    is_unique: bool
+    is_primary_key: bool
+    is_unique_constraint: bool
+    filter_definition: Optional[str]
+    key_columns: List[str] = field(default_factory=list)
+    included_columns: List[str] = field(default_factory=list)
+    descending_columns: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ForeignKeyInfo:
+    """One column pair of a foreign key constraint"""
+    name: str
+    column: str
+    referenced_table: str  # schema.table
+    referenced_column: str
+
+
+@dataclass
+class TableInfo:
+    """A table or view and everything the snapshot knows about it"""
+    object_id: int
+    schema: str
+    name: str
+    is_view: bool
+    columns: List[ColumnInfo] = field(default_factory=list)
+    indexes: List[IndexInfo] = field(default_factory=list)
+    foreign_keys: List[ForeignKeyInfo] = field(default_factory=list)
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.schema}.{self.name}"
+
+    @property
+    def primary_key(self) -> List[str]:
+        for index in self.indexes:
+            if index.is_primary_key:
+                return index.key_columns
+        return []
+
+
+class CatalogSnapshot:
+    """Point-in-time copy of the database catalog with lookup indexes
+
+    Name lookups are case-insensitive, like SQL Server's default collation.
+    """
+
+    def __init__(self, tables: List[TableInfo], load_seconds: float = 0.0):
+        self.loaded_at = time.time()
+        self.load_seconds = load_seconds
+        self._by_id: Dict[int, TableInfo] = {t.object_id: t for t in tables}
+        self._by_full_name: Dict[str, TableInfo] = {}
+        self._by_name: Dict[str, List[TableInfo]] = {}
+        for table in sorted(tables, key=lambda t: (t.schema.lower(), t.name.lower())):
+            self._by_full_name[table.full_name.lower()] = table
+            self._by_name.setdefault(table.name.lower(), []).append(table)
+
+    @classmethod
+    def load(cls, conn: Any) -> "CatalogSnapshot":
+        """Read the whole catalog over an open connection"""
+        start = time.perf_counter()
+        cursor = conn.cursor()
+
+        cursor.execute(OBJECTS_QUERY)
+        tables = {
+            object_id: TableInfo(object_id, schema, name, obj_type.strip() == "V")
+            for object_id, schema, name, obj_type in cursor.fetchall()
+        }
+
+        cursor.execute(COLUMNS_QUERY)
+        for object_id, column_id, name, data_type, nullable, default, max_length, precision, scale in cursor.fetchall():
+            table = tables.get(object_id)
+            if table is not None:
+                table.columns.append(ColumnInfo(
+                    name, data_type, bool(nullable), default,
+                    max_length, precision, scale, column_id,
+                ))
+
+        cursor.execute(INDEXES_QUERY)
+        current = None
+        for (object_id, index_id, name, type_desc, is_unique, is_pk, is_uq, filter_def,
+             column, is_included, is_descending) in cursor.fetchall():
+            table = tables.get(object_id)
+            if table is None:
+                continue
+            if current is None or (current[0], current[1].index_id) != (object_id, index_id):
+                index = IndexInfo(name, index_id, type_desc, bool(is_unique), bool(is_pk), bool(is_uq), filter_def)
+                table.indexes.append(index)
+                current = (object_id, index)
+            index = current[1]
+            if is_included:
+                index.included_columns.append(column)
+            else:
+                index.key_columns.append(column)
+                if is_descending:
+                    index.descending_columns.append(column)
+
+        cursor.execute(FOREIGN_KEYS_QUERY)
+        for parent_id, name, column, referenced_id, referenced_column in cursor.fetchall():
+            table, referenced = tables.get(parent_id), tables.get(referenced_id)
+            if table is not None and referenced is not None:
+                table.foreign_keys.append(ForeignKeyInfo(name, column, referenced.full_name, referenced_column))
+
+        cursor.close()
+        return cls(list(tables.values()), time.perf_counter() - start)
+
+    def tables(self, include_views: bool = False) -> List[TableInfo]:
+        """All tables ordered by schema and name"""
+        return [t for t in self._by_full_name.values() if include_views or not t.is_view]
+
+    def find(self, table_name: str) -> List[TableInfo]:
+        """Tables matching ``schema.table``, or every schema's table for a bare name"""
+        key = table_name.lower()
+        if "." in key:
+            table = self._by_full_name.get(key)
+            return [table] if table is not None else []
+        return list(self._by_name.get(key, []))
+
+    def get(self, object_id: int) -> Optional[TableInfo]:
+        return self._by_id.get(object_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Object counts and how long the snapshot took to load"""
+        tables = self._by_id.values()
+        return {
+            "tables": sum(1 for t in tables if not t.is_view),
+            "views": sum(1 for t in tables if t.is_view),
+            "columns": sum(len(t.columns) for t in tables),
+            "indexes": sum(len(t.indexes) for t in tables),
+            "foreign_keys": len({(t.object_id, fk.name) for t in tables for fk in t.foreign_keys}),
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+        }
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Registry of open server-side cursors for paged execute_sql results
+Each entry keeps a statement open on a pooled connection so later pages
+are fetched without re-running the query.
+"""
+import secrets
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class CursorLimitError(Exception):
+    """Too many paged results are open at once"""
+
+
+class OpenCursor:
+    """A paged result: the connection it runs on and its row stream"""
+
+    def __init__(self, page_size: int):
+        # Filled in once the slot is registered and the query has run
+        self.conn: Any = None
+        self.stream: Any = None
+        self.page_size = page_size
+        self.pages_read = 0
+        self.rows_read = 0
+        self.last_used = time.monotonic()
+        self.in_use = False
+
+    def close(self) -> None:
+        """Stop the statement and return the connection to its pool"""
+        if self.conn is None:
+            return
+        if self.stream is not None:
+            try:
+                self.stream.cancel()
+                self.stream.cursor.close()
+            except Exception:
+                # A broken cursor means the session state is unknown
+                self.conn.discard = True
+        self.conn.close()
+
+
+class CursorRegistry:
+    """Continuation-token registry with an open-cursor cap and idle expiry
+
+    Every open cursor pins one pooled connection, so ``max_open`` should stay
+    below the pool size. Cursors not read for ``idle_timeout`` seconds are
+    closed on the next registry access.
+    """
+
+    def __init__(self, max_open: int = 5, idle_timeout: float = 300.0):
+        self.max_open = max(1, max_open)
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, OpenCursor] = {}
+        self._stats = {"opened": 0, "expired": 0, "rejected": 0}
+
+    def register(self, entry: OpenCursor) -> str:
+        """Store an open cursor (marked in use) and return its continuation token"""
+        self.sweep()
+        with self._lock:
+            if len(self._cursors) >= self.max_open:
+                self._stats["rejected"] += 1
+                raise CursorLimitError(
+                    f"Too many paged results open ({self.max_open}); "
+                    "finish reading one or wait for it to expire"
+                )
+            token = secrets.token_urlsafe(16)
+            entry.in_use = True
+            self._cursors[token] = entry
+            self._stats["opened"] += 1
+            return token
+
+    def checkout(self, token: str) -> Optional[OpenCursor]:
+        """Claim a cursor for reading; None if the token is unknown, expired or busy"""
+        self.sweep()
+        with self._lock:
+            entry = self._cursors.get(token)
+            if entry is None or entry.in_use:
+                return None
+            entry.in_use = True
+            return entry
+
+    def checkin(self, token: str) -> None:
+        """Release a cursor after reading a page; it stays open for the next page"""
+        with self._lock:
+            entry = self._cursors.get(token)
+            if entry is not None:
+                entry.in_use = False
+                entry.last_used = time.monotonic()
+
+    def close(self, token: str) -> None:
+        """Close a cursor and forget its token"""
+        with self._lock:
+            entry = self._cursors.pop(token, None)
+        if entry is not None:
+            entry.close()
+
+    def sweep(self) -> None:
+        """Close cursors that have been idle longer than idle_timeout"""
+        now = time.monotonic()
+        expired: List[OpenCursor] = []
+        with self._lock:
+            for token, entry in list(self._cursors.items()):
+                if not entry.in_use and now - entry.last_used >= self.idle_timeout:
+                    expired.append(self._cursors.pop(token))
+            self._stats["expired"] += len(expired)
+        for entry in expired:
+            entry.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            entries = list(self._cursors.values())
+            self._cursors.clear()
+        for entry in entries:
+            entry.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["open"] = len(self._cursors)
+        stats["max_open"] = self.max_open
+        return stats
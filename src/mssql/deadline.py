@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Per-call deadlines and cancellation for the pocket-dba MCP server
+
+Each tool call gets a QueryCall holding its deadline and the pooled
+connections it checked out. The call travels to the worker thread in a
+context variable (the executor copies the context), so database code can
+size the ODBC query timeout from it. On the event loop, watch() awaits the
+work and, if the deadline passes or the MCP request is cancelled, cancels
+the call's running statements instead of leaving them busy on the server.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class QueryTimeoutError(Exception):
+    """The call ran past its deadline or was cancelled"""
+
+
+class QueryCall:
+    """Deadline and in-flight connections of one tool call
+
+    ``timeout`` of None or 0 means no deadline.
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout if timeout and timeout > 0 else None
+        self.deadline = time.monotonic() + self.timeout if self.timeout else None
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._connections: List[Any] = []
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the deadline (never negative), or None without one"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        """Raise QueryTimeoutError if the call was cancelled or its deadline passed"""
+        if self.cancelled:
+            raise QueryTimeoutError("Query was cancelled")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise QueryTimeoutError(f"Query exceeded the {self.timeout:g}s timeout")
+
+    def track(self, conn: Any) -> None:
+        """Register a pooled connection so cancel() can stop its statements"""
+        with self._lock:
+            cancelled = self.cancelled
+            if not cancelled:
+                self._connections.append(conn)
+        if cancelled:
+            conn.cancel()
+
+    def cancel(self) -> int:
+        """Cancel statements on every tracked connection; returns how many were still checked out"""
+        with self._lock:
+            self.cancelled = True
+            connections, self._connections = self._connections, []
+        return sum(1 for conn in connections if conn.cancel())
+
+
+_current_call: contextvars.ContextVar[Optional[QueryCall]] = contextvars.ContextVar("mssql_query_call", default=None)
+
+
+def current_call() -> Optional[QueryCall]:
+    """The QueryCall of the tool call running in this context, if any"""
+    return _current_call.get()
+
+
+async def watch(call: QueryCall, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    """Await ``fn(*args)`` with ``call`` as the current call and enforce its deadline
+
+    On timeout the call's statements are cancelled and QueryTimeoutError is
+    raised; if the awaiting task itself is cancelled (the client went away
+    or cancelled the request), statements are cancelled as well.
+    """
+    token = _current_call.set(call)
+    try:
+        if call.timeout is None:
+            return await fn(*args)
+        return await asyncio.wait_for(fn(*args), call.remaining())
+    except asyncio.TimeoutError:
+        call.cancel()
+        raise QueryTimeoutError(f"Query exceeded the {call.timeout:g}s timeout and was cancelled")
+    except asyncio.CancelledError:
+        call.cancel()
+        raise
+    finally:
+        _current_call.reset(token)
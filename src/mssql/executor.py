@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Bounded thread pool for blocking database calls
+Keeps pyodbc work off the FastMCP event loop and shares it fairly between
+MCP sessions: one client firing dozens of parallel queries waits its turn
+instead of starving everyone else.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+
+class ExecutorBusyError(Exception):
+    """The executor queue is full; the caller should retry later"""
+
+
+class RunTiming:
+    """Seconds a call waited for a worker and then ran, filled in by DatabaseExecutor.run()
+
+    ``queued`` is 0.0 exactly when the call started without waiting.
+    """
+
+    __slots__ = ("queued", "ran")
+
+    def __init__(self):
+        self.queued = 0.0
+        self.ran = 0.0
+
+
+class _Waiter:
+    __slots__ = ("session", "loop", "future", "granted")
+
+    def __init__(self, session: Hashable, loop: asyncio.AbstractEventLoop):
+        self.session = session
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+class DatabaseExecutor:
+    """Run blocking functions on a fixed number of worker threads
+
+    At most ``max_workers`` calls run at once (size this to the connection
+    pool), and at most ``max_per_session`` of them for one session (0: no
+    per-session cap). Calls beyond that wait in a queue per session; freed
+    workers go to the waiting sessions in turn, so each session gets its
+    share however many calls it has queued. Up to ``max_queue`` calls wait
+    in total and ``max_queue_per_session`` per session (0: no limit); beyond
+    that run() fails fast with ExecutorBusyError instead of queueing
+    unboundedly. Cancelling the awaiting task removes a call that has not
+    started yet.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int = 100, max_per_session: int = 0, max_queue_per_session: int = 0):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.max_queue = max(0, max_queue)
+        self.max_per_session = min(max_per_session, max_workers) if max_per_session > 0 else max_workers
+        self.max_queue_per_session = max(0, max_queue_per_session)
+        self._threads = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mssql-db")
+        self._lock = threading.Lock()
+        self._running = 0
+        self._running_by_session: Dict[Hashable, int] = {}
+        # Waiting calls per session; the session served longest ago comes first
+        self._waiting: "OrderedDict[Hashable, Deque[_Waiter]]" = OrderedDict()
+        self._queued = 0
+        self._stats = {
+            "submitted": 0,
+            "rejected": 0,
+            "cancelled": 0,
+            "waited": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+        }
+
+    async def run(self, fn: Callable[..., Any], *args: Any, session: Hashable = None,
+                  timing: Optional[RunTiming] = None) -> Any:
+        """Run fn(*args) on a worker thread and await its result
+
+        ``session`` identifies the caller for the per-session cap and fair
+        queueing; ``timing`` receives the queue wait and run time.
+        """
+        start = time.monotonic()
+        waiter = None
+        with self._lock:
+            if self._running < self.max_workers and self._running_by_session.get(session, 0) < self.max_per_session:
+                self._start_locked(session)
+            else:
+                waiting = len(self._waiting.get(session, ()))
+                if self._queued >= self.max_queue:
+                    self._stats["rejected"] += 1
+                    raise ExecutorBusyError(
+                        f"Server busy: {self._running + self._queued} database requests already in progress, "
+                        "try again shortly"
+                    )
+                if self.max_queue_per_session and waiting >= self.max_queue_per_session:
+                    self._stats["rejected"] += 1
+                    raise ExecutorBusyError(
+                        f"Too many queries in flight for this session ({waiting} queued); "
+                        "wait for earlier results before sending more"
+                    )
+                waiter = _Waiter(session, asyncio.get_running_loop())
+                self._waiting.setdefault(session, deque()).append(waiter)
+                self._queued += 1
+            self._stats["submitted"] += 1
+
+        queued = 0.0
+        if waiter is not None:
+            await self._wait_for_turn(waiter)
+            queued = time.monotonic() - start
+            with self._lock:
+                self._stats["waited"] += 1
+                self._stats["queue_wait_seconds_total"] += queued
+                self._stats["queue_wait_seconds_max"] = max(self._stats["queue_wait_seconds_max"], queued)
+        if timing is not None:
+            timing.queued = queued
+
+        # Carry context variables (e.g. per-request settings) into the worker thread
+        ctx = contextvars.copy_context()
+        started = time.monotonic()
+        try:
+            future = self._threads.submit(ctx.run, fn, *args)
+        except BaseException:
+            self._release(session)
+            raise
+        future.add_done_callback(lambda _future: self._release(session))
+
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Cannot stop a call that is already running; its worker is released when it returns
+            if future.cancel():
+                with self._lock:
+                    self._stats["cancelled"] += 1
+            raise
+        finally:
+            if timing is not None:
+                timing.ran = time.monotonic() - started
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and submission counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = self._running + self._queued
+            stats["running"] = self._running
+            stats["queued"] = self._queued
+            stats["sessions_running"] = len(self._running_by_session)
+            stats["sessions_waiting"] = len(self._waiting)
+        stats["max_workers"] = self.max_workers
+        stats["max_queue"] = self.max_queue
+        stats["max_per_session"] = self.max_per_session
+        stats["max_queue_per_session"] = self.max_queue_per_session
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop accepting work and let running calls finish"""
+        self._threads.shutdown(wait=False, cancel_futures=True)
+
+    async def _wait_for_turn(self, waiter: _Waiter) -> None:
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    queue = self._waiting.get(waiter.session)
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._waiting[waiter.session]
+                    self._queued -= 1
+                    self._stats["cancelled"] += 1
+            if granted:
+                # Handed a worker just as it was cancelled; pass the worker on
+                self._release(waiter.session)
+            raise
+
+    def _start_locked(self, session: Hashable) -> None:
+        self._running += 1
+        self._running_by_session[session] = self._running_by_session.get(session, 0) + 1
+
+    def _release(self, session: Hashable) -> None:
+        """A call finished: free its worker and hand free workers to waiting sessions"""
+        with self._lock:
+            self._running -= 1
+            count = self._running_by_session[session] - 1
+            if count:
+                self._running_by_session[session] = count
+            else:
+                del self._running_by_session[session]
+            granted = self._grant_locked()
+        for waiter in granted:
+            try:
+                waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+            except RuntimeError:  # the waiter's event loop is gone
+                self._release(waiter.session)
+
+    def _grant_locked(self) -> List[_Waiter]:
+        """Round robin over waiting sessions that are below their cap"""
+        granted = []
+        while self._running < self.max_workers and self._waiting:
+            for session in self._waiting:
+                if self._running_by_session.get(session, 0) < self.max_per_session:
+                    break
+            else:
+                break  # every waiting session is at its cap
+            queue = self._waiting.pop(session)
+            waiter = queue.popleft()
+            if queue:
+                self._waiting[session] = queue  # back of the line
+            self._queued -= 1
+            waiter.granted = True
+            self._start_locked(session)
+            granted.append(waiter)
+        return granted
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Tool metrics for the pocket-dba MCP server
+
+Latency histograms and counters kept in process, cheap enough to record on
+every call (a lock, a bisect and a few additions). Tool and resource
+handlers are wrapped with Metrics.instrument(), which times the whole call
+and names it in a context variable; database code records its phases
+(acquire, execute, fetch, serialize) and row counts against that name. The
+worker thread sees the name because the executor copies the context.
+
+snapshot() gives a JSON-friendly summary and prometheus() the Prometheus
+text exposition format. Both include the stats of registered collectors
+(pool, executor, caches).
+"""
+import bisect
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+# Upper bounds in seconds
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_current_tool: contextvars.ContextVar[str] = contextvars.ContextVar("mssql_tool", default="")
+
+
+def current_tool() -> str:
+    """Name of the tool or resource handler running in this context, or ''"""
+    return _current_tool.get()
+
+
+class Histogram:
+    """Bucketed distribution with count, sum and max"""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "Histogram") -> None:
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def copy(self) -> "Histogram":
+        copy = Histogram(self.buckets)
+        copy.merge(self)
+        return copy
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the q-quantile, interpolated within its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            if count and cumulative + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - cumulative) / count, self.max)
+            cumulative += count
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """Registry of labelled histograms and counters
+
+    Recorded names:
+
+    - ``tool_seconds`` (tool): wall time of each tool or resource call
+    - ``phase_seconds`` (tool, phase): acquire, execute, fetch, serialize,
+      catalog_load, plan and queue (wait for a database worker)
+    - ``calls`` (tool, status): calls by outcome, ``error`` for exceptions
+      and ``Error:`` results
+    - ``rows`` / ``bytes`` (tool): rows returned and UTF-8 bytes produced
+
+    Other counters are reported as totals under ``counters``.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def phase(self, phase: str, seconds: float) -> None:
+        """Record time spent in one phase of the current tool call"""
+        self.observe("phase_seconds", seconds, phase=phase, tool=current_tool())
+
+    @contextlib.contextmanager
+    def timer(self, phase: str) -> Iterator[None]:
+        """Time the block as ``phase`` of the current tool call (also when it raises)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase(phase, time.perf_counter() - start)
+
+    def record_read(self, fetch_seconds: float, serialize_seconds: float, rows: int) -> None:
+        """Record one result read: its fetch and serialize time and the rows it returned"""
+        tool = current_tool()
+        self.observe("phase_seconds", fetch_seconds, phase="fetch", tool=tool)
+        self.observe("phase_seconds", serialize_seconds, phase="serialize", tool=tool)
+        self.inc("rows", rows, tool=tool)
+
+    def register(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        """Include ``collector()`` (a component's stats dict) in snapshots and Prometheus output"""
+        self._collectors[name] = collector
+
+    def instrument(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Decorator for async tool and resource handlers (apply below @mcp.tool() / @mcp.resource())"""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = _current_tool.set(name)
+            start = time.perf_counter()
+            status = "error"
+            try:
+                result = await fn(*args, **kwargs)
+                if isinstance(result, str):
+                    self.inc("bytes", len(result) if result.isascii() else len(result.encode("utf-8")), tool=name)
+                    if not result.startswith("Error:"):
+                        status = "ok"
+                else:
+                    status = "ok"
+                return result
+            finally:
+                _current_tool.reset(token)
+                self.observe("tool_seconds", time.perf_counter() - start, tool=name)
+                self.inc("calls", tool=name, status=status)
+
+        return wrapper
+
+    def reset(self) -> None:
+        """Drop all recorded values (collectors stay registered)"""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+        self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-tool latency, phase, row, byte and error summaries plus collector stats"""
+        with self._lock:
+            histograms = [(name, dict(labels), h.copy()) for (name, labels), h in self._histograms.items()]
+            counters = [(name, dict(labels), value) for (name, labels), value in self._counters.items()]
+
+        tools: Dict[str, Dict[str, Any]] = {}
+        phases: Dict[str, Histogram] = {}
+
+        def tool_entry(labels: Dict[str, str]) -> Dict[str, Any]:
+            return tools.setdefault(labels.get("tool") or "(none)", {"calls": 0, "errors": 0, "rows": 0, "bytes": 0})
+
+        for name, labels, histogram in sorted(histograms, key=lambda item: sorted(item[1].items())):
+            if name == "tool_seconds":
+                tool_entry(labels)["latency"] = histogram.summary()
+            elif name == "phase_seconds":
+                tool_entry(labels).setdefault("phases", {})[labels["phase"]] = histogram.summary()
+                if labels["phase"] in phases:
+                    phases[labels["phase"]].merge(histogram)
+                else:
+                    phases[labels["phase"]] = histogram
+        other: Dict[str, float] = {}
+        for name, labels, value in counters:
+            if name == "calls":
+                entry = tool_entry(labels)
+                entry["calls"] += value
+                if labels.get("status") == "error":
+                    entry["errors"] += value
+            elif name in ("rows", "bytes"):
+                tool_entry(labels)[name] += value
+            else:
+                other[name] = other.get(name, 0) + value
+
+        snapshot: Dict[str, Any] = {
+            "uptime_seconds": time.time() - self.started,
+            "tools": dict(sorted(tools.items())),
+            "phases": {phase: histogram.summary() for phase, histogram in sorted(phases.items())},
+            "counters": dict(sorted(other.items())),
+        }
+        for name, stats in self._collect():
+            snapshot[name] = stats
+        return snapshot
+
+    def prometheus(self, prefix: str = "mssql_mcp") -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            histograms = sorted((name, labels, h.copy()) for (name, labels), h in self._histograms.items())
+            counters = sorted((name, labels, value) for (name, labels), value in self._counters.items())
+
+        lines: List[str] = []
+        typed = set()
+        for name, labels, histogram in histograms:
+            metric = f"{prefix}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {histogram.sum!r}")
+            lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+        for name, labels, value in counters:
+            metric = f"{prefix}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {_number(value)}")
+        for component, stats in self._collect():
+            for key, value in stats.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                metric = f"{prefix}_{component}_{key}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value!r}")
+        return "\n".join(lines) + "\n"
+
+    def _collect(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for name, collector in list(self._collectors.items()):
+            try:
+                yield name, collector()
+            except Exception as e:
+                yield name, {"error": str(e)}
+
+
+def _number(value: float) -> str:
+    """Exact text for a sample value (``:g`` would round large counters to 6 digits)"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Estimated execution plans for the pocket-dba MCP server
+
+A read-only query can still be expensive: an unconstrained cross join or a
+sort over a large table can keep SQL Server busy for minutes. With
+``SET SHOWPLAN_XML ON`` the server compiles a batch and returns its
+estimated plan instead of running it, which costs about as much as a
+compile. estimate_plan() fetches that plan and parse_showplan() reduces it
+to the numbers admission control needs: the estimated subtree cost, the
+estimated row count, the most expensive operators and any plan warnings
+(a missing join predicate is the usual sign of an accidental cross join).
+"""
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Any, Iterable, List, Optional
+
+SHOWPLAN_NS = "http://schemas.microsoft.com/sqlserver/2004/07/showplan"
+_NS = "{" + SHOWPLAN_NS + "}"
+
+
+@dataclass
+class PlanOperator:
+    """One plan operator; ``cost`` excludes the operators below it"""
+    name: str
+    estimated_rows: float
+    cost: float
+
+
+@dataclass
+class PlanEstimate:
+    """Optimizer estimates for a batch (costs summed over its statements)"""
+    cost: float = 0.0
+    rows: float = 0.0
+    operators: List[PlanOperator] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    def exceeds(self, max_cost: float = 0, max_rows: float = 0) -> Optional[str]:
+        """Which limit the estimate is over (a description), or None; 0 disables a limit"""
+        if max_cost and self.cost > max_cost:
+            return f"estimated cost {self.cost:.4g} exceeds the limit of {max_cost:g}"
+        if max_rows and self.rows > max_rows:
+            return f"estimated {self.rows:,.0f} rows exceed the limit of {max_rows:,.0f}"
+        return None
+
+    def summary(self, top: int = 3) -> str:
+        """Short description of the plan for the model: totals, costliest operators, warnings"""
+        lines = [f"Estimated plan: cost {self.cost:.4g}, {self.rows:,.0f} rows"]
+        costliest = sorted(self.operators, key=lambda op: op.cost, reverse=True)[:top]
+        for op in costliest:
+            share = op.cost / self.cost if self.cost else 0.0
+            lines.append(f"  {op.name}: cost {op.cost:.4g} ({share:.0%}), {op.estimated_rows:,.0f} rows")
+        if self.warnings:
+            lines.append(f"  Warnings: {', '.join(self.warnings)}")
+        return "\n".join(lines)
+
+
+def parse_showplan(documents: Iterable[str]) -> PlanEstimate:
+    """Reduce ShowPlanXML documents (one per statement or batch) to a PlanEstimate
+
+    The row estimate is that of the last statement, which is the one whose
+    rows a batch like ``DECLARE ...; SELECT ...`` returns.
+    """
+    estimate = PlanEstimate()
+    for document in documents:
+        root = ET.fromstring(document)
+        for statement in root.iter(_NS + "StmtSimple"):
+            estimate.cost += float(statement.get("StatementSubTreeCost", 0))
+            if statement.get("StatementEstRows") is not None:
+                estimate.rows = float(statement.get("StatementEstRows"))
+            _walk(statement, estimate)
+    return estimate
+
+
+def estimate_plan(conn: Any, sql: str) -> PlanEstimate:
+    """Compile ``sql`` on ``conn`` with SHOWPLAN_XML and return its estimate
+
+    Nothing is executed. If switching SHOWPLAN_XML off fails the session is
+    left in showplan mode, so callers must not reuse ``conn`` after an
+    exception.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SET SHOWPLAN_XML ON")
+    try:
+        cursor.execute(sql)
+        documents = []
+        while True:
+            documents.extend(row[0] for row in cursor.fetchall() if row and row[0])
+            if not cursor.nextset():
+                break
+    finally:
+        cursor.execute("SET SHOWPLAN_XML OFF")
+    return parse_showplan(documents)
+
+
+def _walk(element: ET.Element, estimate: PlanEstimate) -> float:
+    """Collect the RelOps below ``element``; returns the subtree cost of the topmost ones"""
+    total = 0.0
+    for child in element:
+        if child.tag == _NS + "RelOp":
+            subtree = float(child.get("EstimatedTotalSubtreeCost", 0))
+            below = _walk(child, estimate)
+            estimate.operators.append(PlanOperator(
+                name=_operator_name(child),
+                estimated_rows=float(child.get("EstimateRows", 0)),
+                cost=max(0.0, subtree - below),
+            ))
+            total += subtree
+        else:
+            if child.tag == _NS + "Warnings":
+                # Flags such as NoJoinPredicate="true", or elements such as <SpillToTempDb>
+                flags = [name for name, value in child.attrib.items() if value in ("1", "true")]
+                for warning in flags + [tag.tag.replace(_NS, "") for tag in child]:
+                    if warning not in estimate.warnings:
+                        estimate.warnings.append(warning)
+            total += _walk(child, estimate)
+    return total
+
+
+def _operator_name(relop: ET.Element) -> str:
+    physical, logical = relop.get("PhysicalOp", "?"), relop.get("LogicalOp")
+    name = physical if not logical or logical == physical else f"{physical} ({logical})"
+    for op in relop:
+        obj = op.find(_NS + "Object")
+        if obj is not None and obj.get("Table"):
+            table = ".".join(part for part in (obj.get("Schema"), obj.get("Table")) if part)
+            return f"{name} {table}"
+    return name
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Connection pool for the pocket-dba MCP server
+Keeps logged-in database connections around between tool calls
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+
+class PoolTimeoutError(Exception):
+    """No connection became available within the acquire timeout"""
+
+
+class _PoolEntry:
+    """A raw connection plus the bookkeeping the pool needs for it"""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn: Any):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """Connection checked out of a ConnectionPool
+
+    Behaves like the underlying DB-API connection. Calling close() or leaving
+    a ``with`` block hands the connection back to the pool instead of closing it.
+    Cursors opened through it can be cancelled from another thread with cancel().
+    """
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        self._pool = pool
+        self._entry = entry
+        self._released = False
+        self._lock = threading.Lock()
+        self._cursors: List[Any] = []
+        # Set to True when the connection must not be reused (e.g. broken session)
+        self.discard = False
+
+    @property
+    def raw(self) -> Any:
+        """The underlying driver connection"""
+        return self._entry.conn
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._entry.conn, name)
+
+    def cursor(self, *args: Any, **kwargs: Any) -> Any:
+        """Open a cursor on the driver connection and remember it for cancel()"""
+        cursor = self._entry.conn.cursor(*args, **kwargs)
+        with self._lock:
+            self._cursors.append(cursor)
+        return cursor
+
+    def cancel(self) -> bool:
+        """Cancel running statements and make sure the connection is not reused
+
+        Safe to call from another thread while a statement is executing.
+        Does nothing once the connection has been handed back to the pool,
+        so a late cancel can never hit another borrower's statement.
+        """
+        with self._lock:
+            if self._released:
+                return False
+            # A cancelled session may be left mid-batch; never hand it out again
+            self.discard = True
+            cursors = list(self._cursors)
+        for cursor in cursors:
+            try:
+                cursor.cancel()
+            except Exception:
+                pass
+        return True
+
+    def __enter__(self) -> "PooledConnection":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.close()
+        return False
+
+    def close(self) -> None:
+        """Return the connection to the pool"""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+            self._cursors.clear()
+        self._pool.release(self)
+
+
+class ConnectionPool:
+    """Thread-safe pool of database connections
+
+    - at most ``max_size`` connections are open at once; callers wait up to
+      ``acquire_timeout`` seconds for one to be released
+    - from the first acquire() on, a background thread opens connections
+      whenever fewer than ``min_size`` are open, so the next callers find
+      one ready instead of logging in
+    - idle connections above ``min_size`` are closed after ``idle_timeout`` seconds
+    - every connection is replaced after ``max_lifetime`` seconds
+    - connections idle for longer than ``health_check_interval`` seconds are
+      probed with a cheap query before being handed out
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 1800.0,
+        acquire_timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        health_check_query: str = "SELECT 1",
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._connect = connect
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_query = health_check_query
+
+        self._cond = threading.Condition()
+        self._idle: deque = deque()  # oldest on the left, most recently used on the right
+        self._size = 0  # open connections, idle + checked out
+        self._closed = False
+        self._warming = False
+        self._stats = {
+            "acquired": 0,
+            "waited": 0,
+            "timeouts": 0,
+            "created": 0,
+            "prewarmed": 0,
+            "closed": 0,
+            "health_check_failures": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "acquire_seconds_total": 0.0,
+            "acquire_seconds_max": 0.0,
+        }
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Check out a connection, opening a new one if the pool is not full"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        wait_time = 0.0
+
+        while True:
+            entry, to_close, timed_out = None, [], False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    to_close.extend(self._evict_locked(time.monotonic()))
+                    if self._idle:
+                        entry = self._idle.pop()
+                        self._warm_locked()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1  # reserve the slot, connect outside the lock
+                        self._warm_locked()
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        timed_out = True
+                        break
+                    wait_start = time.monotonic()
+                    self._cond.wait(remaining)
+                    wait_time += time.monotonic() - wait_start
+            self._close_all(to_close)
+            if timed_out:
+                raise PoolTimeoutError(
+                    f"Timed out after {timeout:.1f}s waiting for a database connection "
+                    f"(pool size {self.max_size})"
+                )
+
+            if entry is None:
+                try:
+                    entry = _PoolEntry(self._connect())
+                except Exception:
+                    self._forget()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+            elif not self._is_alive(entry):
+                self._close_all([entry])
+                self._forget()
+                continue
+
+            elapsed = time.monotonic() - start
+            with self._cond:
+                stats = self._stats
+                stats["acquired"] += 1
+                stats["acquire_seconds_total"] += elapsed
+                stats["acquire_seconds_max"] = max(stats["acquire_seconds_max"], elapsed)
+                if wait_time:
+                    stats["waited"] += 1
+                    stats["wait_seconds_total"] += wait_time
+                    stats["wait_seconds_max"] = max(stats["wait_seconds_max"], wait_time)
+            return PooledConnection(self, entry)
+
+    def release(self, pooled: PooledConnection) -> None:
+        """Take a connection back; called by PooledConnection.close()"""
+        entry = pooled._entry
+        keep = not pooled.discard and not self._closed
+        if keep:
+            try:
+                # End any open transaction so the next borrower starts clean
+                entry.conn.rollback()
+            except Exception:
+                keep = False
+        now = time.monotonic()
+        if keep and now - entry.created_at >= self.max_lifetime:
+            keep = False
+
+        if not keep:
+            self._close_all([entry])
+            self._forget()
+            return
+
+        entry.last_used = now
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Close all idle connections and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._close_all(idle)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool size and wait/acquire metrics"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["size"] = self._size
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._size - len(self._idle)
+            stats["max_size"] = self.max_size
+            stats["min_size"] = self.min_size
+        return stats
+
+    def _warm_locked(self) -> None:
+        """Start the background warm-up if fewer than min_size connections are open"""
+        if self._size < self.min_size and not self._warming and not self._closed:
+            self._warming = True
+            threading.Thread(target=self._warm, name="pool-warm", daemon=True).start()
+
+    def _warm(self) -> None:
+        """Open idle connections until min_size are open; stops at the first failure"""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    self._warming = False
+                    return
+                self._size += 1
+            try:
+                entry = _PoolEntry(self._connect())
+            except Exception:
+                # The next acquire() tries again (and reports the error itself)
+                with self._cond:
+                    self._warming = False
+                self._forget()
+                return
+            with self._cond:
+                self._stats["created"] += 1
+                self._stats["prewarmed"] += 1
+                if not self._closed:
+                    self._idle.append(entry)
+                    self._cond.notify()
+                    continue
+                self._size -= 1
+            self._close_all([entry])  # the pool closed while connecting
+
+    def _evict_locked(self, now: float) -> list:
+        """Remove expired idle connections; the caller closes them outside the lock"""
+        evicted = []
+        keep = deque()
+        idle_count = len(self._idle)
+        for entry in self._idle:
+            too_old = now - entry.created_at >= self.max_lifetime
+            too_idle = (
+                now - entry.last_used >= self.idle_timeout
+                and idle_count - len(evicted) > self.min_size
+            )
+            if too_old or too_idle:
+                evicted.append(entry)
+            else:
+                keep.append(entry)
+        if evicted:
+            self._idle = keep
+            self._size -= len(evicted)
+        return evicted
+
+    def _is_alive(self, entry: _PoolEntry) -> bool:
+        """Probe connections that have been idle for a while"""
+        if time.monotonic() - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            cursor = entry.conn.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception:
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+            return False
+
+    def _forget(self) -> None:
+        """Give up a reserved or broken connection slot"""
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _close_all(self, entries: list) -> None:
+        for entry in entries:
+            try:
+                entry.conn.close()
+            except Exception:
+                pass
+        if entries:
+            with self._cond:
+                self._stats["closed"] += len(entries)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Streaming result fetching for the pocket-dba MCP server
+Reads rows in batches and stops once a row or byte budget is spent,
+so one large SELECT cannot balloon the server process.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.mssql.metrics import Metrics
+from src.mssql.serialization import ResultWriter, get_writer
+
+
+class ResultStream:
+    """Batched reader over an executed cursor
+
+    Each batch is serialized by ``writer`` as soon as it is fetched. Rows
+    that were fetched but not emitted (look-ahead, or rows that did not fit
+    the byte budget) are kept and returned first by the next read, so a
+    stream can be read page by page without losing rows.
+
+    Time spent fetching and serializing is accumulated until
+    take_timings() collects it.
+    """
+
+    def __init__(self, cursor: Any, batch_size: int = 500, fmt: str = "csv"):
+        self.cursor = cursor
+        self.batch_size = max(1, batch_size)
+        self.writer: ResultWriter = get_writer(fmt, cursor.description)
+        self.columns = self.writer.columns
+        self._pending: List[Any] = []
+        self._exhausted = False
+        self.fetch_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+    def has_more(self) -> bool:
+        """True if at least one more row is available"""
+        if self._pending:
+            return True
+        if self._exhausted:
+            return False
+        start = time.perf_counter()
+        row = self.cursor.fetchone()
+        self.fetch_seconds += time.perf_counter() - start
+        if row is None:
+            self._exhausted = True
+            return False
+        self._pending.append(row)
+        return True
+
+    def read(self, max_rows: int, max_bytes: int, used_bytes: int = 0, min_rows: int = 0) -> Tuple[List[Any], List[str], str]:
+        """Read and serialize up to max_rows rows within max_bytes of UTF-8 output
+
+        ``used_bytes`` counts output already produced (e.g. the header).
+        The first ``min_rows`` rows are emitted even if they exceed the byte
+        budget, so paged reads always make progress. Returns the rows, their
+        serialized pieces and, if a budget stopped the read while rows
+        remain, a description of it.
+        """
+        rows: List[Any] = []
+        pieces: List[str] = []
+        while len(rows) < max_rows:
+            batch = self._next_batch(min(self.batch_size, max_rows - len(rows)))
+            if not batch:
+                return rows, pieces, ""
+
+            start = time.perf_counter()
+            encoded = self.writer.encode_rows(batch)
+            self.serialize_seconds += time.perf_counter() - start
+            batch_bytes = len("\n".join(encoded).encode("utf-8")) + len(encoded)
+            if used_bytes + batch_bytes <= max_bytes:
+                rows.extend(batch)
+                pieces.extend(encoded)
+                used_bytes += batch_bytes
+                continue
+
+            # This batch crosses the byte budget; keep the rows that still fit
+            for i, piece in enumerate(encoded):
+                piece_bytes = len(piece.encode("utf-8")) + 1
+                if used_bytes + piece_bytes > max_bytes and len(rows) >= min_rows:
+                    self._pending[:0] = batch[i:]
+                    return rows, pieces, f"output limit of {max_bytes} bytes reached"
+                rows.append(batch[i])
+                pieces.append(piece)
+                used_bytes += piece_bytes
+
+        if self.has_more():
+            return rows, pieces, f"row limit of {max_rows} rows reached"
+        return rows, pieces, ""
+
+    def render(self, rows: List[Any], pieces: List[str], notes: List[str], meta: Optional[Dict[str, Any]] = None) -> str:
+        """Assemble the output document with the writer (timed as serialization)"""
+        start = time.perf_counter()
+        result = self.writer.render(rows, pieces, notes, meta)
+        self.serialize_seconds += time.perf_counter() - start
+        return result
+
+    def take_timings(self) -> Tuple[float, float]:
+        """Fetch and serialize seconds accumulated since the last call"""
+        timings = (self.fetch_seconds, self.serialize_seconds)
+        self.fetch_seconds = self.serialize_seconds = 0.0
+        return timings
+
+    def cancel(self) -> None:
+        """Ask the server to stop producing rows we are not going to read"""
+        self._pending.clear()
+        self._exhausted = True
+        try:
+            self.cursor.cancel()
+        except Exception:
+            pass
+
+    def _next_batch(self, size: int) -> List[Any]:
+        if self._pending:
+            batch = self._pending[:size]
+            del self._pending[:size]
+            return batch
+        if self._exhausted:
+            return []
+        start = time.perf_counter()
+        batch = self.cursor.fetchmany(size)
+        self.fetch_seconds += time.perf_counter() - start
+        if not batch:
+            self._exhausted = True
+        return batch
+
+
+def stream_result(
+    cursor: Any,
+    max_rows: int,
+    max_bytes: int,
+    batch_size: int = 500,
+    fmt: str = "csv",
+    notes: Optional[List[str]] = None,
+    meta: Optional[Dict[str, Any]] = None,
+    metrics: Optional[Metrics] = None,
+) -> str:
+    """Serialize the cursor's result one fetchmany() batch at a time
+
+    At most ``max_rows`` rows and roughly ``max_bytes`` bytes of UTF-8 output
+    are produced. When a budget is hit the statement is cancelled and an
+    ``Output truncated: ...`` note is added (a ``-- `` line in CSV, a
+    ``truncated`` field in the JSON formats). ``notes`` and ``meta`` are
+    included in the output as given. Fetch and serialize time and the row
+    count are recorded in ``metrics`` when given.
+    """
+    stream = ResultStream(cursor, batch_size, fmt)
+    header = stream.writer.header()
+    rows, pieces, truncated = stream.read(max_rows, max_bytes, used_bytes=len(header.encode("utf-8")))
+    notes, meta = list(notes or []), dict(meta or {})
+    if truncated:
+        stream.cancel()
+        notes.append(
+            f"Output truncated: {truncated} after {len(rows)} rows. "
+            "Narrow the query (WHERE, TOP, fewer columns) or use page_size to see the rest."
+        )
+        meta["truncated"] = True
+    result = stream.render(rows, pieces, notes, meta)
+    if metrics is not None:
+        metrics.record_read(*stream.take_timings(), len(rows))
+    return result
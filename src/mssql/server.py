@@ -1,10 +1,32 @@
 #!/usr/bin/env python3
+import atexit
+import functools
+import inspect
+import json
+import math
 import os
-import pyodbc
+import sys
 from dotenv import load_dotenv
 from fastmcp import FastMCP
-from typing import List, Dict
+from fastmcp.server.dependencies import get_context
+from typing import Callable, List, Dict, Hashable, Optional, Tuple
 import re
+import threading
+
+# Allow running as a script (python src/mssql/server.py) as well as importing src.mssql.server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.mssql.backend import create_backend
+from src.mssql.cache import MetadataCache, QueryResultCache, query_fingerprint
+from src.mssql.cursors import CursorLimitError, CursorRegistry, OpenCursor
+from src.mssql.catalog import CatalogSnapshot, ColumnInfo, ForeignKeyInfo, IndexInfo, TableInfo
+from src.mssql.deadline import QueryCall, QueryTimeoutError, current_call, watch
+from src.mssql.executor import DatabaseExecutor, ExecutorBusyError, RunTiming
+from src.mssql.metrics import Metrics
+from src.mssql.plans import PlanEstimate, estimate_plan
+from src.mssql.pool import ConnectionPool
+from src.mssql.results import ResultStream, stream_result
+from src.mssql.serialization import FORMATS, NOTE_PREFIX, csv_field
+from src.mssql.tsql import apply_row_limit, is_read_only
 
 # Load environment variables
 load_dotenv()
@@ -12,6 +34,9 @@ load_dotenv()
 # Initialize FastMCP
 mcp = FastMCP("pocket-dba-mcp-server")
 
+# Latency, row and byte metrics for every tool and resource call (mssql://metrics)
+metrics = Metrics()
+
 # Database configuration
 DB_CONFIG = {
     "server": os.getenv("MSSQL_SERVER"),
@@ -21,230 +46,998 @@ DB_CONFIG = {
     "driver": os.getenv("MSSQL_DRIVER")
 }
 
+# "pyodbc" talks to SQL Server; "sqlite" is the offline stand-in used by tests and benchmarks
+DB_BACKEND = os.getenv("MSSQL_BACKEND", "pyodbc").lower()
+SQLITE_CONFIG = {
+    "path": os.getenv("MSSQL_SQLITE_PATH") or None,
+    "latency": float(os.getenv("MSSQL_SQLITE_LATENCY_MS", "0")) / 1000,
+    "row_scale": float(os.getenv("MSSQL_SQLITE_ROW_SCALE", "1")),
+    "extra_tables": int(os.getenv("MSSQL_SQLITE_EXTRA_TABLES", "0")),
+}
+
+# Result size budgets; output beyond them is cut off and flagged as truncated
+RESULT_LIMITS = {
+    "max_rows": int(os.getenv("MSSQL_MAX_ROWS", "10000")),
+    "max_bytes": int(os.getenv("MSSQL_MAX_RESULT_BYTES", "1000000")),
+    "fetch_batch_size": int(os.getenv("MSSQL_FETCH_BATCH_SIZE", "500")),
+    # Rewrite unlimited SELECTs with TOP / OFFSET-FETCH so the server stops early
+    "server_limit": os.getenv("MSSQL_SERVER_ROW_LIMIT", "false").lower() in ("1", "true", "yes"),
+}
+
+# Table previews (mssql://table/... and preview_table): default row count, and
+# how many characters of large text columns are shown unless asked for by name
+PREVIEW_CONFIG = {
+    "rows": int(os.getenv("MSSQL_PREVIEW_ROWS", "100")),
+    "lob_chars": int(os.getenv("MSSQL_PREVIEW_LOB_CHARS", "200")),
+}
+
+# Row counts, sizes, statistics dates and fragmentation change without any
+# DDL, so table_stats and get_indexes results are cached for a shorter time
+# than the schema
+TABLE_STATS_TTL = float(os.getenv("MSSQL_TABLE_STATS_TTL", "60"))
+
+# Pre-flight check of execute_sql queries against their estimated plan (SET SHOWPLAN_XML).
+# "off", "reject" (refuse over-limit queries) or "cap" (rewrite them to return at most cap_rows rows)
+COST_LIMITS = {
+    "mode": os.getenv("MSSQL_COST_CHECK", "off").lower(),
+    "max_cost": float(os.getenv("MSSQL_MAX_QUERY_COST", "100")),
+    "max_rows": float(os.getenv("MSSQL_MAX_ESTIMATED_ROWS", "0")),
+    "cap_rows": int(os.getenv("MSSQL_COST_CAP_ROWS", "1000")),
+}
+
+# Serve metrics at /metrics for Prometheus when running over an HTTP transport
+PROMETHEUS_ENDPOINT = os.getenv("MSSQL_METRICS_PROMETHEUS", "false").lower() in ("1", "true", "yes")
+
+# Default deadline for every tool call in seconds; 0 disables it
+QUERY_TIMEOUT = float(os.getenv("MSSQL_QUERY_TIMEOUT", "30"))
+
+# Connection pool configuration
+POOL_CONFIG = {
+    "min_size": int(os.getenv("MSSQL_POOL_MIN_SIZE", "1")),
+    "max_size": int(os.getenv("MSSQL_POOL_MAX_SIZE", "10")),
+    "idle_timeout": float(os.getenv("MSSQL_POOL_IDLE_TIMEOUT", "300")),
+    "max_lifetime": float(os.getenv("MSSQL_POOL_MAX_LIFETIME", "1800")),
+    "acquire_timeout": float(os.getenv("MSSQL_POOL_ACQUIRE_TIMEOUT", "30")),
+    "health_check_interval": float(os.getenv("MSSQL_POOL_HEALTH_CHECK_INTERVAL", "30")),
+}
+
+backend = create_backend(DB_BACKEND, **(SQLITE_CONFIG if DB_BACKEND == "sqlite" else DB_CONFIG))
+
+def create_connection():
+    """Open a new database connection (bypasses the pool)"""
+    return backend.connect()
+
+connection_pool = ConnectionPool(create_connection, **POOL_CONFIG)
+# Registered first so it runs last, after the pool has closed its connections
+atexit.register(backend.close)
+atexit.register(connection_pool.close)
+
 def get_connection():
-    """Create database connection"""
-    conn_str = (
-        f"DRIVER={DB_CONFIG['driver']};"
-        f"SERVER={DB_CONFIG['server']};"
-        f"DATABASE={DB_CONFIG['database']};"
-        f"UID={DB_CONFIG['user']};"
-        f"PWD={DB_CONFIG['password']};"
-        "TrustServerCertificate=yes"
-    )
-    return pyodbc.connect(conn_str, readonly=True)
+    """Check out a pooled database connection
 
-def is_read_only_query(query: str) -> bool:
-    """Validate query is read-only"""
-    clean_query = query.strip().upper()
-    
-    allowed_statements = ['SELECT', 'WITH', 'DECLARE']
-    forbidden_statements = [
-        'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 
-        'ALTER', 'TRUNCATE', 'MERGE', 'UPSERT', 'REPLACE',
-        'GRANT', 'REVOKE', 'EXEC', 'EXECUTE', 'SP_'
-    ]
+    Use as ``with get_connection() as conn:``; the connection goes back to the
+    pool when the block exits (or when close() is called). Inside a tool call
+    the ODBC query timeout is set to the time left before the call's deadline
+    and the connection is registered so the call can cancel its statements.
+    """
+    call = current_call()
+    remaining = None
+    if call is not None:
+        call.check()
+        remaining = call.remaining()
     
-    starts_with_allowed = any(clean_query.startswith(stmt) for stmt in allowed_statements)
-    if not starts_with_allowed:
-        return False
-        
-    contains_forbidden = any(stmt in clean_query for stmt in forbidden_statements)
-    if contains_forbidden:
-        return False
-        
-    # Check for SQL injection patterns
-    has_dangerous_chars = re.search(r';\s*\w+', clean_query)
-    if has_dangerous_chars:
-        return False
-        
-    return True
+    with metrics.timer("acquire"):
+        conn = connection_pool.acquire(None if remaining is None else min(remaining, POOL_CONFIG["acquire_timeout"]))
+    try:
+        conn.raw.timeout = 0 if remaining is None else max(1, math.ceil(remaining))
+    except Exception:
+        conn.close()
+        raise
+    if call is not None:
+        call.track(conn)
+    return conn
 
-def list_tables_raw() -> str:
-    """Raw function for listing all database tables"""
+# Paged execute_sql results keep their statement open between calls
+cursor_registry = CursorRegistry(
+    max_open=int(os.getenv("MSSQL_MAX_OPEN_CURSORS", str(max(1, POOL_CONFIG["max_size"] // 2)))),
+    idle_timeout=float(os.getenv("MSSQL_CURSOR_IDLE_TIMEOUT", "300")),
+)
+atexit.register(cursor_registry.close_all)
+
+# Blocking database work runs on a worker thread per pooled connection,
+# shared round robin between MCP sessions
+db_executor = DatabaseExecutor(
+    max_workers=POOL_CONFIG["max_size"],
+    max_queue=int(os.getenv("MSSQL_EXECUTOR_QUEUE_SIZE", "100")),
+    max_per_session=int(os.getenv("MSSQL_SESSION_MAX_CONCURRENCY", "0")),
+    max_queue_per_session=int(os.getenv("MSSQL_SESSION_QUEUE_SIZE", "0")),
+)
+atexit.register(db_executor.shutdown)
+
+def current_session() -> Hashable:
+    """Identity of the client connection making the current request, or None outside a request
+
+    HTTP clients are told apart by their Mcp-Session-Id. Over stdio and
+    in-memory transports every request gets a fresh session (and
+    ctx.session_id a fresh uuid), so the connection's outbound channel,
+    which lives as long as the client stays connected, identifies it.
+    """
+    try:
+        ctx = get_context()
+        connection = getattr(ctx.session, "_connection", None)
+        if connection is None:
+            return ctx.session_id
+    except RuntimeError:
+        return None
+    return connection.session_id or connection.outbound
+
+async def run_db(fn, *args, timeout: Optional[float] = None, timing: Optional[RunTiming] = None) -> str:
+    """Run a blocking *_raw function on the database executor
+
+    The call gets a deadline of ``timeout`` seconds (default
+    MSSQL_QUERY_TIMEOUT), which includes any wait for a worker. When it
+    passes, or the MCP request is cancelled, running statements are
+    cancelled on the server and their connections are discarded rather
+    than returned to the pool. ``timing`` receives the queue wait and
+    execution time.
+    """
+    call = QueryCall(QUERY_TIMEOUT if timeout is None else timeout)
+    timing = timing or RunTiming()
+    run = functools.partial(db_executor.run, session=current_session(), timing=timing)
+    try:
+        return await watch(call, run, fn, *args)
+    except (ExecutorBusyError, QueryTimeoutError) as e:
+        return f"Error: {str(e)}"
+    finally:
+        metrics.phase("queue", timing.queued)
+
+def with_timing(result: str, output_format: str, timing: RunTiming) -> str:
+    """Append the queue wait and execution time to a query result
+
+    JSON formats always get a ``timing`` object; CSV gets a note only when
+    the query had to wait for a worker.
+    """
+    if result.startswith("Error:"):
+        return result
+    if output_format.lower() in ("json", "typed") and result.endswith("}"):
+        return result[:-1] + ',"timing":' + json.dumps(
+            {"queue_seconds": round(timing.queued, 4), "execution_seconds": round(timing.ran, 4)}
+        ) + "}"
+    if not timing.queued:
+        return result  # keep CSV notes for things worth the reader's attention
+    return result + f"\n{NOTE_PREFIX}Queue wait {timing.queued:.3f}s, execution {timing.ran:.3f}s"
+
+def get_catalog_version():
+    """Cheap fingerprint of the schema; changes whenever objects are created, altered or dropped"""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "SELECT TABLE_SCHEMA, TABLE_NAME FROM INFORMATION_SCHEMA.TABLES "
-            "WHERE TABLE_TYPE = 'BASE TABLE' ORDER BY TABLE_SCHEMA, TABLE_NAME"
-        )
-        tables = cursor.fetchall()
-        return "\n".join([f"{schema}.{table}" for schema, table in tables])
+        cursor.execute("SELECT MAX(modify_date), COUNT(*) FROM sys.objects")
+        return tuple(cursor.fetchone())
+
+# Schema metadata cache, cleared when get_catalog_version() changes
+metadata_cache = MetadataCache(
+    max_entries=int(os.getenv("MSSQL_METADATA_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("MSSQL_METADATA_CACHE_TTL", "600")),
+    check_interval=float(os.getenv("MSSQL_METADATA_CHECK_INTERVAL", "5")),
+    version_loader=get_catalog_version,
+)
+
+# execute_sql results, keyed by normalized query text; MSSQL_RESULT_CACHE_MB=0 disables it
+result_cache = QueryResultCache(
+    max_bytes=int(float(os.getenv("MSSQL_RESULT_CACHE_MB", "64")) * 1024 * 1024),
+    ttl=float(os.getenv("MSSQL_RESULT_CACHE_TTL", "60")),
+)
+
+def cached_metadata(kind: str, ttl: Optional[float] = None):
+    """Cache a metadata *_raw function's successful results, keyed by its (case-insensitive) arguments
+
+    Arguments are bound to the function's signature with defaults filled
+    in, so positional, keyword and default calls share a cache entry.
+    ``ttl`` overrides the cache's TTL for data that changes without DDL.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (kind,) + tuple(str(arg).lower() for arg in bound.arguments.values())
+            result = metadata_cache.get(key)
+            if result is None:
+                result = fn(*bound.args, **bound.kwargs)
+                if not result.startswith("Error:"):
+                    metadata_cache.put(key, result, ttl)
+            return result
+        return wrapper
+    return decorator
+
+_catalog_lock = threading.Lock()
+
+def get_catalog() -> CatalogSnapshot:
+    """Current catalog snapshot; loaded in a few set-based queries on first use and after schema changes"""
+    snapshot = metadata_cache.get(("catalog",))
+    if snapshot is None:
+        # One thread loads, concurrent callers wait for its snapshot
+        with _catalog_lock:
+            snapshot = metadata_cache.get(("catalog",))
+            if snapshot is None:
+                with get_connection() as conn, metrics.timer("catalog_load"):
+                    snapshot = CatalogSnapshot.load(conn)
+                metadata_cache.put(("catalog",), snapshot)
+    return snapshot
+
+def get_plan_estimate(sql: str) -> PlanEstimate:
+    """Estimated plan of ``sql``, cached by query fingerprint until the schema changes"""
+    key = ("plan", query_fingerprint(sql))
+    estimate = metadata_cache.get(key)
+    if estimate is None:
+        with get_connection() as conn, metrics.timer("plan"):
+            try:
+                estimate = estimate_plan(conn, sql)
+            except Exception:
+                conn.discard = True  # the session may still be in SHOWPLAN mode
+                raise
+        metadata_cache.put(key, estimate)
+    return estimate
+
+def _try_plan_estimate(sql: str) -> Optional[PlanEstimate]:
+    """get_plan_estimate(), or None (counted as a plan error) if the plan cannot be obtained"""
+    try:
+        return get_plan_estimate(sql)
+    except QueryTimeoutError:
+        raise
+    except Exception:
+        metrics.inc("plan_errors")
+        return None
+
+def check_query_cost(sql: str, row_limit: int) -> Tuple[Optional[str], int, List[str], Optional[str]]:
+    """Admission control: compare the estimated plan of ``sql`` with COST_LIMITS
 
-def get_table_data_raw(table_name: str) -> str:
-    """Raw function for getting top 100 rows from a table"""
-    query = f"SELECT TOP 100 * FROM {table_name}"
+    Returns ``(sql to run, row limit, notes, error)``. In reject mode a query
+    over the limits gets an error carrying the plan summary, so the model can
+    rewrite it. In cap mode it is first rewritten to return at most
+    MSSQL_COST_CAP_ROWS rows (a larger TOP or FETCH of its own, including
+    the one server_limit added, is lowered to the cap), and rejected only
+    if the capped plan is still over the limits. If a plan cannot be
+    obtained (for example without SHOWPLAN permission) the query runs
+    unchecked, capped in cap mode. There is no sampled mode: TABLESAMPLE
+    picks pages of each table separately, so joins and aggregates over
+    samples give wrong answers rather than a smaller result.
+    """
+    mode = COST_LIMITS["mode"]
+    if mode not in ("reject", "cap"):
+        return sql, row_limit, [], None
+    estimate = _try_plan_estimate(sql)
+    if estimate is None:
+        return sql, row_limit, [], None
     
-    if not is_read_only_query(query):
-        return "Error: Invalid table name"
+    exceeded = estimate.exceeds(COST_LIMITS["max_cost"], COST_LIMITS["max_rows"])
+    if exceeded is None:
+        return sql, row_limit, [], None
     
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query)
-        columns = [desc[0] for desc in cursor.description]
-        rows = cursor.fetchall()
-        
-        result = [",".join(columns)]
-        result.extend([",".join(map(str, row)) for row in rows])
-        return "\n".join(result)
+    if mode == "cap":
+        cap = min(row_limit, COST_LIMITS["cap_rows"])
+        capped = apply_row_limit(sql, cap + 1, lower_existing=True)
+        capped_estimate = _try_plan_estimate(capped) if capped is not None else None
+        if capped is not None and (
+            capped_estimate is None
+            or capped_estimate.exceeds(COST_LIMITS["max_cost"], COST_LIMITS["max_rows"]) is None
+        ):
+            metrics.inc("queries_capped")
+            return capped, cap, [f"Query capped to {cap} rows: {exceeded}.\n{estimate.summary()}\nExecuted:\n{capped}"], None
+        exceeded += " (also with a row cap)" if capped is not None else ""
+    
+    metrics.inc("queries_rejected")
+    return None, row_limit, [], (
+        f"Error: Query rejected before execution: {exceeded}.\n{estimate.summary()}\n"
+        "Rewrite it to read less: add WHERE filters and join predicates, select fewer columns, or aggregate."
+    )
+
+def is_read_only_query(query: str) -> bool:
+    """Validate query is read-only (see tsql.is_read_only)"""
+    return is_read_only(query)
+
+@cached_metadata("list_tables")
+def list_tables_raw() -> str:
+    """Raw function for listing all database tables"""
+    return "\n".join(table.full_name for table in get_catalog().tables())
+
+_TEXT_LOB_TYPES = {"varchar", "nvarchar", "text", "ntext", "xml"}
+
+def quote_name(name: str) -> str:
+    """T-SQL delimited identifier"""
+    return "[" + name.replace("]", "]]") + "]"
+
+def preview_query(
+    table: TableInfo, columns: Optional[List[str]], rows: int, sample_percent: Optional[float]
+) -> Tuple[str, List[str]]:
+    """SELECT for a table preview and notes on what it leaves out
+
+    Without ``columns`` every column is selected, except that large text
+    columns are cut to PREVIEW_CONFIG["lob_chars"] characters and other
+    large objects (varbinary(max), image, CLR types) are left out. Named
+    columns are returned in full. ``sample_percent`` reads a random
+    TABLESAMPLE of the table's pages instead of its first rows. Raises
+    ValueError for unknown column names.
+    """
+    by_name = {col.name.lower(): col for col in table.columns}
+    notes = []
+    if columns:
+        unknown = [name for name in columns if name.lower() not in by_name]
+        if unknown:
+            raise ValueError(f"Unknown columns in {table.full_name}: {', '.join(unknown)}")
+        select = [quote_name(by_name[name.lower()].name) for name in dict.fromkeys(columns)]
+    else:
+        select, truncated, omitted = [], [], []
+        for col in table.columns:
+            if not col.is_lob:
+                select.append(quote_name(col.name))
+            elif col.data_type in _TEXT_LOB_TYPES:
+                select.append(
+                    f"SUBSTRING(CAST({quote_name(col.name)} AS nvarchar(max)), 1, {PREVIEW_CONFIG['lob_chars']}) "
+                    f"AS {quote_name(col.name)}"
+                )
+                truncated.append(col.name)
+            else:
+                omitted.append(f"{col.name} ({col.data_type})")
+        if truncated:
+            notes.append(f"Large text columns cut to {PREVIEW_CONFIG['lob_chars']} characters: {', '.join(truncated)}")
+        if omitted:
+            notes.append(f"Large binary columns left out: {', '.join(omitted)}")
+        if truncated or omitted:
+            notes.append("Name columns explicitly to get them in full")
+        if not select:
+            raise ValueError(f"{table.full_name} has only large object columns; name the ones to read")
+
+    query = f"SELECT TOP ({rows}) {', '.join(select)} FROM {quote_name(table.schema)}.{quote_name(table.name)}"
+    if sample_percent is not None:
+        # Pages are sampled, so shuffle the sampled rows before TOP picks from them
+        query += f" TABLESAMPLE SYSTEM ({sample_percent:g} PERCENT) ORDER BY NEWID()"
+        notes.append(f"Random sample of about {sample_percent:g}% of the table's pages")
+    return query, notes
+
+def get_table_data_raw(
+    table_name: str,
+    columns: Optional[List[str]] = None,
+    max_rows: Optional[int] = None,
+    sample_percent: Optional[float] = None,
+) -> str:
+    """Raw function for previewing a table's rows (see preview_query)"""
+    if not TABLE_NAME_RE.match(table_name):
+        return "Error: Invalid table name"
+    if isinstance(columns, str):
+        columns = [name.strip() for name in columns.split(",") if name.strip()]
+    rows = min(PREVIEW_CONFIG["rows"] if max_rows is None else max_rows, RESULT_LIMITS["max_rows"])
+    if rows < 1:
+        return "Error: max_rows must be at least 1"
+    if sample_percent is not None and not 0 < sample_percent <= 100:
+        return "Error: sample_percent must be between 0 and 100"
+
+    try:
+        tables = get_catalog().find(table_name)
+        if not tables:
+            return f"Error: Table '{table_name}' not found"
+        if len(tables) > 1:
+            return f"Error: '{table_name}' is ambiguous, qualify it with a schema: {', '.join(t.full_name for t in tables)}"
+        table = tables[0]
+        if sample_percent is not None and table.is_view:
+            return f"Error: {table.full_name} is a view; TABLESAMPLE only works on tables"
+        query, notes = preview_query(table, columns, rows, sample_percent)
+
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            with metrics.timer("execute"):
+                cursor.execute(query)
+            return stream_result(
+                cursor,
+                max_rows=rows,
+                max_bytes=RESULT_LIMITS["max_bytes"],
+                batch_size=RESULT_LIMITS["fetch_batch_size"],
+                notes=notes,
+                metrics=metrics,
+            )
+    except Exception as e:
+        return f"Error: {str(e)}"
 
 @mcp.resource("mssql://tables")
-def list_tables() -> str:
+@metrics.instrument
+async def list_tables() -> str:
     """List all database tables"""
-    return list_tables_raw()
+    return await run_db(list_tables_raw)
+
+@mcp.resource("mssql://tables/stats")
+@metrics.instrument
+async def list_table_stats() -> str:
+    """Row count and size of every table, from partition metadata"""
+    return await run_db(table_stats_raw)
+
+@mcp.resource("mssql://table/{table_name}/stats")
+@metrics.instrument
+async def get_table_stats(table_name: str) -> str:
+    """Row count and size of a table, from partition metadata"""
+    return await run_db(table_stats_raw, table_name)
 
 @mcp.resource("mssql://table/{table_name}")
-def get_table_data(table_name: str) -> str:
-    """Get top 100 rows from a table"""
-    return get_table_data_raw(table_name)
+@metrics.instrument
+async def get_table_data(table_name: str) -> str:
+    """Preview the first rows of a table (large text columns cut short, large binary columns left out)"""
+    return await run_db(get_table_data_raw, table_name)
+
+@mcp.resource("mssql://table/{table_name}/columns/{columns}")
+@metrics.instrument
+async def get_table_columns(table_name: str, columns: str) -> str:
+    """Preview the first rows of the given comma-separated columns of a table"""
+    return await run_db(get_table_data_raw, table_name, columns)
+
+TABLE_NAME_RE = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z_][a-zA-Z0-9_]*)?$')
+
+# Most tables one describe_tables / get_relationships_bulk call answers
+MAX_BULK_TABLES = 100
+
+RELATIONSHIP_COLUMNS = "CONSTRAINT_NAME,COLUMN_NAME,REFERENCED_TABLE,REFERENCED_COLUMN"
+DESCRIBE_COLUMNS = "COLUMN_NAME,DATA_TYPE,IS_NULLABLE,COLUMN_DEFAULT,MAX_LENGTH,PRECISION,SCALE"
+
+def _relationship_row(fk: ForeignKeyInfo) -> str:
+    return f"{fk.name},{fk.column},{fk.referenced_table},{fk.referenced_column}"
+
+def _describe_row(col: ColumnInfo) -> str:
+    is_nullable = "YES" if col.is_nullable else "NO"
+    max_len = col.character_maximum_length
+    max_len = str(max_len) if max_len else ""
+    precision = str(col.numeric_precision) if col.numeric_precision else ""
+    scale = str(col.numeric_scale) if col.numeric_scale else ""
+    default = csv_field(col.default) if col.default else ""
+    return f"{col.name},{col.data_type},{is_nullable},{default},{max_len},{precision},{scale}"
+
+def _find_tables(table_names: List[str]) -> Tuple[List[TableInfo], List[str]]:
+    """Catalog tables for a list of names, in request order without repeats, and the names not found"""
+    tables: Dict[int, TableInfo] = {}
+    missing = []
+    catalog = get_catalog()
+    for table_name in table_names:
+        found = catalog.find(table_name) if TABLE_NAME_RE.match(table_name) else []
+        if not found:
+            missing.append(table_name)
+        for table in found:
+            tables.setdefault(table.object_id, table)
+    return list(tables.values()), missing
+
+def _bulk_schema(table_names: List[str], header: str, rows: Callable[[TableInfo], List[str]]) -> str:
+    """One CSV for many tables: ``header`` prefixed with TABLE_NAME, rows grouped by table"""
+    if isinstance(table_names, str):
+        table_names = [table_names]
+    if not table_names:
+        return "Error: table_names is empty"
+    if len(table_names) > MAX_BULK_TABLES:
+        return f"Error: At most {MAX_BULK_TABLES} tables per call ({len(table_names)} given)"
+    try:
+        tables, missing = _find_tables(table_names)
+        if not tables:
+            return f"Error: Tables not found: {', '.join(missing)}"
+        result = ["TABLE_NAME," + header]
+        for table in tables:
+            result.extend(f"{table.full_name},{row}" for row in rows(table))
+        if missing:
+            result.append(f"{NOTE_PREFIX}Not found: {', '.join(missing)}")
+        return "\n".join(result)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+TABLE_STATS_COLUMNS = "TABLE_NAME,ROW_COUNT,RESERVED_KB,USED_KB,CREATED,LAST_SCHEMA_CHANGE"
+
+# Rows are counted in the heap or clustered index (index_id 0 or 1); pages
+# over every index. Metadata only, so it never scans the tables.
+TABLE_STATS_QUERY = """
+SELECT
+    s.name,
+    o.name,
+    SUM(CASE WHEN ps.index_id IN (0, 1) THEN ps.row_count ELSE 0 END),
+    SUM(ps.reserved_page_count),
+    SUM(ps.used_page_count),
+    o.create_date,
+    o.modify_date
+FROM sys.objects o
+INNER JOIN sys.schemas s ON s.schema_id = o.schema_id
+INNER JOIN sys.dm_db_partition_stats ps ON ps.object_id = o.object_id
+WHERE o.type = 'U'{filter}
+GROUP BY s.name, o.name, o.create_date, o.modify_date
+ORDER BY s.name, o.name
+"""
+
+@cached_metadata("table_stats", ttl=TABLE_STATS_TTL)
+def table_stats_raw(table_name: Optional[str] = None) -> str:
+    """Raw function for row counts and sizes of one table (every schema's, for a bare name) or all tables"""
+    if table_name and not TABLE_NAME_RE.match(table_name):
+        return "Error: Invalid table name format"
+
+    try:
+        query = TABLE_STATS_QUERY.format(filter="")
+        if table_name:
+            tables = [table for table in get_catalog().find(table_name) if not table.is_view]
+            if not tables:
+                return f"Error: Table '{table_name}' not found"
+            object_ids = ", ".join(str(int(table.object_id)) for table in tables)
+            query = TABLE_STATS_QUERY.format(filter=f" AND o.object_id IN ({object_ids})")
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            with metrics.timer("execute"):
+                cursor.execute(query)
+                rows = cursor.fetchall()
+        result = [TABLE_STATS_COLUMNS]
+        for schema, name, row_count, reserved, used, created, modified in rows:
+            result.append(
+                f"{schema}.{name},{row_count},{reserved * 8},{used * 8},{csv_field(created)},{csv_field(modified)}"
+            )
+        return "\n".join(result)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+INDEX_COLUMNS = "INDEX_NAME,TYPE,IS_UNIQUE,IS_PRIMARY_KEY,KEY_COLUMNS,INCLUDED_COLUMNS,FILTER,STATS_UPDATED"
+FRAGMENTATION_COLUMNS = "FRAGMENTATION_PERCENT,PAGE_COUNT"
+
+# Statistics of an index share its id (stats_id = index_id)
+INDEX_STATS_QUERY = """
+SELECT st.stats_id, STATS_DATE(st.object_id, st.stats_id)
+FROM sys.stats st
+WHERE st.object_id = {object_id}
+"""
 
+# LIMITED mode reads only the pages above the leaf level; the worst partition counts
+FRAGMENTATION_QUERY = """
+SELECT ips.index_id, MAX(ips.avg_fragmentation_in_percent), SUM(ips.page_count)
+FROM sys.dm_db_index_physical_stats(DB_ID(), {object_id}, NULL, NULL, 'LIMITED') ips
+WHERE ips.object_id = {object_id} AND ips.alloc_unit_type_desc = 'IN_ROW_DATA'
+GROUP BY ips.index_id
+"""
+
+def _index_row(index: IndexInfo, stats_date) -> str:
+    keys = [f"{column} DESC" if column in index.descending_columns else column for column in index.key_columns]
+    fields = [
+        index.name,
+        index.type_desc,
+        "YES" if index.is_unique else "NO",
+        "YES" if index.is_primary_key else "NO",
+        ", ".join(keys),
+        ", ".join(index.included_columns),
+        index.filter_definition,
+        stats_date,
+    ]
+    return ",".join(csv_field(value) if value else "" for value in fields)
+
+@cached_metadata("get_indexes", ttl=TABLE_STATS_TTL)
+def get_indexes_raw(table_name: str, include_fragmentation: bool = False) -> str:
+    """Raw function for a table's indexes, from the catalog snapshot plus statistics dates"""
+    if not TABLE_NAME_RE.match(table_name):
+        return "Error: Invalid table name format"
+
+    try:
+        tables = get_catalog().find(table_name)
+        if not tables:
+            return f"Error: Table '{table_name}' not found"
+        if len(tables) > 1:
+            return f"Error: '{table_name}' is ambiguous, qualify it with a schema: {', '.join(t.full_name for t in tables)}"
+        table = tables[0]
+        object_id = int(table.object_id)
+
+        notes = []
+        fragmentation = {}
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            with metrics.timer("execute"):
+                cursor.execute(INDEX_STATS_QUERY.format(object_id=object_id))
+                stats_dates = dict(cursor.fetchall())
+            if include_fragmentation:
+                try:
+                    with metrics.timer("execute"):
+                        cursor.execute(FRAGMENTATION_QUERY.format(object_id=object_id))
+                        fragmentation = {row[0]: row[1:] for row in cursor.fetchall()}
+                except QueryTimeoutError:
+                    raise
+                except Exception as e:
+                    # Needs VIEW DATABASE STATE; the index list is still useful without it
+                    notes.append(f"Fragmentation unavailable: {e}")
+
+        header = INDEX_COLUMNS + ("," + FRAGMENTATION_COLUMNS if include_fragmentation else "")
+        result = [header]
+        for index in table.indexes:
+            row = _index_row(index, stats_dates.get(index.index_id))
+            if include_fragmentation:
+                percent, pages = fragmentation.get(index.index_id, (None, None))
+                row += f",{'' if percent is None else round(percent, 2)},{'' if pages is None else pages}"
+            result.append(row)
+        if not table.is_view and not table.indexes:
+            notes.append("No indexes: every query scans the whole table")
+        elif not table.is_view and not any(index.type_desc.startswith("CLUSTERED") for index in table.indexes):
+            notes.append("Heap: no clustered index")
+        result.extend(NOTE_PREFIX + note for note in notes)
+        return "\n".join(result)
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+@cached_metadata("get_relationships")
 def get_relationships_raw(table_name: str) -> str:
     """Raw function for getting table relationships (foreign keys)"""
     # Validate table name format (schema.table or just table)
-    if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z_][a-zA-Z0-9_]*)?$', table_name):
+    if not TABLE_NAME_RE.match(table_name):
         return "Error: Invalid table name format"
     
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Split table name if it contains schema
-            if '.' in table_name:
-                schema, table = table_name.split('.', 1)
-                where_clause = "AND fk.TABLE_SCHEMA = ? AND fk.TABLE_NAME = ?"
-                params = (schema, table)
-            else:
-                where_clause = "AND fk.TABLE_NAME = ?"
-                params = (table_name,)
-            
-            # Check if table exists first
-            table_check_query = """
-            SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES 
-            WHERE 1=1 """ + where_clause.replace("fk.", "") + """
-            """
-            cursor.execute(table_check_query, params)
-            if cursor.fetchone()[0] == 0:
-                return f"Error: Table '{table_name}' not found"
-            
-            # Get foreign key relationships
-            query = """
-            SELECT 
-                fk.CONSTRAINT_NAME,
-                fk.COLUMN_NAME,
-                pk.TABLE_SCHEMA + '.' + pk.TABLE_NAME as REFERENCED_TABLE,
-                pk.COLUMN_NAME as REFERENCED_COLUMN
-            FROM INFORMATION_SCHEMA.REFERENTIAL_CONSTRAINTS rc
-            INNER JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE fk
-                ON rc.CONSTRAINT_NAME = fk.CONSTRAINT_NAME
-            INNER JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE pk
-                ON rc.UNIQUE_CONSTRAINT_NAME = pk.CONSTRAINT_NAME
-            WHERE 1=1 """ + where_clause + """
-            ORDER BY fk.CONSTRAINT_NAME, fk.ORDINAL_POSITION
-            """
-            
-            cursor.execute(query, params)
-            relationships = cursor.fetchall()
-            
-            # Format results
-            result = ["CONSTRAINT_NAME,COLUMN_NAME,REFERENCED_TABLE,REFERENCED_COLUMN"]
-            for rel in relationships:
-                constraint_name, column_name, referenced_table, referenced_column = rel
-                result.append(f"{constraint_name},{column_name},{referenced_table},{referenced_column}")
-            
-            return "\n".join(result)
+        tables = get_catalog().find(table_name)
+        if not tables:
+            return f"Error: Table '{table_name}' not found"
+        
+        # Format results
+        result = [RELATIONSHIP_COLUMNS]
+        for table in tables:
+            result.extend(_relationship_row(fk) for fk in table.foreign_keys)
+        
+        return "\n".join(result)
             
     except Exception as e:
         return f"Error: {str(e)}"
 
+@cached_metadata("get_relationships_bulk")
+def get_relationships_bulk_raw(table_names: List[str]) -> str:
+    """Raw function for the foreign keys of several tables, grouped by table"""
+    return _bulk_schema(
+        table_names, RELATIONSHIP_COLUMNS, lambda table: [_relationship_row(fk) for fk in table.foreign_keys]
+    )
+
+@cached_metadata("describe_table")
 def describe_table_raw(table_name: str) -> str:
     """Raw function for describing table structure"""
     # Validate table name format (schema.table or just table)
-    if not re.match(r'^[a-zA-Z_][a-zA-Z0-9_]*(\.[a-zA-Z_][a-zA-Z0-9_]*)?$', table_name):
+    if not TABLE_NAME_RE.match(table_name):
         return "Error: Invalid table name format"
     
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Split table name if it contains schema
-            if '.' in table_name:
-                schema, table = table_name.split('.', 1)
-                where_clause = "AND TABLE_SCHEMA = ? AND TABLE_NAME = ?"
-                params = (schema, table)
-            else:
-                where_clause = "AND TABLE_NAME = ?"
-                params = (table_name,)
-            
-            # Get column information
-            query = """
-            SELECT 
-                COLUMN_NAME,
-                DATA_TYPE,
-                IS_NULLABLE,
-                COLUMN_DEFAULT,
-                CHARACTER_MAXIMUM_LENGTH,
-                NUMERIC_PRECISION,
-                NUMERIC_SCALE,
-                ORDINAL_POSITION
-            FROM INFORMATION_SCHEMA.COLUMNS 
-            WHERE 1=1 """ + where_clause + """
-            ORDER BY ORDINAL_POSITION
-            """
-            
-            cursor.execute(query, params)
-            columns = cursor.fetchall()
-            
-            if not columns:
-                return f"Error: Table '{table_name}' not found"
-            
-            # Format results
-            result = ["COLUMN_NAME,DATA_TYPE,IS_NULLABLE,COLUMN_DEFAULT,MAX_LENGTH,PRECISION,SCALE"]
-            for col in columns:
-                col_name, data_type, is_nullable, default, max_len, precision, scale, _ = col
-                max_len = str(max_len) if max_len else ""
-                precision = str(precision) if precision else ""
-                scale = str(scale) if scale else ""
-                default = str(default) if default else ""
-                
-                result.append(f"{col_name},{data_type},{is_nullable},{default},{max_len},{precision},{scale}")
-            
-            return "\n".join(result)
+        tables = get_catalog().find(table_name)
+        columns = [col for table in tables for col in table.columns]
+        
+        if not columns:
+            return f"Error: Table '{table_name}' not found"
+        
+        # Format results
+        result = [DESCRIBE_COLUMNS]
+        result.extend(_describe_row(col) for col in columns)
+        
+        return "\n".join(result)
             
     except Exception as e:
         return f"Error: {str(e)}"
 
-def execute_sql_raw(query: str) -> str:
-    """Raw function for executing SQL queries"""
+@cached_metadata("describe_tables")
+def describe_tables_raw(table_names: List[str]) -> str:
+    """Raw function for describing several tables, grouped by table"""
+    return _bulk_schema(table_names, DESCRIBE_COLUMNS, lambda table: [_describe_row(col) for col in table.columns])
+
+def execute_sql_raw(
+    query: str,
+    max_rows: Optional[int] = None,
+    page_size: Optional[int] = None,
+    continuation_token: Optional[str] = None,
+    use_cache: bool = True,
+    output_format: str = "csv",
+    server_limit: Optional[bool] = None,
+) -> str:
+    """Raw function for executing SQL queries
+
+    Rows are streamed in batches; output stops at max_rows (capped by
+    MSSQL_MAX_ROWS) or MSSQL_MAX_RESULT_BYTES, whichever comes first.
+    With page_size the statement stays open and the result ends with a
+    continuation token; passing that token back returns the next page
+    without re-running the query. Unpaged results are served from the
+    result cache unless use_cache is False. output_format is one of
+    csv, json or typed (see serialization.py). With server_limit (default
+    MSSQL_SERVER_ROW_LIMIT) a SELECT without its own row limit is rewritten
+    to TOP / OFFSET-FETCH and the executed SQL is echoed in the result.
+    With MSSQL_COST_CHECK set, queries whose estimated plan is too expensive
+    are rejected or capped before they run (see check_query_cost).
+    """
+    return _execute_sql(
+        query, max_rows, page_size, continuation_token, use_cache, output_format, server_limit,
+    )[0]
+
+def _execute_sql(
+    query: str,
+    max_rows: Optional[int] = None,
+    page_size: Optional[int] = None,
+    continuation_token: Optional[str] = None,
+    use_cache: bool = True,
+    output_format: str = "csv",
+    server_limit: Optional[bool] = None,
+) -> Tuple[str, str]:
+    """execute_sql_raw(), also returning the format the result is written in
+
+    A continuation page is written in the format its query was opened with,
+    whatever ``output_format`` says.
+    """
+    if continuation_token:
+        return _read_page(continuation_token)
+    
+    output_format = (output_format or "csv").lower()
+    if output_format not in FORMATS:
+        return f"Error: Unknown output format '{output_format}'; use one of: {', '.join(FORMATS)}", output_format
+    
     if not is_read_only_query(query):
-        return "Error: Only SELECT queries are allowed"
+        return "Error: Only SELECT queries are allowed", output_format
+    
+    row_limit = RESULT_LIMITS["max_rows"]
+    if max_rows is not None and max_rows > 0:
+        row_limit = min(max_rows, row_limit)
+    
+    if page_size is not None and page_size > 0:
+        executed, row_limit, notes, error = check_query_cost(query, row_limit)
+        if error:
+            return error, output_format
+        return _open_paged_query(executed, min(page_size, row_limit), output_format, notes)
+    
+    notes, meta = [], {}
+    executed = query
+    if RESULT_LIMITS["server_limit"] if server_limit is None else server_limit:
+        # One row past the limit lets the stream still report truncation
+        rewritten = apply_row_limit(query, row_limit + 1)
+        if rewritten is not None:
+            executed = rewritten
+            notes.append(f"Row limit applied on the server. Executed:\n{rewritten}")
+            meta["executed_query"] = rewritten
+    
+    cache_key = (query_fingerprint(query), row_limit, output_format, executed != query)
+    if use_cache and result_cache.enabled:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached, output_format
+    
+    checked, row_limit, cost_notes, error = check_query_cost(executed, row_limit)
+    if error:
+        return error, output_format
+    if checked != executed:
+        executed = checked
+        notes.extend(cost_notes)
+        meta["executed_query"] = checked
     
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(query)
+            with metrics.timer("execute"):
+                cursor.execute(executed)
             
-            columns = [desc[0] for desc in cursor.description]
-            rows = cursor.fetchall()
+            if cursor.description is None:
+                return "Error: Query did not return a result set", output_format
             
-            result = [",".join(columns)]
-            result.extend([",".join(map(str, row)) for row in rows])
-            return "\n".join(result)
+            result = stream_result(
+                cursor,
+                max_rows=row_limit,
+                max_bytes=RESULT_LIMITS["max_bytes"],
+                batch_size=RESULT_LIMITS["fetch_batch_size"],
+                fmt=output_format,
+                notes=notes,
+                meta=meta,
+                metrics=metrics,
+            )
     except Exception as e:
-        return f"Error: {str(e)}"
+        return f"Error: {str(e)}", output_format
+    
+    # A bypassing call still refreshes the cache for later callers
+    if result_cache.enabled:
+        result_cache.put(cache_key, result)
+    return result, output_format
+
+def _open_paged_query(query: str, page_size: int, output_format: str = "csv", notes: Optional[List[str]] = None) -> Tuple[str, str]:
+    """Execute a query on a connection that stays checked out, then read its first page"""
+    entry = OpenCursor(page_size)
+    try:
+        # Claim a cursor slot before running anything, so a full registry costs nothing
+        token = cursor_registry.register(entry)
+    except CursorLimitError as e:
+        return f"Error: {str(e)}", output_format
+    
+    try:
+        entry.conn = get_connection()
+        cursor = entry.conn.cursor()
+        with metrics.timer("execute"):
+            cursor.execute(query)
+        if cursor.description is None:
+            cursor_registry.close(token)
+            return "Error: Query did not return a result set", output_format
+        entry.stream = ResultStream(cursor, RESULT_LIMITS["fetch_batch_size"], output_format)
+    except Exception as e:
+        cursor_registry.close(token)
+        return f"Error: {str(e)}", output_format
+    
+    return _read_page(token, entry, notes)
+
+def _read_page(token: str, entry: Optional[OpenCursor] = None, notes: Optional[List[str]] = None) -> Tuple[str, str]:
+    """Read the next page of a paged result and close it once exhausted
+
+    ``entry`` is passed when the caller already holds the cursor (first
+    page), along with any ``notes`` for that page. Returns the page and
+    the format the cursor writes in.
+    """
+    if entry is None:
+        entry = cursor_registry.checkout(token)
+        if entry is None:
+            return "Error: Unknown or expired continuation_token; run the query again", "csv"
+        call = current_call()
+        if call is not None:
+            call.track(entry.conn)
+    
+    stream = entry.stream
+    try:
+        rows, pieces, _ = stream.read(
+            max_rows=entry.page_size,
+            max_bytes=RESULT_LIMITS["max_bytes"],
+            used_bytes=len(stream.writer.header().encode("utf-8")),
+            min_rows=1,
+        )
+        entry.pages_read += 1
+        entry.rows_read += len(rows)
+        notes, meta = list(notes or []), {}
+        
+        if stream.has_more():
+            cursor_registry.checkin(token)
+            notes.append(
+                f"More rows available (page {entry.pages_read}, {entry.rows_read} rows so far). "
+                f"continuation_token: {token}"
+            )
+            meta["continuation_token"] = token
+        else:
+            cursor_registry.close(token)
+        result = stream.render(rows, pieces, notes, meta)
+        metrics.record_read(*stream.take_timings(), len(rows))
+        return result, stream.writer.name
+    except Exception as e:
+        cursor_registry.close(token)
+        return f"Error: {str(e)}", stream.writer.name
 
 @mcp.tool()
-def get_relationships(table_name: str) -> str:
+@metrics.instrument
+async def get_relationships(table_name: str) -> str:
     """Get foreign key relationships for a table"""
-    return get_relationships_raw(table_name)
+    return await run_db(get_relationships_raw, table_name)
 
 @mcp.tool()
-def describe_table(table_name: str) -> str:
+@metrics.instrument
+async def describe_table(table_name: str) -> str:
     """Describe table structure (columns, data types, constraints)"""
-    return describe_table_raw(table_name)
+    return await run_db(describe_table_raw, table_name)
+
+@mcp.tool()
+@metrics.instrument
+async def preview_table(
+    table_name: str,
+    columns: Optional[List[str]] = None,
+    max_rows: int = 100,
+    sample_percent: Optional[float] = None,
+) -> str:
+    """Preview rows of a table as CSV without writing SQL
+
+    By default all columns are returned, with large text columns (nvarchar(max),
+    xml, ...) cut to a few hundred characters and large binary columns left
+    out; pass columns to choose columns and get them in full. The first rows
+    are returned unless sample_percent is given, which reads a random sample
+    of about that percentage of the table's pages (TABLESAMPLE), a cheap way
+    to see representative rows of a huge table. Small tables may return no
+    rows for a small percentage.
+    """
+    return await run_db(get_table_data_raw, table_name, columns, max_rows, sample_percent)
+
+@mcp.tool()
+@metrics.instrument
+async def table_stats(table_name: Optional[str] = None) -> str:
+    """Row count and size of a table, or of every table when table_name is omitted
+
+    Read from partition metadata, so it is instant even on huge tables: use
+    this instead of SELECT COUNT(*) to find out how big a table is. Returns
+    CSV with ROW_COUNT, RESERVED_KB and USED_KB (data plus indexes), CREATED
+    and LAST_SCHEMA_CHANGE (the last ALTER, not the last data change). Row
+    counts may lag uncommitted transactions and are cached for about a minute.
+    """
+    return await run_db(table_stats_raw, table_name)
+
+@mcp.tool()
+@metrics.instrument
+async def get_indexes(table_name: str, include_fragmentation: bool = False) -> str:
+    """List a table's indexes to write queries that can seek on them
+
+    Returns CSV with each index's type, uniqueness, key columns (in order,
+    DESC marked), included columns, filter and when its statistics were last
+    updated. A WHERE or JOIN on the leading key column(s), without wrapping
+    them in functions, lets SQL Server seek instead of scanning. Set
+    include_fragmentation=true to add fragmentation and page counts; that
+    reads the index pages and is slow on large tables.
+    """
+    return await run_db(get_indexes_raw, table_name, include_fragmentation)
 
 @mcp.tool()
-def execute_sql(query: str) -> str:
-    """Execute a READ-ONLY SQL query (SELECT only)"""
-    return execute_sql_raw(query)
+@metrics.instrument
+async def get_relationships_bulk(table_names: List[str]) -> str:
+    """Get foreign key relationships for several tables in one call
+
+    Returns one CSV with a leading TABLE_NAME column, rows grouped by table.
+    Prefer this over repeated get_relationships calls when exploring how
+    tables connect.
+    """
+    return await run_db(get_relationships_bulk_raw, table_names)
+
+@mcp.tool()
+@metrics.instrument
+async def describe_tables(table_names: List[str]) -> str:
+    """Describe several tables (columns, data types, constraints) in one call
+
+    Returns one CSV with a leading TABLE_NAME column, rows grouped by table;
+    names that match no table are listed in a trailing '-- Not found' note.
+    Prefer this over repeated describe_table calls before writing a join.
+    """
+    return await run_db(describe_tables_raw, table_names)
+
+@mcp.tool()
+@metrics.instrument
+async def execute_sql(
+    query: str = "",
+    max_rows: Optional[int] = None,
+    page_size: Optional[int] = None,
+    continuation_token: Optional[str] = None,
+    use_cache: bool = True,
+    output_format: str = "csv",
+    server_limit: Optional[bool] = None,
+    timeout_seconds: Optional[float] = None,
+) -> str:
+    """Execute a READ-ONLY SQL query (SELECT only)
+
+    Returns CSV by default; output_format="json" gives compact JSON rows and
+    "typed" gives column-oriented JSON with exact decimals, ISO dates and
+    base64 binary. Large results are cut off at max_rows (or the server limit)
+    and end with a '-- Output truncated' note. To page through a large result,
+    pass page_size; if more rows remain the result ends with a
+    continuation_token, which you pass back (query not needed) for the next page.
+    Recent identical queries are answered from a short-lived cache; set
+    use_cache=false when you need fresh data. server_limit=true adds TOP /
+    OFFSET-FETCH to a SELECT without a row limit so the database stops after
+    max_rows; the rewritten SQL is shown in the result. Queries are cancelled
+    after timeout_seconds (default: the server's MSSQL_QUERY_TIMEOUT). JSON
+    results include a "timing" object (seconds waited for a database worker
+    and spent running); CSV results end with a '-- Queue wait' note when the
+    query had to wait.
+    """
+    timing = RunTiming()
+    outcome = await run_db(
+        _execute_sql, query, max_rows, page_size, continuation_token, use_cache, output_format, server_limit,
+        timeout=timeout_seconds, timing=timing,
+    )
+    if isinstance(outcome, str):
+        return outcome  # run_db's error for a busy executor or a timeout
+    result, result_format = outcome
+    return with_timing(result, result_format, timing)
+
+# Looked up at collection time, so a replaced pool or cache is picked up
+metrics.register("pool", lambda: connection_pool.stats())
+metrics.register("executor", lambda: db_executor.stats())
+metrics.register("cursors", lambda: cursor_registry.stats())
+metrics.register("metadata_cache", lambda: metadata_cache.stats())
+metrics.register("result_cache", lambda: result_cache.stats())
+
+@mcp.resource("mssql://metrics")
+@metrics.instrument
+async def get_metrics() -> str:
+    """Server metrics as JSON: per-tool latency (p50/p95/p99), time per phase
+    (acquire, execute, fetch, serialize), rows, bytes, errors, cache hit rates
+    and pool state"""
+    return json.dumps(metrics.snapshot(), indent=2, default=str)
+
+@mcp.resource("mssql://metrics/prometheus")
+@metrics.instrument
+async def get_metrics_prometheus() -> str:
+    """Server metrics in the Prometheus text exposition format"""
+    return metrics.prometheus()
+
+if PROMETHEUS_ENDPOINT:
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def prometheus_metrics(request):
+        """Prometheus scrape endpoint, served when the server runs over HTTP"""
+        from starlette.responses import PlainTextResponse
+        return PlainTextResponse(metrics.prometheus(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
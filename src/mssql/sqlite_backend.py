@@ -0,0 +1,1124 @@
+#!/usr/bin/env python3
+"""
+SQLite stand-in for SQL Server
+
+Builds a small AdventureWorksLT-shaped database (SalesLT and dbo schemas)
+in SQLite files, one file per schema attached under the schema's name so
+``SalesLT.Customer`` resolves as it does on SQL Server. A ``sys`` database
+emulates the catalog views the server reads (sys.objects, sys.columns,
+sys.indexes, sys.foreign_keys, sys.stats ..., and sys.dm_db_partition_stats
+and sys.dm_db_index_physical_stats with page counts estimated from column
+widths) and ``INFORMATION_SCHEMA`` holds the
+usual TABLES / COLUMNS / constraint views as tables.
+
+Queries are translated from T-SQL on the way in: ``TOP`` and
+``OFFSET ... FETCH`` become ``LIMIT``/``OFFSET``, ``[identifiers]`` become
+``"identifiers"``, ``N'...'`` loses its prefix, ``(max)`` type lengths
+are dropped and a few functions are renamed. ``TABLESAMPLE`` clauses are
+dropped too, so a sampled scan reads every row. Dynamic management
+functions such as ``sys.dm_db_index_physical_stats(...)`` lose their
+arguments and read an emulation table, so callers must also filter in
+WHERE; ``STATS_DATE()`` returns the fixture's creation date. Anything else
+has to be SQL both dialects accept.
+
+Knobs for benchmarking:
+
+- ``latency``: seconds slept per round trip (execute and each fetch)
+- ``row_scale``: multiplies the row counts of the customer, address and
+  sales tables
+- ``extra_tables``: adds that many empty ``dbo.SyntheticNNNNN`` tables,
+  each with a foreign key to the previous one, to model large catalogs
+"""
+import datetime
+import functools
+import math
+import os
+import random
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.mssql.backend import Backend
+from src.mssql.catalog import ColumnInfo
+from src.mssql.plans import SHOWPLAN_NS
+from src.mssql.tsql import IDENTIFIER, NUMBER, PUNCT, SEMICOLON, STRING, WORD, scan
+
+SCHEMAS = {"dbo": 1, "INFORMATION_SCHEMA": 3, "sys": 4, "SalesLT": 5}
+DATA_SCHEMAS = ("SalesLT", "dbo")
+
+# SQL Server type -> (system_type_id, max_length, precision, scale, SQLite column type)
+_TYPES = {
+    "bit": (104, 1, 1, 0, "INTEGER"),
+    "tinyint": (48, 1, 3, 0, "INTEGER"),
+    "smallint": (52, 2, 5, 0, "INTEGER"),
+    "int": (56, 4, 10, 0, "INTEGER"),
+    "money": (60, 8, 19, 4, "REAL"),
+    "decimal": (106, 9, 18, 0, "REAL"),
+    "datetime": (61, 8, 23, 3, "TEXT"),
+    "uniqueidentifier": (36, 16, 0, 0, "TEXT"),
+    "nvarchar": (231, 0, 0, 0, "TEXT"),
+    "varchar": (167, 0, 0, 0, "TEXT"),
+    "varbinary": (165, 0, 0, 0, "BLOB"),
+    "xml": (241, -1, 0, 0, "TEXT"),
+}
+
+# "Name: type[(args)] [null] [default <definition>]"
+_COLUMN_RE = re.compile(r"^(?P<name>[^:]+): (?P<type>\w+)(?:\((?P<args>[^)]*)\))?(?P<null> null)?(?: default (?P<default>.+))?$")
+
+TABLES = [
+    ("dbo", "BuildVersion", ["SystemInformationID"], [
+        "SystemInformationID: tinyint",
+        "Database Version: nvarchar(25)",
+        "VersionDate: datetime",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+    ("dbo", "ErrorLog", ["ErrorLogID"], [
+        "ErrorLogID: int",
+        "ErrorTime: datetime default (getdate())",
+        "UserName: nvarchar(128)",
+        "ErrorNumber: int",
+        "ErrorSeverity: int null",
+        "ErrorMessage: nvarchar(4000)",
+    ]),
+    ("SalesLT", "ProductCategory", ["ProductCategoryID"], [
+        "ProductCategoryID: int",
+        "ParentProductCategoryID: int null",
+        "Name: nvarchar(50)",
+        "rowguid: uniqueidentifier default (newid())",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+    ("SalesLT", "ProductModel", ["ProductModelID"], [
+        "ProductModelID: int",
+        "Name: nvarchar(50)",
+        "CatalogDescription: xml null",
+        "rowguid: uniqueidentifier default (newid())",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+    ("SalesLT", "Product", ["ProductID"], [
+        "ProductID: int",
+        "Name: nvarchar(50)",
+        "ProductNumber: nvarchar(25)",
+        "Color: nvarchar(15) null",
+        "StandardCost: money",
+        "ListPrice: money",
+        "Size: nvarchar(5) null",
+        "Weight: decimal(8,2) null",
+        "ProductCategoryID: int null",
+        "ProductModelID: int null",
+        "SellStartDate: datetime",
+        "SellEndDate: datetime null",
+        "DiscontinuedDate: datetime null",
+        "ThumbNailPhoto: varbinary(max) null",
+        "ThumbnailPhotoFileName: nvarchar(50) null",
+        "rowguid: uniqueidentifier default (newid())",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+    ("SalesLT", "Customer", ["CustomerID"], [
+        "CustomerID: int",
+        "NameStyle: bit default ((0))",
+        "Title: nvarchar(8) null",
+        "FirstName: nvarchar(50)",
+        "MiddleName: nvarchar(50) null",
+        "LastName: nvarchar(50)",
+        "Suffix: nvarchar(10) null",
+        "CompanyName: nvarchar(128) null",
+        "SalesPerson: nvarchar(256) null",
+        "EmailAddress: nvarchar(50) null",
+        "Phone: nvarchar(25) null",
+        "PasswordHash: varchar(128)",
+        "PasswordSalt: varchar(10)",
+        "rowguid: uniqueidentifier default (newid())",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+    ("SalesLT", "Address", ["AddressID"], [
+        "AddressID: int",
+        "AddressLine1: nvarchar(60)",
+        "AddressLine2: nvarchar(60) null",
+        "City: nvarchar(30)",
+        "StateProvince: nvarchar(50)",
+        "CountryRegion: nvarchar(50)",
+        "PostalCode: nvarchar(15)",
+        "rowguid: uniqueidentifier default (newid())",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+    ("SalesLT", "CustomerAddress", ["CustomerID", "AddressID"], [
+        "CustomerID: int",
+        "AddressID: int",
+        "AddressType: nvarchar(50)",
+        "rowguid: uniqueidentifier default (newid())",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+    ("SalesLT", "SalesOrderHeader", ["SalesOrderID"], [
+        "SalesOrderID: int",
+        "RevisionNumber: tinyint default ((2))",
+        "OrderDate: datetime default (getdate())",
+        "DueDate: datetime",
+        "ShipDate: datetime null",
+        "Status: tinyint default ((1))",
+        "OnlineOrderFlag: bit default ((1))",
+        "SalesOrderNumber: nvarchar(25)",
+        "PurchaseOrderNumber: nvarchar(25) null",
+        "AccountNumber: nvarchar(15) null",
+        "CustomerID: int",
+        "ShipToAddressID: int null",
+        "BillToAddressID: int null",
+        "ShipMethod: nvarchar(50)",
+        "SubTotal: money default ((0.00))",
+        "TaxAmt: money default ((0.00))",
+        "Freight: money default ((0.00))",
+        "TotalDue: money",
+        "Comment: nvarchar(max) null",
+        "rowguid: uniqueidentifier default (newid())",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+    ("SalesLT", "SalesOrderDetail", ["SalesOrderID", "SalesOrderDetailID"], [
+        "SalesOrderID: int",
+        "SalesOrderDetailID: int",
+        "OrderQty: smallint",
+        "ProductID: int",
+        "UnitPrice: money",
+        "UnitPriceDiscount: money default ((0.0))",
+        "LineTotal: decimal(38,6)",
+        "rowguid: uniqueidentifier default (newid())",
+        "ModifiedDate: datetime default (getdate())",
+    ]),
+]
+
+# (name, table, columns, referenced table, referenced columns)
+FOREIGN_KEYS = [
+    ("FK_ProductCategory_ProductCategory_ParentProductCategoryID_ProductCategoryID",
+     "SalesLT.ProductCategory", ["ParentProductCategoryID"], "SalesLT.ProductCategory", ["ProductCategoryID"]),
+    ("FK_Product_ProductCategory_ProductCategoryID",
+     "SalesLT.Product", ["ProductCategoryID"], "SalesLT.ProductCategory", ["ProductCategoryID"]),
+    ("FK_Product_ProductModel_ProductModelID",
+     "SalesLT.Product", ["ProductModelID"], "SalesLT.ProductModel", ["ProductModelID"]),
+    ("FK_CustomerAddress_Customer_CustomerID",
+     "SalesLT.CustomerAddress", ["CustomerID"], "SalesLT.Customer", ["CustomerID"]),
+    ("FK_CustomerAddress_Address_AddressID",
+     "SalesLT.CustomerAddress", ["AddressID"], "SalesLT.Address", ["AddressID"]),
+    ("FK_SalesOrderHeader_Customer_CustomerID",
+     "SalesLT.SalesOrderHeader", ["CustomerID"], "SalesLT.Customer", ["CustomerID"]),
+    ("FK_SalesOrderHeader_Address_ShipTo_AddressID",
+     "SalesLT.SalesOrderHeader", ["ShipToAddressID"], "SalesLT.Address", ["AddressID"]),
+    ("FK_SalesOrderHeader_Address_BillTo_AddressID",
+     "SalesLT.SalesOrderHeader", ["BillToAddressID"], "SalesLT.Address", ["AddressID"]),
+    ("FK_SalesOrderDetail_SalesOrderHeader_SalesOrderID",
+     "SalesLT.SalesOrderDetail", ["SalesOrderID"], "SalesLT.SalesOrderHeader", ["SalesOrderID"]),
+    ("FK_SalesOrderDetail_Product_ProductID",
+     "SalesLT.SalesOrderDetail", ["ProductID"], "SalesLT.Product", ["ProductID"]),
+]
+
+# (name, table, key columns, unique); primary keys are added from TABLES
+INDEXES = [
+    ("AK_Product_Name", "SalesLT.Product", ["Name"], True),
+    ("AK_Product_ProductNumber", "SalesLT.Product", ["ProductNumber"], True),
+    ("IX_Customer_EmailAddress", "SalesLT.Customer", ["EmailAddress"], False),
+    ("IX_Address_StateProvince", "SalesLT.Address", ["StateProvince"], False),
+    ("IX_SalesOrderHeader_CustomerID", "SalesLT.SalesOrderHeader", ["CustomerID"], False),
+    ("IX_SalesOrderDetail_ProductID", "SalesLT.SalesOrderDetail", ["ProductID"], False),
+]
+
+# (schema, name, column specs, SQLite definition; may only use tables of its own schema)
+VIEWS = [
+    ("SalesLT", "vGetAllCategories", [
+        "ParentProductCategoryName: nvarchar(50)",
+        "ProductCategoryName: nvarchar(50) null",
+        "ProductCategoryID: int null",
+    ], """
+        SELECT parent.Name, child.Name, child.ProductCategoryID
+        FROM ProductCategory parent
+        LEFT JOIN ProductCategory child ON child.ParentProductCategoryID = parent.ProductCategoryID
+        WHERE parent.ParentProductCategoryID IS NULL
+    """),
+]
+
+CATALOG_DDL = [
+    "CREATE TABLE schemas (schema_id INTEGER, name TEXT, principal_id INTEGER)",
+    "CREATE TABLE objects (object_id INTEGER, name TEXT, schema_id INTEGER, parent_object_id INTEGER, type TEXT,"
+    " type_desc TEXT, create_date TEXT, modify_date TEXT, is_ms_shipped INTEGER)",
+    "CREATE TABLE types (name TEXT, system_type_id INTEGER, user_type_id INTEGER, schema_id INTEGER,"
+    " max_length INTEGER, precision INTEGER, scale INTEGER, is_user_defined INTEGER)",
+    "CREATE TABLE columns (object_id INTEGER, name TEXT, column_id INTEGER, system_type_id INTEGER,"
+    " user_type_id INTEGER, max_length INTEGER, precision INTEGER, scale INTEGER, is_nullable INTEGER,"
+    " is_identity INTEGER, default_object_id INTEGER)",
+    "CREATE TABLE default_constraints (object_id INTEGER, name TEXT, parent_object_id INTEGER,"
+    " parent_column_id INTEGER, definition TEXT)",
+    "CREATE TABLE indexes (object_id INTEGER, name TEXT, index_id INTEGER, type INTEGER, type_desc TEXT,"
+    " is_unique INTEGER, is_primary_key INTEGER, is_unique_constraint INTEGER, has_filter INTEGER, filter_definition TEXT)",
+    "CREATE TABLE index_columns (object_id INTEGER, index_id INTEGER, index_column_id INTEGER, column_id INTEGER,"
+    " key_ordinal INTEGER, is_descending_key INTEGER, is_included_column INTEGER)",
+    "CREATE TABLE foreign_keys (object_id INTEGER, name TEXT, parent_object_id INTEGER, referenced_object_id INTEGER)",
+    "CREATE TABLE foreign_key_columns (constraint_object_id INTEGER, constraint_column_id INTEGER,"
+    " parent_object_id INTEGER, parent_column_id INTEGER, referenced_object_id INTEGER, referenced_column_id INTEGER)",
+    "CREATE TABLE stats (object_id INTEGER, name TEXT, stats_id INTEGER, auto_created INTEGER,"
+    " user_created INTEGER, no_recompute INTEGER, has_filter INTEGER, filter_definition TEXT)",
+    "CREATE TABLE dm_db_index_physical_stats (database_id INTEGER, object_id INTEGER, index_id INTEGER,"
+    " partition_number INTEGER, index_type_desc TEXT, alloc_unit_type_desc TEXT, index_depth INTEGER,"
+    " index_level INTEGER, avg_fragmentation_in_percent REAL, fragment_count INTEGER,"
+    " avg_fragment_size_in_pages REAL, page_count INTEGER)",
+    "CREATE TABLE dm_db_partition_stats (partition_id INTEGER, object_id INTEGER, index_id INTEGER,"
+    " partition_number INTEGER, in_row_data_page_count INTEGER, used_page_count INTEGER,"
+    " reserved_page_count INTEGER, row_count INTEGER)",
+]
+
+INFORMATION_SCHEMA_DDL = [
+    "CREATE TABLE TABLES (TABLE_CATALOG TEXT, TABLE_SCHEMA TEXT, TABLE_NAME TEXT, TABLE_TYPE TEXT)",
+    "CREATE TABLE COLUMNS (TABLE_CATALOG TEXT, TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT,"
+    " ORDINAL_POSITION INTEGER, COLUMN_DEFAULT TEXT, IS_NULLABLE TEXT, DATA_TYPE TEXT,"
+    " CHARACTER_MAXIMUM_LENGTH INTEGER, NUMERIC_PRECISION INTEGER, NUMERIC_SCALE INTEGER)",
+    "CREATE TABLE TABLE_CONSTRAINTS (CONSTRAINT_CATALOG TEXT, CONSTRAINT_SCHEMA TEXT, CONSTRAINT_NAME TEXT,"
+    " TABLE_CATALOG TEXT, TABLE_SCHEMA TEXT, TABLE_NAME TEXT, CONSTRAINT_TYPE TEXT)",
+    "CREATE TABLE KEY_COLUMN_USAGE (CONSTRAINT_CATALOG TEXT, CONSTRAINT_SCHEMA TEXT, CONSTRAINT_NAME TEXT,"
+    " TABLE_CATALOG TEXT, TABLE_SCHEMA TEXT, TABLE_NAME TEXT, COLUMN_NAME TEXT, ORDINAL_POSITION INTEGER)",
+    "CREATE TABLE REFERENTIAL_CONSTRAINTS (CONSTRAINT_CATALOG TEXT, CONSTRAINT_SCHEMA TEXT, CONSTRAINT_NAME TEXT,"
+    " UNIQUE_CONSTRAINT_CATALOG TEXT, UNIQUE_CONSTRAINT_SCHEMA TEXT, UNIQUE_CONSTRAINT_NAME TEXT)",
+]
+
+DATABASE_NAME = "AdventureWorksLT"
+_CREATED = "2008-06-01 00:00:00.000"
+
+
+def _parse_column(spec: str) -> Dict[str, Any]:
+    m = _COLUMN_RE.match(spec)
+    if m is None:
+        raise ValueError(f"Bad column spec: {spec}")
+    type_name = m.group("type")
+    system_type_id, max_length, precision, scale, sqlite_type = _TYPES[type_name]
+    args = m.group("args")
+    if args and type_name in ("nvarchar", "varchar", "varbinary"):
+        length = -1 if args == "max" else int(args)
+        max_length = length * 2 if type_name == "nvarchar" and length > 0 else length
+    elif args and type_name == "decimal":
+        precision, scale = (int(part) for part in args.split(","))
+        max_length = 5 if precision <= 9 else 9 if precision <= 19 else 13 if precision <= 28 else 17
+    return {
+        "name": m.group("name"),
+        "type": type_name,
+        "system_type_id": system_type_id,
+        "max_length": max_length,
+        "precision": precision,
+        "scale": scale,
+        "nullable": bool(m.group("null")),
+        "default": m.group("default"),
+        "sqlite_type": sqlite_type,
+    }
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+# --- T-SQL -> SQLite translation -------------------------------------------
+
+_FUNCTIONS = {"ISNULL": "IFNULL", "LEN": "LENGTH", "GETDATE": "DATETIME", "SYSDATETIME": "DATETIME", "NEWID": "RANDOM"}
+_MAX_TYPES = {"VARCHAR", "NVARCHAR", "VARBINARY"}
+# Table-valued dynamic management functions emulated as tables in sys
+_TABLE_FUNCTIONS = {"DM_DB_INDEX_PHYSICAL_STATS"}
+
+
+@functools.lru_cache(maxsize=1024)
+def translate(sql: str) -> str:
+    """Rewrite the T-SQL constructs SQLite lacks; everything else is kept verbatim"""
+    tokens = list(scan(sql))
+    edits: List[Tuple[int, int, str]] = []  # (start, end, replacement)
+    limits: List[Optional[str]] = [None]  # pending LIMIT per parenthesis depth
+    statement_end = 0
+
+    def text(i: int) -> str:
+        return sql[tokens[i][1]:tokens[i][2]]
+
+    def word(i: int) -> Optional[str]:
+        return text(i).upper() if i < len(tokens) and tokens[i][0] == WORD else None
+
+    def is_punct(i: int, char: str) -> bool:
+        return i < len(tokens) and tokens[i][0] == PUNCT and text(i) == char
+
+    def closing(i: int) -> int:
+        """Index of the ')' matching the '(' at i (or the last token)"""
+        depth = 0
+        for j in range(i, len(tokens)):
+            if is_punct(j, "("):
+                depth += 1
+            elif is_punct(j, ")"):
+                depth -= 1
+                if depth == 0:
+                    return j
+        return len(tokens) - 1
+
+    def flush(position: int) -> None:
+        if limits[0] is not None:
+            edits.append((position, position, f" LIMIT {limits[0]}"))
+            limits[0] = None
+
+    i = 0
+    while i < len(tokens):
+        kind, start, end = tokens[i]
+        upper = word(i)
+        if kind == IDENTIFIER and sql[start] == "[":
+            edits.append((start, end, _quote(sql[start + 1:end - 1].replace("]]", "]"))))
+        elif kind == STRING and sql[start] in "Nn":
+            edits.append((start, start + 1, ""))
+        elif upper in _FUNCTIONS and is_punct(i + 1, "("):
+            edits.append((start, end, _FUNCTIONS[upper]))
+        elif upper in _MAX_TYPES and is_punct(i + 1, "(") and word(i + 2) == "MAX" and is_punct(i + 3, ")"):
+            edits.append((end, tokens[i + 3][2], ""))
+            i += 4
+            continue
+        elif upper in _TABLE_FUNCTIONS and is_punct(i + 1, "("):
+            last = closing(i + 1)
+            edits.append((end, tokens[last][2], ""))
+            i = last + 1
+            continue
+        elif upper == "TABLESAMPLE":
+            # TABLESAMPLE [SYSTEM] (<n> PERCENT | ROWS) [REPEATABLE (<seed>)]
+            last = closing(i + 2 if word(i + 1) == "SYSTEM" else i + 1)
+            if word(last + 1) == "REPEATABLE" and is_punct(last + 2, "("):
+                last = closing(last + 2)
+            edits.append((start, tokens[last][2], ""))
+            statement_end = tokens[last][2]
+            i = last + 1
+            continue
+        elif upper == "TOP":
+            if is_punct(i + 1, "("):
+                close = closing(i + 1)
+                limits[-1] = sql[tokens[i + 1][2]:tokens[close][1]].strip()
+                last = close
+            else:
+                limits[-1] = text(i + 1) if i + 1 < len(tokens) and tokens[i + 1][0] == NUMBER else "-1"
+                last = i + 1
+            edits.append((start, tokens[last][2], ""))
+            i = last + 1
+            continue
+        elif upper == "OFFSET":
+            # OFFSET <skip> ROWS [FETCH FIRST|NEXT <count> ROWS ONLY] -> LIMIT <count> OFFSET <skip>
+            j = i + 1
+            while j < len(tokens) and word(j) not in ("ROW", "ROWS"):
+                j += 1
+            skip = sql[end:tokens[min(j, len(tokens) - 1)][1]].strip()
+            count, last = "-1", j
+            if word(j + 1) == "FETCH":
+                k = j + 3
+                while k < len(tokens) and word(k) not in ("ROW", "ROWS"):
+                    k += 1
+                count = sql[tokens[j + 2][2]:tokens[min(k, len(tokens) - 1)][1]].strip()
+                last = k + 1 if word(k + 1) == "ONLY" else k
+            last = min(last, len(tokens) - 1)
+            edits.append((start, tokens[last][2], f"LIMIT {count} OFFSET {skip}"))
+            statement_end = tokens[last][2]
+            i = last + 1
+            continue
+        elif upper == "OPTION" and is_punct(i + 1, "(") and len(limits) == 1:
+            last = closing(i + 1)
+            edits.append((start, tokens[last][2], ""))
+            i = last + 1
+            continue
+        elif upper == "WITH" and i > 0 and is_punct(i + 1, "(") and word(i - 1) not in (None, "AS"):
+            last = closing(i + 1)  # table hint such as WITH (NOLOCK)
+            edits.append((start, tokens[last][2], ""))
+            i = last + 1
+            continue
+        elif kind == PUNCT and sql[start] == "(":
+            limits.append(None)
+        elif kind == PUNCT and sql[start] == ")" and len(limits) > 1:
+            pending = limits.pop()
+            if pending is not None:
+                edits.append((start, start, f" LIMIT {pending}"))
+        elif kind == SEMICOLON:
+            flush(statement_end)
+            limits = [None]
+        if kind != SEMICOLON:
+            statement_end = end
+        i += 1
+    flush(statement_end)
+
+    if not edits:
+        return sql
+    out, position = [], 0
+    for start, end, replacement in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+        out.append(sql[position:start])
+        out.append(replacement)
+        position = end
+    out.append(sql[position:])
+    return "".join(out)
+
+
+# --- Fixture data -----------------------------------------------------------
+
+_CATEGORIES = {
+    "Bikes": ["Mountain Bikes", "Road Bikes", "Touring Bikes"],
+    "Components": ["Handlebars", "Bottom Brackets", "Brakes", "Chains", "Cranksets", "Derailleurs",
+                   "Forks", "Headsets", "Mountain Frames", "Pedals", "Road Frames", "Saddles",
+                   "Touring Frames", "Wheels"],
+    "Clothing": ["Bib-Shorts", "Caps", "Gloves", "Jerseys", "Shorts", "Socks", "Tights", "Vests"],
+    "Accessories": ["Bike Racks", "Bike Stands", "Bottles and Cages", "Cleaners", "Fenders",
+                    "Helmets", "Hydration Packs", "Lights", "Locks", "Panniers", "Pumps", "Tires and Tubes"],
+}
+_COLORS = ["Black", "Blue", "Grey", "Multi", "Red", "Silver", "White", "Yellow", None]
+_SIZES = ["S", "M", "L", "XL", "44", "48", "52", "58", "62", None]
+_FIRST_NAMES = ["Orlando", "Keith", "Donna", "Janet", "Lucy", "Rosmarie", "Dominic", "Kathleen",
+                "Katherine", "Johnny", "Christopher", "David", "John", "Jean", "Jinghao", "Linda"]
+_LAST_NAMES = ["Gee", "Harris", "Carreras", "Gates", "Harrington", "Carroll", "Gash", "Garza",
+               "Harding", "Caprio", "Beck", "Liu", "Beaver", "Handley", "Mitchell", "Ortiz"]
+_CITIES = [("Bothell", "Washington", "United States"), ("Toronto", "Ontario", "Canada"),
+           ("Dallas", "Texas", "United States"), ("London", "England", "United Kingdom"),
+           ("Phoenix", "Arizona", "United States"), ("Montreal", "Quebec", "Canada")]
+_SHIP_METHODS = ["CARGO TRANSPORT 5", "OVERNIGHT J-FAST", "ZY - EXPRESS"]
+
+
+def _timestamp(base: datetime.datetime, days: float) -> str:
+    return (base + datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S.000")
+
+
+def generate_rows(row_scale: float = 1.0, seed: int = 42) -> Dict[str, List[tuple]]:
+    """Deterministic fixture rows keyed by ``schema.table``
+
+    At ``row_scale=1`` the row counts follow AdventureWorksLT.
+    """
+    rng = random.Random(seed)
+
+    def scaled(count: int) -> int:
+        return max(1, int(count * row_scale))
+
+    def guid() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4)).upper()
+
+    base = datetime.datetime(2005, 7, 1)
+    modified = _timestamp(base, 1000)
+    rows: Dict[str, List[tuple]] = {
+        "dbo.BuildVersion": [(1, "10.00.80404.00", "2008-04-04 00:00:00.000", modified)],
+        "dbo.ErrorLog": [],
+    }
+
+    categories, subcategories = [], []
+    for parent_name, children in _CATEGORIES.items():
+        parent_id = len(categories) + 1
+        categories.append((parent_id, None, parent_name, guid(), modified))
+    for parent_id, (_, children) in enumerate(_CATEGORIES.items(), start=1):
+        for child in children:
+            category_id = len(categories) + 1
+            categories.append((category_id, parent_id, child, guid(), modified))
+            subcategories.append(category_id)
+    rows["SalesLT.ProductCategory"] = categories
+
+    models = [(i, f"Model {i:03d}", None, guid(), modified) for i in range(1, 129)]
+    rows["SalesLT.ProductModel"] = models
+
+    products = []
+    for i in range(1, 296):
+        model = rng.choice(models)
+        color, size = rng.choice(_COLORS), rng.choice(_SIZES)
+        cost = round(rng.uniform(0.85, 2200.0), 4)
+        products.append((
+            679 + i, f"{model[1]} {color or 'Plain'}, {size or 'One size'} #{i}", f"PR-{i:04d}", color,
+            cost, round(cost * rng.uniform(1.2, 2.0), 4), size,
+            round(rng.uniform(100, 14000), 2) if rng.random() < 0.4 else None,
+            rng.choice(subcategories), model[0], _timestamp(base, rng.randint(0, 800)), None, None,
+            None, "no_image_available_small.gif", guid(), modified,
+        ))
+    rows["SalesLT.Product"] = products
+
+    customers = []
+    for i in range(1, scaled(847) + 1):
+        first, last = rng.choice(_FIRST_NAMES), rng.choice(_LAST_NAMES)
+        customers.append((
+            i, 0, rng.choice(["Mr.", "Ms.", None]), first, None, last, None,
+            f"{last} Cycles {i}", f"adventure-works\\{rng.choice(['linda3', 'jose1', 'shu0'])}",
+            f"{first.lower()}{i}@adventure-works.com", f"{rng.randint(100, 999)}-555-0{rng.randint(100, 999)}",
+            f"{rng.getrandbits(128):032x}", f"{rng.getrandbits(32):08x}"[:8], guid(), modified,
+        ))
+    rows["SalesLT.Customer"] = customers
+
+    addresses = []
+    for i in range(1, scaled(450) + 1):
+        city, state, country = rng.choice(_CITIES)
+        addresses.append((
+            i, f"{rng.randint(1, 9999)} {rng.choice(['Main', 'Oak', 'Pine', 'Elm'])} St.", None,
+            city, state, country, f"{rng.randint(10000, 99999)}", guid(), modified,
+        ))
+    rows["SalesLT.Address"] = addresses
+
+    rows["SalesLT.CustomerAddress"] = [
+        (customers[i][0], addresses[i][0], rng.choice(["Main Office", "Shipping"]), guid(), modified)
+        for i in range(min(scaled(417), len(customers), len(addresses)))
+    ]
+
+    headers, details = [], []
+    for i in range(scaled(32)):
+        order_id = 71774 + i
+        customer = rng.choice(rows["SalesLT.CustomerAddress"]) if rows["SalesLT.CustomerAddress"] else customers[0]
+        order_day = rng.randint(1000, 1200)
+        subtotal = 0.0
+        for line in range(rng.randint(1, 33)):
+            product = rng.choice(products)
+            qty = rng.randint(1, 25)
+            price = round(product[5] * 0.6, 4)
+            line_total = round(qty * price, 6)
+            subtotal += line_total
+            details.append((order_id, 110562 + len(details), qty, product[0], price, 0.0, line_total, guid(), modified))
+        subtotal = round(subtotal, 4)
+        tax, freight = round(subtotal * 0.08, 4), round(subtotal * 0.025, 4)
+        headers.append((
+            order_id, 2, _timestamp(base, order_day), _timestamp(base, order_day + 12),
+            _timestamp(base, order_day + 7), 5, 0, f"SO{order_id}", f"PO{rng.getrandbits(40)}",
+            f"10-4020-{rng.randint(0, 999999):06d}", customer[0], customer[1] if len(customer) > 4 else None,
+            customer[1] if len(customer) > 4 else None, rng.choice(_SHIP_METHODS),
+            subtotal, tax, freight, round(subtotal + tax + freight, 4), None, guid(), modified,
+        ))
+    rows["SalesLT.SalesOrderHeader"] = headers
+    rows["SalesLT.SalesOrderDetail"] = details
+    return rows
+
+
+# --- Database build ---------------------------------------------------------
+
+_SYNTHETIC_COLUMNS = ["nvarchar(50) null", "int null", "money null", "datetime null", "decimal(12,2) null", "bit null"]
+
+
+def synthetic_tables(count: int, columns: int = 20) -> Tuple[list, list]:
+    """Table and foreign key definitions for ``count`` generated dbo tables"""
+    tables, foreign_keys = [], []
+    for i in range(1, count + 1):
+        name = f"Synthetic{i:05d}"
+        specs = ["ID: int", "ParentID: int null", "ModifiedDate: datetime default (getdate())"]
+        specs += [f"Attribute{j:02d}: {_SYNTHETIC_COLUMNS[j % len(_SYNTHETIC_COLUMNS)]}" for j in range(1, columns - 2)]
+        tables.append(("dbo", name, ["ID"], specs))
+        if i > 1:
+            foreign_keys.append((f"FK_{name}_Parent", f"dbo.{name}", ["ParentID"], f"dbo.Synthetic{i - 1:05d}", ["ID"]))
+    return tables, foreign_keys
+
+
+def build_database(directory: str, row_scale: float = 1.0, extra_tables: int = 0) -> None:
+    """Create one SQLite file per schema (plus sys and INFORMATION_SCHEMA) in ``directory``"""
+    rows = generate_rows(row_scale)
+    extra, extra_keys = synthetic_tables(extra_tables)
+    foreign_keys = FOREIGN_KEYS + extra_keys
+    tables = [
+        (schema, name, pk, [_parse_column(spec) for spec in specs])
+        for schema, name, pk, specs in TABLES + extra
+    ]
+    views = [(schema, name, [_parse_column(spec) for spec in specs], body) for schema, name, specs, body in VIEWS]
+
+    for schema in DATA_SCHEMAS:
+        conn = sqlite3.connect(os.path.join(directory, f"{schema}.db"))
+        for table_schema, name, pk, columns in tables:
+            if table_schema != schema:
+                continue
+            column_sql = ", ".join(f"{_quote(col['name'])} {col['sqlite_type']}" for col in columns)
+            conn.execute(f"CREATE TABLE {_quote(name)} ({column_sql}, PRIMARY KEY ({', '.join(map(_quote, pk))}))")
+            data = rows.get(f"{schema}.{name}")
+            if data:
+                conn.executemany(f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' * len(columns))})", data)
+        for index_name, table, key_columns, unique in INDEXES:
+            table_schema, name = table.split(".")
+            if table_schema == schema:
+                conn.execute(
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX {_quote(index_name)} "
+                    f"ON {_quote(name)} ({', '.join(map(_quote, key_columns))})"
+                )
+        for view_schema, name, columns, body in views:
+            if view_schema == schema:
+                conn.execute(f"CREATE VIEW {_quote(name)} ({', '.join(_quote(c['name']) for c in columns)}) AS {body}")
+        conn.commit()
+        conn.close()
+
+    _build_catalog(directory, tables, views, foreign_keys, {name: len(data) for name, data in rows.items()})
+    open(os.path.join(directory, "main.db"), "wb").close()
+
+
+def _column_bytes(col: Dict[str, Any]) -> int:
+    """Rough in-row size of a column: variable-length values half full, (max) values off row"""
+    if col["max_length"] == -1:
+        return 24  # pointer to the LOB pages
+    if col["type"] in ("nvarchar", "varchar", "varbinary"):
+        return col["max_length"] // 2 + 2
+    return col["max_length"]
+
+
+def _page_counts(row_count: int, row_bytes: int) -> Tuple[int, int, int]:
+    """(data, used, reserved) 8 KB pages for ``row_count`` rows of ``row_bytes`` each"""
+    if not row_count:
+        return 0, 0, 0
+    data = math.ceil(row_count / max(1, 8096 // (row_bytes + 11)))
+    used = data + math.ceil(data / 500) + 1  # upper index levels and the IAM page
+    return data, used, math.ceil(used / 8) * 8  # allocated in extents of 8 pages
+
+
+def _stats_date(object_id: Any, stats_id: Any) -> Optional[str]:
+    """STATS_DATE(): statistics are as old as the fixture"""
+    return None if object_id is None or stats_id is None else _CREATED
+
+
+def _build_catalog(directory: str, tables, views, foreign_keys, row_counts: Dict[str, int]) -> None:
+    """Fill the sys.* and INFORMATION_SCHEMA emulation from the fixture definitions"""
+    next_id = iter(range(1000, 2 ** 31, 7))
+    objects, columns, defaults, indexes, index_columns, fks, fk_columns = [], [], [], [], [], [], []
+    info_tables, info_columns, constraints, key_usage, referential = [], [], [], [], []
+    partition_stats, stats, physical_stats = [], [], []
+    object_ids: Dict[str, int] = {}
+    column_ids: Dict[Tuple[str, str], int] = {}
+    column_bytes: Dict[Tuple[str, str], int] = {}
+
+    def add_partition(table, index_id, key_columns):
+        """Partition stats of a table's heap, clustered index (all columns) or nonclustered index"""
+        if index_id == 1:
+            row_bytes = sum(size for (owner, _), size in column_bytes.items() if owner == table)
+        else:
+            pk = next(pk for s, n, pk, _ in tables if f"{s}.{n}" == table)
+            row_bytes = sum(column_bytes[(table, column)] for column in dict.fromkeys(key_columns + pk))
+        row_count = row_counts.get(table, 0)
+        data, used, reserved = _page_counts(row_count, row_bytes)
+        object_id = object_ids[table]
+        partition_stats.append((
+            72057594037927936 + len(partition_stats), object_id, index_id, 1, data, used, reserved, row_count,
+        ))
+        # Deterministic, made-up fragmentation for the leaf level
+        fragmentation = round(random.Random(object_id * 31 + index_id).uniform(0, 40), 2) if data > 1 else 0.0
+        fragments = max(1, round(data * fragmentation / 100)) if data else 0
+        physical_stats.append((
+            1, object_id, index_id, 1, "CLUSTERED INDEX" if index_id == 1 else "NONCLUSTERED INDEX", "IN_ROW_DATA",
+            1 + math.ceil(math.log(data, 500)) if data > 1 else 1, 0, fragmentation, fragments,
+            data / fragments if fragments else 0.0, data,
+        ))
+
+    def add_object(name, schema, obj_type, type_desc, parent=0):
+        object_id = next(next_id)
+        objects.append((object_id, name, SCHEMAS[schema], parent, obj_type, type_desc, _CREATED, _CREATED, 0))
+        return object_id
+
+    for schema, name, pk, cols in tables + [(s, n, None, c) for s, n, c, _ in views]:
+        full_name = f"{schema}.{name}"
+        is_view = pk is None
+        object_id = add_object(name, schema, "V" if is_view else "U", "VIEW" if is_view else "USER_TABLE")
+        object_ids[full_name] = object_id
+        info_tables.append((DATABASE_NAME, schema, name, "VIEW" if is_view else "BASE TABLE"))
+        for column_id, col in enumerate(cols, start=1):
+            column_ids[(full_name, col["name"])] = column_id
+            column_bytes[(full_name, col["name"])] = _column_bytes(col)
+            default_id = 0
+            if col["default"]:
+                default_name = f"DF_{name}_{col['name']}"
+                default_id = add_object(default_name, schema, "D", "DEFAULT_CONSTRAINT", object_id)
+                defaults.append((default_id, default_name, object_id, column_id, col["default"]))
+            columns.append((
+                object_id, col["name"], column_id, col["system_type_id"], col["system_type_id"],
+                col["max_length"], col["precision"], col["scale"], int(col["nullable"]), 0, default_id,
+            ))
+            info = ColumnInfo(col["name"], col["type"], col["nullable"], col["default"],
+                              col["max_length"], col["precision"], col["scale"], column_id)
+            info_columns.append((
+                DATABASE_NAME, schema, name, col["name"], column_id, col["default"],
+                "YES" if col["nullable"] else "NO", col["type"],
+                info.character_maximum_length, info.numeric_precision, info.numeric_scale,
+            ))
+        if pk:
+            pk_name = f"PK_{name}_{'_'.join(pk)}"
+            add_object(pk_name, schema, "PK", "PRIMARY_KEY_CONSTRAINT", object_id)
+            indexes.append((object_id, pk_name, 1, 1, "CLUSTERED", 1, 1, 0, 0, None))
+            stats.append((object_id, pk_name, 1, 0, 0, 0, 0, None))
+            for ordinal, column in enumerate(pk, start=1):
+                index_columns.append((object_id, 1, ordinal, column_ids[(full_name, column)], ordinal, 0, 0))
+                key_usage.append((DATABASE_NAME, schema, pk_name, DATABASE_NAME, schema, name, column, ordinal))
+            constraints.append((DATABASE_NAME, schema, pk_name, DATABASE_NAME, schema, name, "PRIMARY KEY"))
+            add_partition(full_name, 1, pk)
+
+    index_counts: Dict[str, int] = {}
+    for index_name, table, key_columns, unique in INDEXES:
+        object_id = object_ids[table]
+        index_id = index_counts[table] = index_counts.get(table, 1) + 1
+        indexes.append((object_id, index_name, index_id, 2, "NONCLUSTERED", int(unique), 0, 0, 0, None))
+        stats.append((object_id, index_name, index_id, 0, 0, 0, 0, None))
+        for ordinal, column in enumerate(key_columns, start=1):
+            index_columns.append((object_id, index_id, ordinal, column_ids[(table, column)], ordinal, 0, 0))
+        add_partition(table, index_id, key_columns)
+
+    for name, table, cols, referenced, referenced_cols in foreign_keys:
+        schema, table_name = table.split(".")
+        constraint_id = add_object(name, schema, "F", "FOREIGN_KEY_CONSTRAINT", object_ids[table])
+        fks.append((constraint_id, name, object_ids[table], object_ids[referenced]))
+        constraints.append((DATABASE_NAME, schema, name, DATABASE_NAME, schema, table_name, "FOREIGN KEY"))
+        ref_schema, ref_name = referenced.split(".")
+        ref_pk = next(pk for s, n, pk, _ in tables if f"{s}.{n}" == referenced)
+        referential.append((DATABASE_NAME, schema, name, DATABASE_NAME, ref_schema, f"PK_{ref_name}_{'_'.join(ref_pk)}"))
+        for ordinal, (column, ref_column) in enumerate(zip(cols, referenced_cols), start=1):
+            fk_columns.append((
+                constraint_id, ordinal, object_ids[table], column_ids[(table, column)],
+                object_ids[referenced], column_ids[(referenced, ref_column)],
+            ))
+            key_usage.append((DATABASE_NAME, schema, name, DATABASE_NAME, schema, table_name, column, ordinal))
+
+    types = [
+        (name, system_type_id, system_type_id, SCHEMAS["sys"], max_length, precision, scale, 0)
+        for name, (system_type_id, max_length, precision, scale, _) in _TYPES.items()
+    ]
+    schemas = [(schema_id, name, 1) for name, schema_id in SCHEMAS.items()]
+
+    conn = sqlite3.connect(os.path.join(directory, "sys.db"))
+    for ddl in CATALOG_DDL:
+        conn.execute(ddl)
+    for table, data in [
+        ("schemas", schemas), ("objects", objects), ("types", types), ("columns", columns),
+        ("default_constraints", defaults), ("indexes", indexes), ("index_columns", index_columns),
+        ("foreign_keys", fks), ("foreign_key_columns", fk_columns), ("dm_db_partition_stats", partition_stats),
+        ("stats", stats), ("dm_db_index_physical_stats", physical_stats),
+    ]:
+        if data:
+            conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(data[0]))})", data)
+    conn.commit()
+    conn.close()
+
+    conn = sqlite3.connect(os.path.join(directory, "INFORMATION_SCHEMA.db"))
+    for ddl in INFORMATION_SCHEMA_DDL:
+        conn.execute(ddl)
+    for table, data in [
+        ("TABLES", info_tables), ("COLUMNS", info_columns), ("TABLE_CONSTRAINTS", constraints),
+        ("KEY_COLUMN_USAGE", key_usage), ("REFERENTIAL_CONSTRAINTS", referential),
+    ]:
+        if data:
+            conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(data[0]))})", data)
+    conn.commit()
+    conn.close()
+
+
+# --- Estimated plans --------------------------------------------------------
+
+_SHOWPLAN_RE = re.compile(r"^\s*SET\s+SHOWPLAN_XML\s+(ON|OFF)\s*;?\s*$", re.IGNORECASE)
+_LOOP_RE = re.compile(r"^(SCAN|SEARCH) (?!CONSTANT ROW)(\S+)(?: USING (?:COVERING )?INDEX (\S+))?")
+_LIMIT_RE = re.compile(r"LIMIT (\d+)(?: OFFSET \d+)?\s*;?\s*$", re.IGNORECASE)
+_NOT_ALIASES = frozenset({
+    "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS", "ON", "GROUP", "ORDER", "HAVING",
+    "UNION", "EXCEPT", "INTERSECT", "OPTION", "WITH", "FOR", "APPLY", "TABLESAMPLE",
+})
+_ROW_COST = 1e-5  # cost units per row touched, roughly SQL Server's scale
+
+
+def _table_aliases(sql: str) -> Dict[str, str]:
+    """Lower-cased alias -> table name for the FROM and JOIN references of a query"""
+    tokens = [(kind, sql[start:end]) for kind, start, end in scan(sql)]
+    aliases: Dict[str, str] = {}
+    i = 0
+    while i < len(tokens):
+        if tokens[i][0] != WORD or tokens[i][1].upper() not in ("FROM", "JOIN"):
+            i += 1
+            continue
+        j, parts = i + 1, []
+        while j < len(tokens) and tokens[j][0] in (WORD, IDENTIFIER):
+            parts.append(tokens[j][1].strip('[]"'))
+            j += 1
+            if j < len(tokens) and tokens[j] == (PUNCT, "."):
+                j += 1
+            else:
+                break
+        if parts:
+            if j < len(tokens) and tokens[j][0] == WORD and tokens[j][1].upper() == "AS":
+                j += 1
+            if j < len(tokens) and tokens[j][0] in (WORD, IDENTIFIER) and tokens[j][1].upper() not in _NOT_ALIASES:
+                aliases[tokens[j][1].strip('[]"').lower()] = ".".join(parts)
+        i = j
+    return aliases
+
+
+def _plan_operator(physical: str, logical: str, rows: float, cost: float, children=(), table: Optional[str] = None,
+                   index: Optional[str] = None) -> ET.Element:
+    relop = ET.Element(f"{{{SHOWPLAN_NS}}}RelOp", {
+        "PhysicalOp": physical, "LogicalOp": logical,
+        "EstimateRows": repr(float(rows)), "EstimatedTotalSubtreeCost": repr(float(cost)),
+    })
+    op = ET.SubElement(relop, f"{{{SHOWPLAN_NS}}}{physical.replace(' ', '')}")
+    if table is not None:
+        schema, _, name = table.rpartition(".")
+        attributes = {"Schema": f"[{schema or 'dbo'}]", "Table": f"[{name}]"}
+        if index:
+            attributes["Index"] = f"[{index}]"
+        ET.SubElement(op, f"{{{SHOWPLAN_NS}}}Object", attributes)
+    op.extend(children)
+    return relop
+
+
+def showplan_xml(connection: "SqliteConnection", sql: str) -> str:
+    """ShowPlanXML estimating ``sql``, derived from SQLite's EXPLAIN QUERY PLAN
+
+    Each top-level SCAN or SEARCH is a nested loop over its table's row
+    count (a primary key search finds one row, other searches 1%). Sorts
+    and groupings add n log n, and a trailing LIMIT without a sort caps the
+    rows and scales the cost down, like SQL Server's row goal.
+    """
+    translated = translate(sql)
+    aliases = _table_aliases(sql)
+    loops: List[Tuple[str, Optional[str], bool, float]] = []  # (table, index, seek, rows)
+    extra_cost, sorts = 0.0, []
+    for _, parent, _, detail in connection._conn.execute("EXPLAIN QUERY PLAN " + translated):
+        m = _LOOP_RE.match(detail)
+        if m:
+            table, count = connection._table_rows(aliases.get(m.group(2).lower(), m.group(2)))
+            seek = m.group(1) == "SEARCH"
+            rows = 1.0 if seek and "PRIMARY KEY" in detail else max(1.0, count * 0.01) if seek else float(count)
+            if parent == 0:
+                loops.append((table, m.group(3), seek, rows))
+            else:
+                extra_cost += rows * _ROW_COST  # subqueries: counted once
+        elif detail.startswith("USE TEMP B-TREE FOR "):
+            sorts.append(detail[len("USE TEMP B-TREE FOR "):])  # ORDER BY, GROUP BY, DISTINCT
+
+    total_rows = math.prod(rows for _, _, _, rows in loops)
+    limit = _LIMIT_RE.search(translated)
+    top = min(total_rows, float(limit.group(1))) if limit is not None else None
+    # Row goal: without a sort the loops stop once the first rows are produced
+    scale = top / total_rows if top is not None and not sorts and total_rows else 1.0
+
+    relop, rows, cost = None, 1.0, extra_cost
+    for table, index, seek, loop_rows in loops:
+        executions = rows
+        rows *= loop_rows
+        physical = ("Index Seek" if seek else "Index Scan") if index else ("Clustered Index Seek" if seek else "Clustered Index Scan")
+        loop_cost = executions * loop_rows * _ROW_COST * scale
+        cost += loop_cost
+        scan_op = _plan_operator(physical, physical, loop_rows, loop_cost, table=table, index=index)
+        relop = scan_op if relop is None else _plan_operator("Nested Loops", "Inner Join", rows * scale, cost, [relop, scan_op])
+    if relop is None:
+        relop = _plan_operator("Constant Scan", "Constant Scan", 1, 0.0)
+    for sort in sorts:
+        cost += rows * max(1.0, math.log2(rows + 1)) * _ROW_COST
+        physical, logical = ("Sort", "Sort") if sort == "ORDER BY" else ("Hash Match", "Aggregate")
+        relop = _plan_operator(physical, logical, rows, cost, [relop])
+    if top is not None:
+        rows = top
+        relop = _plan_operator("Top", "Top", rows, cost, [relop])
+
+    root = ET.Element(f"{{{SHOWPLAN_NS}}}ShowPlanXML", {"Version": "1.564", "Build": f"sqlite {sqlite3.sqlite_version}"})
+    statements = ET.SubElement(ET.SubElement(ET.SubElement(root, f"{{{SHOWPLAN_NS}}}BatchSequence"), f"{{{SHOWPLAN_NS}}}Batch"), f"{{{SHOWPLAN_NS}}}Statements")
+    statement = ET.SubElement(statements, f"{{{SHOWPLAN_NS}}}StmtSimple", {
+        "StatementText": sql, "StatementType": "SELECT",
+        "StatementSubTreeCost": repr(cost), "StatementEstRows": repr(rows),
+    })
+    ET.SubElement(statement, f"{{{SHOWPLAN_NS}}}QueryPlan").append(relop)
+    return ET.tostring(root, encoding="unicode")
+
+
+# --- DB-API wrappers --------------------------------------------------------
+
+_PYTHON_TYPES = (bool, int, float, str, bytes)
+
+
+class SqliteCursor:
+    """Cursor that accepts T-SQL, simulates network round trips and can be cancelled"""
+
+    def __init__(self, connection: "SqliteConnection"):
+        self.connection = connection
+        self._cursor = connection._conn.cursor()
+        self._buffer: List[tuple] = []
+        self.description: Optional[List[tuple]] = None
+        self.rowcount = -1
+
+    def execute(self, sql: str, *params: Any) -> "SqliteCursor":
+        self.connection._start_statement()
+        if len(params) == 1 and isinstance(params[0], (list, tuple)):
+            params = tuple(params[0])
+        showplan = _SHOWPLAN_RE.match(sql)
+        if showplan is not None:
+            self.connection.showplan = showplan.group(1).upper() == "ON"
+            self._buffer, self.description, self.rowcount = [], None, -1
+            return self
+        if self.connection.showplan:
+            # Compile only, like SQL Server: one row holding the estimated plan
+            try:
+                self._buffer = [(showplan_xml(self.connection, sql),)]
+            except sqlite3.OperationalError as e:
+                self.connection._raise_if_cancelled(e)
+                raise
+            self.description = [("Microsoft SQL Server 2005 XML Showplan", str, None, None, None, None, None)]
+            self.rowcount = -1
+            self._cursor = self.connection._conn.cursor()  # nothing left to read from the previous statement
+            return self
+        try:
+            self._cursor.execute(translate(sql), params)
+            self.rowcount = self._cursor.rowcount
+            self._buffer = []
+            self.description = None
+            if self._cursor.description is not None:
+                # Report column types from the first row, as the ODBC driver reports SQL types
+                first = self._cursor.fetchone()
+                if first is not None:
+                    self._buffer.append(first)
+                self.description = [
+                    (desc[0], type(value) if first is not None and isinstance(value, _PYTHON_TYPES) else None,
+                     None, None, None, None, None)
+                    for desc, value in zip(self._cursor.description, first or [None] * len(self._cursor.description))
+                ]
+        except sqlite3.OperationalError as e:
+            self.connection._raise_if_cancelled(e)
+            raise
+        return self
+
+    def fetchone(self) -> Optional[tuple]:
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size: int = 1) -> List[tuple]:
+        self.connection._round_trip()
+        rows, self._buffer = self._buffer[:size], self._buffer[size:]
+        if len(rows) < size:
+            try:
+                rows.extend(self._cursor.fetchmany(size - len(rows)))
+            except sqlite3.OperationalError as e:
+                self.connection._raise_if_cancelled(e)
+                raise
+        return rows
+
+    def fetchall(self) -> List[tuple]:
+        self.connection._round_trip()
+        rows, self._buffer = self._buffer, []
+        rows.extend(self._cursor.fetchall())
+        return rows
+
+    def nextset(self) -> bool:
+        """Single-statement results only, so there is never another result set"""
+        return False
+
+    def cancel(self) -> None:
+        self.connection.cancel()
+
+    def close(self) -> None:
+        self._buffer = []
+        self._cursor.close()
+
+
+class SqliteConnection:
+    """Read-only connection to the stand-in database
+
+    ``timeout`` works like pyodbc's: seconds a statement may run, 0 for no
+    limit. Statements are interrupted through SQLite's progress handler.
+    After ``SET SHOWPLAN_XML ON`` statements return an estimated plan
+    instead of running.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, latency: float = 0.0):
+        self._conn = conn
+        self.latency = latency
+        self.timeout = 0
+        self._deadline: Optional[float] = None
+        self._cancelled = threading.Event()
+        self.showplan = False
+        self._row_counts: Dict[str, Tuple[str, int]] = {}
+        conn.set_progress_handler(self._should_abort, 1000)
+
+    def cursor(self) -> SqliteCursor:
+        return SqliteCursor(self)
+
+    def execute(self, sql: str, *params: Any) -> SqliteCursor:
+        return self.cursor().execute(sql, *params)
+
+    def cancel(self) -> None:
+        """Interrupt the running statement (thread-safe)"""
+        self._cancelled.set()
+        self._conn.interrupt()
+
+    def rollback(self) -> None:
+        self._conn.rollback()
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _table_rows(self, table: str) -> Tuple[str, int]:
+        """Schema-qualified name and row count of ``table``; unknown names such as CTEs count as 1000 rows"""
+        key = table.lower()
+        if key not in self._row_counts:
+            schema, _, name = table.rpartition(".")
+            found = (table, 1000)
+            for candidate in ([schema] if schema else list(DATA_SCHEMAS)):
+                try:
+                    count = self._conn.execute(f"SELECT COUNT(*) FROM {_quote(candidate)}.{_quote(name)}").fetchone()[0]
+                except sqlite3.OperationalError:
+                    continue
+                found = (f"{candidate}.{name}", count)
+                break
+            self._row_counts[key] = found
+        return self._row_counts[key]
+
+    def _start_statement(self) -> None:
+        self._cancelled.clear()
+        self._deadline = time.monotonic() + self.timeout if self.timeout else None
+        self._round_trip()
+
+    def _round_trip(self) -> None:
+        if self.latency > 0 and self._cancelled.wait(self.latency):
+            raise sqlite3.OperationalError("Operation canceled")
+
+    def _should_abort(self) -> int:
+        if self._cancelled.is_set():
+            return 1
+        return 1 if self._deadline is not None and time.monotonic() > self._deadline else 0
+
+    def _raise_if_cancelled(self, error: Exception) -> None:
+        if self._cancelled.is_set():
+            raise sqlite3.OperationalError("Operation canceled") from error
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise sqlite3.OperationalError(f"Query timeout expired ({self.timeout}s)") from error
+
+
+class SqliteBackend(Backend):
+    """Offline stand-in for SQL Server backed by SQLite files
+
+    The database is built on the first connect(), in ``path`` if given
+    (and reused if already built there), otherwise in a temporary directory
+    removed by close().
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None, latency: float = 0.0, row_scale: float = 1.0, extra_tables: int = 0):
+        self.path = path
+        self.latency = latency
+        self.row_scale = row_scale
+        self.extra_tables = extra_tables
+        self._directory: Optional[str] = None
+        self._owns_directory = False
+        self._lock = threading.Lock()
+
+    def connect(self) -> SqliteConnection:
+        directory = self._ensure_built()
+        conn = sqlite3.connect(
+            f"file:{os.path.join(directory, 'main.db')}?mode=ro", uri=True,
+            check_same_thread=False, isolation_level=None,
+        )
+        conn.create_function("STATS_DATE", 2, _stats_date, deterministic=True)
+        for schema in DATA_SCHEMAS + ("sys", "INFORMATION_SCHEMA"):
+            conn.execute(f"ATTACH DATABASE ? AS {_quote(schema)}", (f"file:{os.path.join(directory, schema + '.db')}?mode=ro",))
+        return SqliteConnection(conn, self.latency)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._owns_directory and self._directory:
+                shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "path": self._directory,
+            "latency": self.latency,
+            "row_scale": self.row_scale,
+            "extra_tables": self.extra_tables,
+        }
+
+    def _ensure_built(self) -> str:
+        with self._lock:
+            if self._directory is None:
+                if self.path:
+                    os.makedirs(self.path, exist_ok=True)
+                    if not os.path.exists(os.path.join(self.path, "main.db")):
+                        build_database(self.path, self.row_scale, self.extra_tables)
+                    self._directory = self.path
+                else:
+                    self._directory = tempfile.mkdtemp(prefix="pocket-dba-sqlite-")
+                    self._owns_directory = True
+                    build_database(self._directory, self.row_scale, self.extra_tables)
+            return self._directory
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+T-SQL lexing for the pocket-dba MCP server
+
+A single left-to-right pass splits a batch into tokens, skipping comments
+(including nested block comments) and keeping string literals, bracketed
+and double-quoted identifiers as single tokens. Keyword checks therefore
+never look inside literals or identifiers: ``UPDATE_DATE``, ``[Delete]``
+and ``'DROP TABLE'`` are not statements.
+"""
+import functools
+import re
+from typing import Iterator, List, Optional, Tuple
+
+# Token kinds
+WORD = "word"
+VARIABLE = "variable"
+IDENTIFIER = "identifier"  # [bracketed] or "double-quoted"
+STRING = "string"
+NUMBER = "number"
+SEMICOLON = "semicolon"
+PUNCT = "punct"
+INVALID = "invalid"  # unterminated literal, identifier or comment
+
+# Whitespace and line comments are skipped inside the match, so each match is one token
+_TOKEN_RE = re.compile(
+    r"""
+    (?:\s+|--[^\r\n]*)*
+    (?:
+      (?P<block_comment>/\*)
+    | (?P<string>[Nn]?'[^']*(?:''[^']*)*')
+    | (?P<identifier>\[[^\]]*(?:\]\][^\]]*)*\]|"[^"]*(?:""[^"]*)*")
+    | (?P<variable>@@?[\w@$#]*)
+    | (?P<number>0[xX][0-9a-fA-F]*|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<word>[^\W\d][\w@$#]*|\#[\w@$#]*)
+    | (?P<semicolon>;)
+    | (?P<invalid>['"\[])
+    | (?P<punct>.)
+    )?
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_BLOCK_COMMENT_RE = re.compile(r"/\*|\*/")
+
+# Statements a read-only batch may start with (SET only for @variables)
+ALLOWED_STATEMENTS = frozenset({"SELECT", "WITH", "DECLARE", "SET"})
+
+# Keywords that write data, change schema or permissions, run code or reach
+# outside the database; any of them anywhere in the batch rejects it
+FORBIDDEN_KEYWORDS = frozenset({
+    "INSERT", "UPDATE", "DELETE", "MERGE", "TRUNCATE", "INTO",
+    "CREATE", "ALTER", "DROP",
+    "GRANT", "REVOKE", "DENY",
+    "EXEC", "EXECUTE",
+    "OPENROWSET", "OPENQUERY", "OPENDATASOURCE",
+    "BACKUP", "RESTORE", "DBCC", "BULK", "USE", "KILL", "SHUTDOWN", "RECONFIGURE",
+    "WRITETEXT", "UPDATETEXT", "WAITFOR",
+})
+
+
+def tokenize(sql: str) -> Iterator[Tuple[str, str]]:
+    """Yield ``(kind, text)`` for each token of a T-SQL batch
+
+    Whitespace and comments are skipped. Runs in linear time. Unterminated
+    literals, identifiers or comments produce an ``INVALID`` token covering
+    the rest of the input.
+    """
+    for kind, start, end in scan(sql):
+        yield kind, sql[start:end]
+
+
+def scan(sql: str) -> Iterator[Tuple[str, int, int]]:
+    """Yield ``(kind, start, end)`` for each token, for callers that rewrite the SQL; see tokenize()"""
+    pos = 0
+    while True:
+        for m in iter(_TOKEN_RE.scanner(sql, pos).match, None):
+            kind = m.lastgroup
+            if kind is None:  # only whitespace or comments left
+                return
+            if kind == "block_comment":
+                pos = _skip_block_comment(sql, m.end())
+                if pos < 0:
+                    yield INVALID, m.start(kind), len(sql)
+                    return
+                break  # restart the scanner after the comment
+            if kind == INVALID:
+                yield INVALID, m.start(kind), len(sql)
+                return
+            yield kind, m.start(kind), m.end()
+        else:
+            return
+
+
+def _skip_block_comment(sql: str, pos: int) -> int:
+    """Position just after the comment opened before ``pos``, or -1 if unterminated
+
+    T-SQL block comments nest.
+    """
+    depth = 1
+    for m in _BLOCK_COMMENT_RE.finditer(sql, pos):
+        depth += 1 if m.group() == "/*" else -1
+        if depth == 0:
+            return m.end()
+    return -1
+
+
+@functools.lru_cache(maxsize=4096)
+def is_read_only(sql: str) -> bool:
+    """True if the batch only reads data
+
+    Every statement must start with SELECT, WITH or DECLARE, or be a SET of
+    a @variable, and no forbidden keyword may appear as a keyword anywhere.
+    Without semicolons T-SQL statement boundaries are not visible to a
+    lexer, which is why the keyword checks cover the whole batch. Verdicts
+    are memoized, so repeated queries are validated once.
+    """
+    statement_start = True
+    after_set = False
+    seen_statement = False
+    for kind, text in tokenize(sql):
+        if kind == INVALID:
+            return False
+        if after_set and kind != VARIABLE:
+            # SET options (SET CONTEXT_INFO, SET IDENTITY_INSERT ...) change session state
+            return False
+        after_set = False
+        if kind == SEMICOLON:
+            statement_start = True
+            continue
+        word = text.upper() if kind == WORD else None
+        if word in FORBIDDEN_KEYWORDS:
+            return False
+        if statement_start and word not in ALLOWED_STATEMENTS:
+            return False
+        statement_start = False
+        seen_statement = True
+        after_set = word == "SET"
+    return seen_statement and not after_set
+
+
+def fingerprint(sql: str) -> str:
+    """Canonical spelling of a batch: one space between tokens, words upper-cased
+
+    Comments and a trailing semicolon are dropped; literals and quoted
+    identifiers are kept verbatim.
+    """
+    tokens: List[str] = [text.upper() if kind == WORD else text for kind, text in tokenize(sql)]
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return " ".join(tokens)
+
+
+def apply_row_limit(sql: str, limit: int, lower_existing: bool = False) -> Optional[str]:
+    """Rewrite a single SELECT so the server returns at most ``limit`` rows
+
+    ``TOP (limit)`` is injected into the outermost SELECT. A UNION, EXCEPT
+    or INTERSECT with an ORDER BY gets ``OFFSET 0 ROWS FETCH NEXT limit
+    ROWS ONLY`` instead, and an OFFSET without FETCH gets the FETCH. A row
+    goal lets the optimizer choose a plan that stops early rather than
+    producing rows the client would throw away.
+
+    Returns None, leaving the query alone, when it already limits its rows
+    or its shape is not one of the above (multiple statements, DECLARE
+    batches, variable assignment, FOR XML/JSON). With ``lower_existing`` a
+    literal ``TOP n`` or ``FETCH NEXT n ROWS`` above ``limit`` is lowered to
+    it instead, and one within it is returned unchanged.
+    """
+    tokens = list(scan(sql))
+    while tokens and tokens[-1][0] == SEMICOLON:
+        tokens.pop()
+    if not tokens or any(kind in (SEMICOLON, INVALID) for kind, _, _ in tokens):
+        return None
+    words = [sql[start:end].upper() if kind == WORD else None for kind, start, end in tokens]
+    if words[0] not in ("SELECT", "WITH"):
+        return None
+
+    depth = 0
+    main_select = clause_end = fetch = None
+    set_operation = order_by = offset = False
+    for i, (kind, start, end) in enumerate(tokens):
+        if kind == PUNCT:
+            if sql[start] == "(":
+                depth += 1
+            elif sql[start] == ")":
+                depth -= 1
+            continue
+        if depth != 0 or words[i] is None:
+            continue
+        word, following = words[i], words[i + 1] if i + 1 < len(words) else None
+        if word == "SELECT" and main_select is None:
+            main_select = i
+        elif word in ("UNION", "EXCEPT", "INTERSECT"):
+            set_operation = True
+        elif word == "ORDER" and following == "BY":
+            order_by = True
+        elif word == "OFFSET":
+            offset = True
+        elif word == "FETCH":
+            fetch = i
+        elif word == "FOR" and following in ("XML", "JSON", "BROWSE"):
+            return None
+        elif word == "OPTION" and clause_end is None:
+            clause_end = i
+
+    if main_select is None:
+        return None
+    # Trailing clauses go before OPTION (...) or after the last token
+    tail = tokens[clause_end - 1][2] if clause_end is not None else tokens[-1][2]
+
+    if offset:
+        if fetch is not None:
+            if lower_existing and fetch + 1 < len(words) and words[fetch + 1] in ("NEXT", "FIRST"):
+                return _lower_count(sql, tokens, fetch + 2, limit)
+            return None
+        return f"{sql[:tail]} FETCH NEXT {limit} ROWS ONLY{sql[tail:]}"
+    if set_operation:
+        if not order_by:
+            return None
+        return f"{sql[:tail]} OFFSET 0 ROWS FETCH NEXT {limit} ROWS ONLY{sql[tail:]}"
+
+    i = main_select + 1
+    if i < len(words) and words[i] in ("ALL", "DISTINCT"):
+        i += 1
+    if i < len(words) and words[i] == "TOP":
+        return _lower_count(sql, tokens, i + 1, limit) if lower_existing else None
+    if i + 1 < len(tokens) and tokens[i][0] == VARIABLE and sql[tokens[i + 1][1]:tokens[i + 1][2]] == "=":
+        return None  # SELECT @x = ... assigns instead of returning rows
+    insert_at = tokens[i - 1][2]
+    return f"{sql[:insert_at]} TOP ({limit}){sql[insert_at:]}"
+
+
+def _lower_count(sql: str, tokens: List[Tuple[str, int, int]], i: int, limit: int) -> Optional[str]:
+    """Lower the literal row count ``n`` or ``(n)`` starting at token ``i`` to ``limit``
+
+    None if the count is an expression or variable, or is followed by
+    PERCENT.
+    """
+    def text(j: int) -> str:
+        return sql[tokens[j][1]:tokens[j][2]] if j < len(tokens) else ""
+
+    if text(i) == "(":
+        count, after = i + 1, i + 3
+        if text(i + 2) != ")":
+            return None
+    else:
+        count, after = i, i + 1
+    if count >= len(tokens) or tokens[count][0] != NUMBER or not text(count).isdigit():
+        return None
+    if text(after).upper() == "PERCENT":
+        return None
+    if int(text(count)) <= limit:
+        return sql
+    return f"{sql[:tokens[count][1]]}{limit}{sql[tokens[count][2]:]}"
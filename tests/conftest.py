@@ -0,0 +1,7 @@
+import os
+from dotenv import load_dotenv
+
+# Without a SQL Server to talk to, run the server against the SQLite stand-in
+load_dotenv()
+if not os.getenv("MSSQL_SERVER"):
+    os.environ.setdefault("MSSQL_BACKEND", "sqlite")
@@ -0,0 +1,153 @@
+import pytest
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.cache import MetadataCache, QueryResultCache, query_fingerprint
+
+class TestMetadataCache:
+    def test_hit_and_miss(self):
+        """Test cached values are returned and misses are counted"""
+        cache = MetadataCache()
+        assert cache.get("SalesLT.Customer") is None
+        cache.put("SalesLT.Customer", "columns")
+
+        assert cache.get("SalesLT.Customer") == "columns"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_ttl_expiry(self):
+        """Test entries expire after their TTL"""
+        cache = MetadataCache(ttl=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+        assert cache.get("a") is None
+
+        cache.put("b", 2, ttl=60)
+        time.sleep(0.02)
+        assert cache.get("b") == 2
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full"""
+        cache = MetadataCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_version_change_invalidates(self):
+        """Test a changed catalog version clears the cache"""
+        version = {"value": 1, "checks": 0}
+
+        def load_version():
+            version["checks"] += 1
+            return version["value"]
+
+        cache = MetadataCache(check_interval=0, version_loader=load_version)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+
+        version["value"] = 2  # simulated DDL
+        assert cache.get("a") is None
+        assert cache.stats()["invalidations"] == 1
+
+    def test_version_checked_at_most_once_per_interval(self):
+        """Test lookups within the check interval do not query the catalog"""
+        checks = []
+        cache = MetadataCache(check_interval=60, version_loader=lambda: checks.append(1) or 1)
+        cache.put("a", 1)
+        for _ in range(100):
+            assert cache.get("a") == 1
+        assert len(checks) == 1
+
+    def test_version_loader_failure_keeps_entries(self):
+        """Test a failing version check does not wipe the cache"""
+        def broken():
+            raise RuntimeError("database unavailable")
+
+        cache = MetadataCache(check_interval=0, version_loader=broken)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        assert cache.stats()["version_check_errors"] >= 1
+
+    def test_get_or_load(self):
+        """Test get_or_load only calls the loader on a miss"""
+        cache = MetadataCache()
+        calls = []
+        loader = lambda: calls.append(1) or "value"
+
+        assert cache.get_or_load("k", loader) == "value"
+        assert cache.get_or_load("k", loader) == "value"
+        assert len(calls) == 1
+
+class TestQueryFingerprint:
+    def test_whitespace_and_case_insensitive(self):
+        """Test queries differing only in whitespace or keyword case share a fingerprint"""
+        a = query_fingerprint("SELECT  name\nFROM SalesLT.Customer")
+        b = query_fingerprint("select name from saleslt.customer;")
+        assert a == b
+
+    def test_literals_keep_case(self):
+        """Test string literals are not normalized"""
+        a = query_fingerprint("SELECT * FROM t WHERE name = 'Smith'")
+        b = query_fingerprint("SELECT * FROM t WHERE name = 'SMITH'")
+        assert a != b
+        assert query_fingerprint("SELECT 'a  b'") == "SELECT 'a  b'"
+
+    def test_comments_ignored(self):
+        """Test comments do not change the fingerprint"""
+        a = query_fingerprint("SELECT 1 -- first\n")
+        b = query_fingerprint("/* note */ SELECT 1")
+        assert a == b
+
+class TestQueryResultCache:
+    def test_hit_miss_and_stats(self):
+        """Test cached results and hit/miss statistics"""
+        cache = QueryResultCache()
+        assert cache.get("q") is None
+        cache.put("q", "a,b\n1,2")
+
+        assert cache.get("q") == "a,b\n1,2"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bytes"] == len("a,b\n1,2")
+
+    def test_ttl_expiry(self):
+        """Test results expire after their TTL"""
+        cache = QueryResultCache(ttl=0.01)
+        cache.put("q", "result")
+        time.sleep(0.02)
+        assert cache.get("q") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_memory_budget_evicts_lru(self):
+        """Test the least recently used results are evicted to respect max_bytes"""
+        cache = QueryResultCache(max_bytes=10)
+        cache.put("a", "xxxx")
+        cache.put("b", "yyyy")
+        cache.get("a")
+        cache.put("c", "zzzz")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "xxxx"
+        assert cache.stats()["bytes"] <= 10
+
+    def test_oversized_result_not_cached(self):
+        """Test a result larger than the whole budget is not stored"""
+        cache = QueryResultCache(max_bytes=5)
+        cache.put("big", "x" * 10)
+        assert cache.get("big") is None
+        assert cache.stats()["too_large"] == 1
+
+    def test_disabled_with_zero_budget(self):
+        """Test a zero budget disables the cache"""
+        assert QueryResultCache(max_bytes=0).enabled == False
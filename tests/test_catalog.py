@@ -0,0 +1,123 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.catalog import (
+    CatalogSnapshot, OBJECTS_QUERY, COLUMNS_QUERY, INDEXES_QUERY, FOREIGN_KEYS_QUERY
+)
+
+CATALOG_ROWS = {
+    OBJECTS_QUERY: [
+        (1, "SalesLT", "Customer", "U "),
+        (2, "SalesLT", "SalesOrderHeader", "U "),
+        (3, "dbo", "Customer", "U "),
+        (4, "SalesLT", "vProductModel", "V "),
+    ],
+    COLUMNS_QUERY: [
+        (1, 1, "CustomerID", "int", 0, None, 4, 10, 0),
+        (1, 2, "FirstName", "nvarchar", 0, None, 100, 0, 0),
+        (1, 3, "Notes", "nvarchar", 1, None, -1, 0, 0),
+        (2, 1, "SalesOrderID", "int", 0, None, 4, 10, 0),
+        (2, 2, "CustomerID", "int", 0, None, 4, 10, 0),
+        (2, 3, "SubTotal", "money", 0, "((0.00))", 8, 19, 4),
+        (3, 1, "Id", "int", 0, None, 4, 10, 0),
+        (4, 1, "Name", "nvarchar", 0, None, 100, 0, 0),
+    ],
+    INDEXES_QUERY: [
+        (1, 1, "PK_Customer", "CLUSTERED", 1, 1, 0, None, "CustomerID", 0, 0),
+        (2, 1, "PK_SalesOrderHeader", "CLUSTERED", 1, 1, 0, None, "SalesOrderID", 0, 0),
+        (2, 2, "IX_Customer", "NONCLUSTERED", 0, 0, 0, None, "CustomerID", 0, 1),
+        (2, 2, "IX_Customer", "NONCLUSTERED", 0, 0, 0, None, "SubTotal", 1, 0),
+    ],
+    FOREIGN_KEYS_QUERY: [
+        (2, "FK_SalesOrderHeader_Customer", "CustomerID", 1, "CustomerID"),
+    ],
+}
+
+class FakeCursor:
+    def __init__(self, executed):
+        self.executed = executed
+        self.rows = []
+
+    def execute(self, query, *params):
+        self.executed.append(query)
+        self.rows = CATALOG_ROWS[query]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+@pytest.fixture
+def snapshot():
+    return CatalogSnapshot.load(FakeConnection())
+
+class TestCatalogSnapshot:
+    def test_load_uses_fixed_number_of_queries(self):
+        """Test the whole catalog loads in four set-based queries"""
+        conn = FakeConnection()
+        CatalogSnapshot.load(conn)
+        assert len(conn.executed) == 4
+
+    def test_tables_sorted_without_views(self, snapshot):
+        """Test tables() lists base tables ordered by schema and name"""
+        names = [t.full_name for t in snapshot.tables()]
+        assert names == ["dbo.Customer", "SalesLT.Customer", "SalesLT.SalesOrderHeader"]
+        assert "SalesLT.vProductModel" in [t.full_name for t in snapshot.tables(include_views=True)]
+
+    def test_find_qualified_case_insensitive(self, snapshot):
+        """Test schema-qualified lookups ignore case"""
+        tables = snapshot.find("saleslt.customer")
+        assert [t.full_name for t in tables] == ["SalesLT.Customer"]
+        assert snapshot.find("SalesLT.Missing") == []
+
+    def test_find_unqualified_matches_all_schemas(self, snapshot):
+        """Test bare table names match the table in every schema"""
+        tables = snapshot.find("Customer")
+        assert [t.full_name for t in tables] == ["dbo.Customer", "SalesLT.Customer"]
+
+    def test_columns_match_information_schema(self, snapshot):
+        """Test column lengths and precision follow INFORMATION_SCHEMA conventions"""
+        customer = snapshot.find("SalesLT.Customer")[0]
+        customer_id, first_name, notes = customer.columns
+        assert customer_id.numeric_precision == 10
+        assert customer_id.character_maximum_length is None
+        assert first_name.character_maximum_length == 50  # nvarchar stores 2 bytes per char
+        assert first_name.numeric_precision is None
+        assert notes.character_maximum_length == -1
+        assert notes.is_nullable == True
+
+    def test_indexes_and_primary_key(self, snapshot):
+        """Test indexes are grouped with key and included columns"""
+        header = snapshot.find("SalesLT.SalesOrderHeader")[0]
+        assert header.primary_key == ["SalesOrderID"]
+        index = header.indexes[1]
+        assert index.name == "IX_Customer"
+        assert index.key_columns == ["CustomerID"]
+        assert index.included_columns == ["SubTotal"]
+        assert index.descending_columns == ["CustomerID"]
+
+    def test_foreign_keys_resolve_referenced_table(self, snapshot):
+        """Test foreign keys point at the schema-qualified referenced table"""
+        header = snapshot.find("SalesLT.SalesOrderHeader")[0]
+        fk = header.foreign_keys[0]
+        assert fk.name == "FK_SalesOrderHeader_Customer"
+        assert fk.referenced_table == "SalesLT.Customer"
+        assert fk.referenced_column == "CustomerID"
+
+    def test_stats(self, snapshot):
+        """Test snapshot statistics"""
+        stats = snapshot.stats()
+        assert stats["tables"] == 3
+        assert stats["views"] == 1
+        assert stats["columns"] == 8
+        assert stats["foreign_keys"] == 1
@@ -5,7 +5,49 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from unittest.mock import Mock, patch, AsyncMock
-from chat_app import PocketDBAClient
+from chat_app import PocketDBAClient, HistoryManager
+
+def text_block(text):
+    block = Mock()
+    block.type = 'text'
+    block.text = text
+    return block
+
+def tool_block(name, tool_input, block_id="toolu_1"):
+    block = Mock()
+    block.type = 'tool_use'
+    block.id = block_id
+    block.name = name
+    block.input = tool_input
+    return block
+
+class FakeStream:
+    """Stands in for AsyncAnthropic.messages.stream(): streams ``texts`` then returns ``blocks``"""
+    
+    def __init__(self, texts=(), blocks=None, delay=0.0):
+        self.blocks = blocks if blocks is not None else [text_block("".join(texts))]
+        self.texts = texts
+        self.delay = delay
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def __aiter__(self):
+        await asyncio.sleep(self.delay)
+        snapshot = ""
+        for text in self.texts:
+            snapshot += text
+            yield Mock(type='text', text=text, snapshot=snapshot)
+        for index, block in enumerate(self.blocks):
+            if block.type == 'tool_use':
+                yield Mock(type='content_block_start', index=index, content_block=block)
+            yield Mock(type='content_block_stop', index=index)
+    
+    async def get_final_message(self):
+        return Mock(content=self.blocks)
 
 class TestPocketDBAClient:
     """Test the Pocket DBA chat client"""
@@ -72,6 +114,20 @@ class TestPocketDBAClient:
         result = client._format_sql_results(empty_data)
         assert "No results found" in result
     
+    def test_format_sql_results_truncation_note(self, client):
+        """Test truncation notes are shown below the table, not as rows"""
+        data = "col1\nval1\n-- Output truncated: row limit of 1 rows reached after 1 rows."
+        result = client._format_sql_results(data)
+        assert "Results (1 rows)" in result
+        assert "| -- Output" not in result
+        assert "Output truncated" in result
+    
+    def test_format_sql_results_quoted_fields(self, client):
+        """Test quoted CSV fields with commas stay in one cell"""
+        data = 'name,price\n"Road Bike, Pro",1431.50'
+        result = client._format_sql_results(data)
+        assert "| Road Bike, Pro | 1431.50 |" in result
+    
     def test_format_table_description(self, client):
         """Test table description formatting"""
         data = "COLUMN_NAME,DATA_TYPE,IS_NULLABLE,COLUMN_DEFAULT,MAX_LENGTH\nid,int,NO,,\nname,varchar,YES,,50"
@@ -98,14 +154,8 @@ class TestPocketDBAClient:
         client.connected = True
         client.tools = [{"name": "execute_sql", "description": "Execute SQL", "input_schema": {}}]
         
-        # Mock Anthropic response
-        mock_response = Mock()
-        mock_content = Mock()
-        mock_content.type = 'text'
-        mock_content.text = 'I will help you find the tables.'
-        mock_response.content = [mock_content]
-        
-        with patch.object(client.anthropic.messages, 'create', return_value=mock_response):
+        stream = FakeStream(["I will help ", "you find the tables."])
+        with patch.object(client.anthropic.messages, 'stream', return_value=stream):
             with patch.object(client, 'mcp_client') as mock_mcp:
                 mock_mcp.call_tool = AsyncMock()
                 mock_result = Mock()
@@ -116,4 +166,310 @@ class TestPocketDBAClient:
                 
                 assert len(messages) > 0
                 assert messages[0]["role"] == "assistant"
-                assert "help you find" in messages[0]["content"]
\ No newline at end of file
+                assert "help you find" in messages[0]["content"]
+    
+    @pytest.mark.asyncio
+    async def test_streams_partial_text(self, client):
+        """Test the question shows at once and the answer grows as text arrives"""
+        client.connected = True
+        stream = FakeStream(["There are ", "12 tables."])
+        with patch.object(client.anthropic.messages, 'stream', return_value=stream):
+            updates = [history async for history, _ in client.process_message("How many tables?", [])]
+        
+        assert updates[0] == [{"role": "user", "content": "How many tables?"}]
+        assert [update[-1]["content"] for update in updates[1:]] == ["There are ", "There are 12 tables."]
+    
+    @pytest.mark.asyncio
+    async def test_tool_progress_replaced_by_result(self, client):
+        """Test a tool call shows progress messages until its result is in"""
+        client.connected = True
+        blocks = [text_block("Let me check."), tool_block("execute_sql", {"query": "SELECT 1 AS x"})]
+        stream = FakeStream(["Let me check."], blocks)
+        client.mcp_client = AsyncMock()
+        mock_result = Mock()
+        mock_result.text = "x\n1"
+        client.mcp_client.call_tool.return_value = [mock_result]
+        
+        with patch.object(client.anthropic.messages, 'stream', side_effect=[stream, FakeStream(["It is 1."])]):
+            updates = [list(m["content"] for m in messages) async for messages in client._stream_query("Run it", [])]
+        
+        assert ["Let me check.", "⏳ Preparing Execute Sql..."] in updates
+        assert ["Let me check.", "⏳ Running Execute Sql..."] in updates
+        assert updates[-1][0] == "Let me check."
+        assert updates[-1][1].startswith("📊 **Execute Sql**")
+        assert updates[-1][2] == "It is 1."
+        client.mcp_client.call_tool.assert_called_once_with("execute_sql", {"query": "SELECT 1 AS x"})
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_messages_overlap(self, client):
+        """Test two chats wait on Claude at the same time instead of one after the other"""
+        client.connected = True
+        
+        with patch.object(client.anthropic.messages, 'stream', side_effect=lambda **kwargs: FakeStream(["Done."], delay=0.2)):
+            start = asyncio.get_running_loop().time()
+            results = await asyncio.gather(
+                client._process_query("first", []),
+                client._process_query("second", []),
+            )
+            elapsed = asyncio.get_running_loop().time() - start
+        
+        assert elapsed < 0.35
+        assert [messages[-1]["content"] for messages in results] == ["Done.", "Done."]
+    
+    @pytest.mark.asyncio
+    async def test_connect_once(self, client):
+        """Test a second connect reuses the open MCP client"""
+        with patch('chat_app.Client') as MockClient:
+            mock_client_instance = AsyncMock()
+            MockClient.return_value = mock_client_instance
+            mock_tool = Mock()
+            mock_tool.name = "execute_sql"
+            mock_client_instance.list_tools.return_value = [mock_tool]
+            
+            first = await client.connect_to_server()
+            second = await client.connect_to_server()
+            
+            assert first == second
+            assert MockClient.call_count == 1
+    
+    def test_result_text(self, client):
+        """Test tool results are read from CallToolResult content as well as plain lists"""
+        block = Mock()
+        block.text = "TABLE_NAME\nCustomer"
+        assert client._result_text(Mock(content=[block])) == "TABLE_NAME\nCustomer"
+        assert client._result_text([block]) == "TABLE_NAME\nCustomer"
+        assert client._result_text(Mock(content=[])) == "No data returned"
+    
+    @pytest.mark.asyncio
+    async def test_tool_results_sent_back(self, client):
+        """Test tool results go back to Claude as tool_result blocks until it answers"""
+        client.connected = True
+        blocks = [
+            tool_block("describe_table", {"table_name": "SalesLT.Customer"}, "toolu_a"),
+            tool_block("describe_table", {"table_name": "SalesLT.Product"}, "toolu_b"),
+        ]
+        client.mcp_client = AsyncMock()
+        client.mcp_client.call_tool.side_effect = lambda name, args: [text_block(f"COLUMN_NAME\n{args['table_name']}ID")]
+        stream = Mock(side_effect=[FakeStream([], blocks), FakeStream(["Both tables have IDs."])])
+        
+        with patch.object(client.anthropic.messages, 'stream', stream):
+            messages = await client._process_query("Describe customers and products", [])
+        
+        assert messages[-1]["content"] == "Both tables have IDs."
+        sent = stream.call_args_list[1].kwargs["messages"]
+        assert [block["id"] for block in sent[-2]["content"]] == ["toolu_a", "toolu_b"]
+        assert sent[-1]["role"] == "user"
+        assert sent[-1]["content"][1] == {
+            "type": "tool_result", "tool_use_id": "toolu_b",
+            "content": "COLUMN_NAME\nSalesLT.ProductID", "is_error": False,
+        }
+    
+    @pytest.mark.asyncio
+    async def test_tools_run_concurrently(self, client):
+        """Test the tool calls of one turn run at the same time"""
+        client.connected = True
+        blocks = [tool_block("describe_table", {"table_name": f"T{i}"}, f"toolu_{i}") for i in range(3)]
+        
+        async def slow_call(name, args):
+            await asyncio.sleep(0.2)
+            return [text_block("COLUMN_NAME\nID")]
+        
+        client.mcp_client = AsyncMock()
+        client.mcp_client.call_tool.side_effect = slow_call
+        with patch.object(client.anthropic.messages, 'stream', side_effect=[FakeStream([], blocks), FakeStream(["Done."])]):
+            start = asyncio.get_running_loop().time()
+            await client._process_query("Describe three tables", [])
+            elapsed = asyncio.get_running_loop().time() - start
+        
+        assert elapsed < 0.5
+    
+    @pytest.mark.asyncio
+    async def test_failed_tool_reported_as_error(self, client):
+        """Test a tool that raises is shown as an error and sent back with is_error"""
+        client.connected = True
+        client.mcp_client = AsyncMock()
+        client.mcp_client.call_tool.side_effect = RuntimeError("boom")
+        stream = Mock(side_effect=[FakeStream([], [tool_block("execute_sql", {"query": "SELECT 1"})]), FakeStream(["Sorry."])])
+        
+        with patch.object(client.anthropic.messages, 'stream', stream):
+            messages = await client._process_query("Run it", [])
+        
+        assert messages[0]["content"] == "❌ Error executing execute_sql: boom"
+        assert stream.call_args_list[1].kwargs["messages"][-1]["content"][0]["is_error"] is True
+    
+    @pytest.mark.asyncio
+    async def test_tool_round_budget(self, client):
+        """Test Claude must answer without tools once the round budget is spent"""
+        client.connected = True
+        client.mcp_client = AsyncMock()
+        client.mcp_client.call_tool.return_value = [text_block("x\n1")]
+        stream = Mock(side_effect=[
+            FakeStream([], [tool_block("execute_sql", {"query": "SELECT 1"})]),
+            FakeStream([], [tool_block("execute_sql", {"query": "SELECT 2"})]),
+            FakeStream(["Here is what I found."]),
+        ])
+        
+        with patch('chat_app.MAX_TOOL_ROUNDS', 2), patch.object(client.anthropic.messages, 'stream', stream):
+            messages = await client._process_query("Keep digging", [])
+        
+        assert stream.call_count == 3
+        assert "tool_choice" not in stream.call_args_list[1].kwargs
+        assert stream.call_args_list[2].kwargs["tool_choice"] == {"type": "none"}
+        assert "Stopped looking after 2 rounds" in messages[-2]["content"]
+        assert messages[-1]["content"] == "Here is what I found."
+    
+    @pytest.mark.asyncio
+    async def test_schema_digest(self, client):
+        """Test the schema digest lists columns with foreign keys inline"""
+        client.mcp_client = AsyncMock()
+        client.mcp_client.read_resource.return_value = [text_block("SalesLT.Customer\nSalesLT.SalesOrderHeader")]
+        results = {
+            "describe_tables": "TABLE_NAME,COLUMN_NAME,DATA_TYPE\nSalesLT.Customer,CustomerID,int\n"
+                               "SalesLT.SalesOrderHeader,SalesOrderID,int\nSalesLT.SalesOrderHeader,CustomerID,int",
+            "get_relationships_bulk": "TABLE_NAME,CONSTRAINT_NAME,COLUMN_NAME,REFERENCED_TABLE,REFERENCED_COLUMN\n"
+                                      "SalesLT.SalesOrderHeader,FK_1,CustomerID,SalesLT.Customer,CustomerID",
+        }
+        client.mcp_client.call_tool.side_effect = lambda name, args: [text_block(results[name])]
+        
+        digest = await client._build_schema_digest()
+        
+        assert digest.splitlines()[1:] == [
+            "SalesLT.Customer: CustomerID int",
+            "SalesLT.SalesOrderHeader: SalesOrderID int, CustomerID int -> SalesLT.Customer.CustomerID",
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_cacheable_prefix_and_usage(self, client):
+        """Test tools, system prompt and schema digest are marked for caching and cache tokens are counted"""
+        client.connected = True
+        client.tools = [{"name": "execute_sql", "description": "", "input_schema": {}},
+                        {"name": "describe_table", "description": "", "input_schema": {}}]
+        client.schema_digest = "Database schema:\nSalesLT.Customer: CustomerID int"
+        
+        def cached_stream(**kwargs):
+            stream = FakeStream(["Hi."])
+            final = stream.get_final_message
+            async def with_usage():
+                message = await final()
+                message.usage = Mock(input_tokens=20, output_tokens=5,
+                                     cache_creation_input_tokens=0, cache_read_input_tokens=1500)
+                return message
+            stream.get_final_message = with_usage
+            return stream
+        
+        stream = Mock(side_effect=cached_stream)
+        with patch.object(client.anthropic.messages, 'stream', stream):
+            await client._process_query("Hello", [])
+            await client._process_query("Hello again", [])
+        
+        request = stream.call_args.kwargs
+        assert [tool.get("cache_control") for tool in request["tools"]] == [None, {"type": "ephemeral"}]
+        assert [block.get("cache_control") for block in request["system"]] == [None, {"type": "ephemeral"}]
+        assert request["system"][1]["text"] == client.schema_digest
+        assert "cache_control" not in client.tools[-1]
+        assert client.usage["requests"] == 2
+        assert client.usage["cache_read_input_tokens"] == 3000
+        assert "99% cached" in client.usage_summary()
+
+
+class TestHistoryManager:
+    """Tests for fitting the chat history into a token budget"""
+    
+    @staticmethod
+    def chat(turns):
+        history = []
+        for number in range(turns):
+            history.append({"role": "user", "content": f"Question {number}"})
+            history.append({"role": "assistant", "content": "📊 **Execute Sql**\n\n**Results (2 rows):**\n\n"
+                                                            "| id | name |\n| --- | --- |\n| 1 | a |\n| 2 | b |"})
+            history.append({"role": "assistant", "content": f"Answer {number}"})
+        return history
+    
+    def test_recent_turns_verbatim_older_tables_compacted(self):
+        """Test recent turns are kept as is and older result tables become one line"""
+        messages, summary = HistoryManager(budget=8000, recent_turns=1).build(self.chat(3))
+        
+        assert summary is None
+        assert [m["role"] for m in messages] == ["user", "assistant"] * 3
+        assert "| 1 | a |" in messages[-1]["content"]
+        assert "Answer 2" in messages[-1]["content"]
+        assert "| 1 | a |" not in messages[1]["content"]
+        assert "[table of 2 rows: id, name]" in messages[1]["content"]
+    
+    def test_old_turns_folded_into_summary(self):
+        """Test turns past the budget are summarized and the result stays within budget"""
+        manager = HistoryManager(budget=400, recent_turns=1)
+        messages, summary = manager.build(self.chat(20))
+        
+        used = sum(manager.estimate_tokens(m["content"]) for m in messages) + manager.estimate_tokens(summary)
+        assert used <= 400
+        first_kept = int(messages[0]["content"].split()[-1])
+        assert 0 < first_kept < 19
+        assert summary.splitlines()[0] == HistoryManager.SUMMARY_HEADER
+        assert summary.splitlines()[-1].startswith(f"- User: Question {first_kept - 1} | Assistant:")
+        assert "Question 0" not in summary
+    
+    def test_tool_rounds_fit_the_request_budget(self):
+        """Test earlier tool rounds shrink to a note and the latest round's results are cut to fit"""
+        manager = HistoryManager(budget=1000, recent_turns=1)
+        
+        def tool_round(number):
+            return [
+                {"role": "assistant", "content": [{"type": "tool_use", "id": f"toolu_{number}",
+                                                   "name": "execute_sql", "input": {"query": "SELECT 1"}}]},
+                {"role": "user", "content": [{"type": "tool_result", "tool_use_id": f"toolu_{number}",
+                                              "content": "x" * 3000, "is_error": False}]},
+            ]
+        turn = [{"role": "user", "content": "Question"}] + tool_round(1) + tool_round(2)
+        
+        messages, summary = manager.fit(self.chat(5), turn, reserved=200)
+        
+        assert sum(manager.estimate(m["content"]) for m in messages) <= 800
+        assert messages[-5]["content"] == "Question"
+        assert messages[-3]["content"][0]["content"].startswith("[Result of 3000 characters left out")
+        assert messages[-1]["content"][0]["content"].endswith("narrow the query for the rest.")
+        assert turn[-1]["content"][0]["content"] == "x" * 3000
+    
+    @pytest.mark.asyncio
+    async def test_summary_sent_after_cached_prefix(self):
+        """Test the request carries compacted history and the summary after the cache breakpoint"""
+        with patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            client = PocketDBAClient()
+        client.connected = True
+        reserved = HistoryManager.estimate(client._system_blocks())
+        client.history = HistoryManager(budget=reserved + 400, recent_turns=1)
+        stream = Mock(return_value=FakeStream(["Done."]))
+        
+        with patch.object(client.anthropic.messages, 'stream', stream):
+            await client._process_query("Next question", self.chat(20))
+        
+        request = stream.call_args.kwargs
+        roles = [m["role"] for m in request["messages"]]
+        assert roles[0] == "user" and roles[-1] == "user"
+        assert all(a != b for a, b in zip(roles, roles[1:]))
+        assert request["system"][-1]["text"].startswith("Summary of earlier turns")
+        assert "cache_control" not in request["system"][-1]
+        used = sum(HistoryManager.estimate(block) for block in (request["tools"], request["system"][:-1]))
+        used += HistoryManager.estimate_tokens(request["system"][-1]["text"])
+        used += sum(HistoryManager.estimate(m["content"]) for m in request["messages"])
+        assert used <= reserved + 400
+    
+    @pytest.mark.asyncio
+    async def test_budget_applied_to_every_tool_round(self):
+        """Test a large tool result is cut to fit before the next request of the same turn"""
+        with patch.dict(os.environ, {'ANTHROPIC_API_KEY': 'test-key'}):
+            client = PocketDBAClient()
+        client.connected = True
+        reserved = HistoryManager.estimate(client._system_blocks())
+        client.history = HistoryManager(budget=reserved + 500)
+        client.mcp_client = AsyncMock()
+        client.mcp_client.call_tool.return_value = [text_block("x" * 10000)]
+        blocks = [tool_block("execute_sql", {"query": "SELECT * FROM SalesLT.Product"})]
+        stream = Mock(side_effect=[FakeStream([], blocks), FakeStream(["Done."])])
+        
+        with patch.object(client.anthropic.messages, 'stream', stream):
+            await client._process_query("Show all products", self.chat(3))
+        
+        sent = stream.call_args_list[1].kwargs["messages"]
+        assert sum(HistoryManager.estimate(m["content"]) for m in sent) <= 500
+        assert sent[-1]["content"][0]["content"].endswith("narrow the query for the rest.")
@@ -0,0 +1,88 @@
+import pytest
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.cursors import CursorLimitError, CursorRegistry, OpenCursor
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.discard = False
+
+    def close(self):
+        self.closed = True
+
+class FakeStream:
+    def __init__(self):
+        self.cancelled = False
+        self.cursor = self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def close(self):
+        pass
+
+def open_cursor(page_size=10):
+    entry = OpenCursor(page_size)
+    entry.conn = FakeConnection()
+    entry.stream = FakeStream()
+    return entry
+
+class TestCursorRegistry:
+    def test_register_and_checkout(self):
+        """Test a registered cursor can be checked out after check-in"""
+        registry = CursorRegistry()
+        entry = open_cursor()
+        token = registry.register(entry)
+
+        assert registry.checkout(token) is None  # still held by the caller that opened it
+        registry.checkin(token)
+        assert registry.checkout(token) is entry
+
+    def test_unknown_token(self):
+        """Test unknown tokens are rejected"""
+        assert CursorRegistry().checkout("nope") is None
+
+    def test_open_cursor_cap(self):
+        """Test the number of open cursors is capped"""
+        registry = CursorRegistry(max_open=1)
+        registry.register(open_cursor())
+
+        with pytest.raises(CursorLimitError):
+            registry.register(open_cursor())
+        assert registry.stats()["rejected"] == 1
+
+    def test_close_releases_connection(self):
+        """Test closing a cursor cancels it and returns its connection"""
+        registry = CursorRegistry()
+        entry = open_cursor()
+        token = registry.register(entry)
+        registry.close(token)
+
+        assert entry.stream.cancelled == True
+        assert entry.conn.closed == True
+        assert registry.stats()["open"] == 0
+
+    def test_idle_cursors_expire(self):
+        """Test idle cursors are closed and their slot freed"""
+        registry = CursorRegistry(max_open=1, idle_timeout=0.01)
+        entry = open_cursor()
+        token = registry.register(entry)
+        registry.checkin(token)
+        time.sleep(0.02)
+
+        assert registry.checkout(token) is None
+        assert entry.conn.closed == True
+        registry.register(open_cursor())  # slot is free again
+
+    def test_in_use_cursor_does_not_expire(self):
+        """Test a cursor being read is never expired underneath its reader"""
+        registry = CursorRegistry(idle_timeout=0)
+        entry = open_cursor()
+        registry.register(entry)
+        registry.sweep()
+
+        assert entry.conn.closed == False
@@ -0,0 +1,92 @@
+import pytest
+import asyncio
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.deadline import QueryCall, QueryTimeoutError, current_call, watch
+from src.mssql.executor import DatabaseExecutor
+
+class FakeConnection:
+    """Pooled connection stand-in whose statement blocks until cancelled"""
+    def __init__(self):
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+        return True
+
+    def execute(self, seconds=5):
+        if not self.cancelled.wait(seconds):
+            return "finished"
+        raise RuntimeError("Operation canceled")
+
+class TestQueryCall:
+    def test_no_deadline(self):
+        """Test a zero or missing timeout means no deadline"""
+        assert QueryCall(0).remaining() is None
+        QueryCall(None).check()
+
+    def test_expired_deadline_raises(self):
+        """Test check() fails once the deadline has passed"""
+        call = QueryCall(0.01)
+        time.sleep(0.02)
+        assert call.remaining() == 0
+        with pytest.raises(QueryTimeoutError):
+            call.check()
+
+    def test_track_after_cancel_cancels_immediately(self):
+        """Test a connection checked out after cancellation is cancelled right away"""
+        call = QueryCall(10)
+        call.cancel()
+        conn = FakeConnection()
+        call.track(conn)
+        assert conn.cancelled.is_set()
+
+class TestWatch:
+    @pytest.mark.asyncio
+    async def test_call_visible_in_worker_thread(self):
+        """Test the executor's worker thread sees the current call"""
+        executor = DatabaseExecutor(max_workers=1)
+        call = QueryCall(10)
+        assert await watch(call, executor.run, current_call) is call
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout_cancels_running_statement(self):
+        """Test the watchdog cancels the statement when the deadline passes"""
+        executor = DatabaseExecutor(max_workers=1)
+        conn = FakeConnection()
+
+        def query():
+            current_call().track(conn)
+            return conn.execute()
+
+        start = time.monotonic()
+        with pytest.raises(QueryTimeoutError, match="0.1s timeout"):
+            await watch(QueryCall(0.1), executor.run, query)
+        assert conn.cancelled.wait(1)
+        assert time.monotonic() - start < 1
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_client_cancellation_cancels_statement(self):
+        """Test cancelling the awaiting task cancels the statement"""
+        executor = DatabaseExecutor(max_workers=1)
+        conn = FakeConnection()
+        started = threading.Event()
+
+        def query():
+            current_call().track(conn)
+            started.set()
+            return conn.execute()
+
+        task = asyncio.create_task(watch(QueryCall(None), executor.run, query))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert conn.cancelled.wait(1)
+        executor.shutdown()
@@ -0,0 +1,238 @@
+import pytest
+import asyncio
+import contextvars
+import json
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.executor import DatabaseExecutor, ExecutorBusyError, RunTiming
+
+class TestDatabaseExecutor:
+    @pytest.mark.asyncio
+    async def test_runs_blocking_function_off_loop(self):
+        """Test blocking calls run on a worker thread and return their result"""
+        executor = DatabaseExecutor(max_workers=2)
+        loop_thread = threading.get_ident()
+
+        result = await executor.run(lambda x: (x * 2, threading.get_ident()), 21)
+
+        assert result[0] == 42
+        assert result[1] != loop_thread
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_slow_call_does_not_block_fast_call(self):
+        """Test a slow query does not delay a cheap one"""
+        executor = DatabaseExecutor(max_workers=2)
+        slow = asyncio.create_task(executor.run(time.sleep, 0.3))
+        await asyncio.sleep(0)
+
+        start = time.monotonic()
+        assert await executor.run(lambda: "fast") == "fast"
+        assert time.monotonic() - start < 0.2
+        await slow
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_queue_full(self):
+        """Test backpressure: calls beyond workers + queue are rejected"""
+        executor = DatabaseExecutor(max_workers=1, max_queue=1)
+        release = threading.Event()
+        running = asyncio.create_task(executor.run(release.wait))
+        queued = asyncio.create_task(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ExecutorBusyError):
+            await executor.run(lambda: None)
+        assert executor.stats()["rejected"] == 1
+
+        release.set()
+        await asyncio.gather(running, queued)
+        assert executor.stats()["pending"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancel_removes_queued_call(self):
+        """Test cancelling a queued call stops it from ever running"""
+        executor = DatabaseExecutor(max_workers=1, max_queue=5)
+        release = threading.Event()
+        calls = []
+        running = asyncio.create_task(executor.run(release.wait))
+        queued = asyncio.create_task(executor.run(calls.append, "ran"))
+        await asyncio.sleep(0.05)
+
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await running
+
+        assert calls == []
+        assert executor.stats()["cancelled"] == 1
+        assert executor.stats()["pending"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_context_variables_reach_worker(self):
+        """Test context variables set by the caller are visible in the worker"""
+        var = contextvars.ContextVar("var", default=None)
+        executor = DatabaseExecutor(max_workers=1)
+        var.set("request-1")
+
+        assert await executor.run(var.get) == "request-1"
+        executor.shutdown()
+
+class TestSessionScheduling:
+    @pytest.mark.asyncio
+    async def test_per_session_cap(self):
+        """Test one session cannot take more than its share of workers"""
+        executor = DatabaseExecutor(max_workers=3, max_per_session=1)
+        release = threading.Event()
+        first = asyncio.create_task(executor.run(release.wait, session="a"))
+        second = asyncio.create_task(executor.run(release.wait, session="a"))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["running"] == 1
+        assert executor.stats()["queued"] == 1
+
+        assert await executor.run(lambda: "b ran", session="b") == "b ran"
+        release.set()
+        await asyncio.gather(first, second)
+        assert executor.stats()["pending"] == 0
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_round_robin_between_sessions(self):
+        """Test a session with many queued calls does not starve one that queued later"""
+        executor = DatabaseExecutor(max_workers=1)
+        release = threading.Event()
+        order = []
+        blocker = asyncio.create_task(executor.run(release.wait, session="noisy"))
+        await asyncio.sleep(0.05)
+        calls = [asyncio.create_task(executor.run(order.append, f"noisy-{i}", session="noisy")) for i in range(3)]
+        await asyncio.sleep(0)
+        calls.append(asyncio.create_task(executor.run(order.append, "quiet", session="quiet")))
+        await asyncio.sleep(0.05)
+
+        release.set()
+        await asyncio.gather(blocker, *calls)
+        assert order == ["noisy-0", "quiet", "noisy-1", "noisy-2"]
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_sheds_load_per_session(self):
+        """Test a session over its queue limit is rejected while other sessions can still queue"""
+        executor = DatabaseExecutor(max_workers=1, max_queue_per_session=1)
+        release = threading.Event()
+        running = asyncio.create_task(executor.run(release.wait, session="a"))
+        queued = asyncio.create_task(executor.run(release.wait, session="a"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(ExecutorBusyError, match="this session"):
+            await executor.run(lambda: None, session="a")
+        other = asyncio.create_task(executor.run(lambda: "b", session="b"))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["rejected"] == 1
+
+        release.set()
+        assert (await asyncio.gather(running, queued, other))[2] == "b"
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_none_session_is_scheduled(self):
+        """Test calls made outside any session (session None) are queued and granted like others"""
+        executor = DatabaseExecutor(max_workers=1, max_per_session=1)
+        release = threading.Event()
+        running = asyncio.create_task(executor.run(release.wait))
+        queued = asyncio.create_task(executor.run(lambda: "queued ran"))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queued"] == 1
+
+        release.set()
+        assert (await asyncio.wait_for(asyncio.gather(running, queued), 2))[1] == "queued ran"
+        executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timing(self):
+        """Test RunTiming reports no wait for an immediate call and the wait of a queued one"""
+        executor = DatabaseExecutor(max_workers=1)
+        immediate, waited = RunTiming(), RunTiming()
+        blocker = asyncio.create_task(executor.run(time.sleep, 0.1, timing=immediate))
+        await asyncio.sleep(0)
+        await executor.run(lambda: None, timing=waited)
+        await blocker
+
+        assert immediate.queued == 0.0
+        assert immediate.ran >= 0.1
+        assert waited.queued >= 0.05
+        assert executor.stats()["waited"] == 1
+        executor.shutdown()
+
+class TestServerSessions:
+    def test_session_is_stable_per_client(self):
+        """Test concurrent calls from one client share a session and two clients get different ones"""
+        from fastmcp import Client, FastMCP
+        from src.mssql.server import current_session
+
+        probe_server = FastMCP("probe")
+        seen = []
+
+        @probe_server.tool()
+        async def probe() -> str:
+            seen.append(current_session())
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        async def run():
+            async with Client(probe_server) as first, Client(probe_server) as second:
+                await asyncio.gather(*[first.call_tool("probe", {}) for _ in range(3)])
+                await second.call_tool("probe", {})
+
+        asyncio.run(run())
+        assert seen[0] is not None
+        assert seen[0] == seen[1] == seen[2]
+        assert seen[3] != seen[0]
+        assert current_session() is None
+
+    def test_json_result_reports_timing(self):
+        """Test execute_sql JSON output carries queue and execution seconds"""
+        from fastmcp import Client
+        from src.mssql.server import mcp
+
+        async def run():
+            async with Client(mcp) as client:
+                result = await client.call_tool("execute_sql", {
+                    "query": "SELECT TOP 2 ProductID FROM SalesLT.Product", "output_format": "json", "use_cache": False,
+                })
+                return json.loads(result.content[0].text)
+
+        doc = asyncio.run(run())
+        assert len(doc["rows"]) == 2
+        assert set(doc["timing"]) == {"queue_seconds", "execution_seconds"}
+
+    def test_queued_json_continuation_stays_json(self):
+        """Test a continuation page of a JSON query stays valid JSON when the call had to queue"""
+        from unittest.mock import patch
+        from fastmcp import Client
+        from src.mssql import server
+
+        async def run():
+            executor = DatabaseExecutor(max_workers=1)
+            with patch.object(server, "db_executor", executor):
+                async with Client(server.mcp) as client:
+                    first = await client.call_tool("execute_sql", {
+                        "query": "SELECT ProductID FROM SalesLT.Product", "page_size": 2, "output_format": "json",
+                    })
+                    token = json.loads(first.content[0].text)["continuation_token"]
+                    blocker = asyncio.create_task(executor.run(time.sleep, 0.1))
+                    await asyncio.sleep(0.01)
+                    page = await client.call_tool("execute_sql", {"continuation_token": token})
+                    await blocker
+            executor.shutdown()
+            return json.loads(page.content[0].text)
+
+        doc = asyncio.run(run())
+        assert len(doc["rows"]) == 2
+        assert doc["timing"]["queue_seconds"] > 0
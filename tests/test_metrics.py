@@ -0,0 +1,137 @@
+import pytest
+import asyncio
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.metrics import Histogram, Metrics, current_tool
+
+class TestHistogram:
+    def test_buckets_and_summary(self):
+        """Test observations land in their buckets and the summary reports them"""
+        histogram = Histogram([0.01, 0.1, 1.0])
+        for value in (0.005, 0.05, 0.05, 0.5, 5.0):
+            histogram.observe(value)
+        assert histogram.counts == [1, 2, 1, 1]
+        summary = histogram.summary()
+        assert summary["count"] == 5
+        assert summary["max"] == 5.0
+        assert summary["sum"] == pytest.approx(5.605)
+        assert 0.01 <= summary["p50"] <= 0.1
+
+    def test_quantile_never_exceeds_max(self):
+        """Test quantile estimates stay within the observed range"""
+        histogram = Histogram([1.0, 10.0])
+        histogram.observe(2.0)
+        assert histogram.quantile(0.99) <= 2.0
+        assert Histogram().quantile(0.5) == 0.0
+
+class TestMetrics:
+    @pytest.mark.asyncio
+    async def test_instrument_records_calls_phases_and_errors(self):
+        """Test instrumented handlers record latency, phases, rows, bytes and error results"""
+        metrics = Metrics()
+
+        @metrics.instrument
+        async def execute_sql(query: str) -> str:
+            assert current_tool() == "execute_sql"
+            with metrics.timer("execute"):
+                pass
+            metrics.record_read(0.001, 0.002, 3)
+            return "Error: nope" if query == "bad" else "a\n1\n2\n3"
+
+        assert await execute_sql("good") == "a\n1\n2\n3"
+        assert await execute_sql("bad") == "Error: nope"
+        assert current_tool() == ""
+
+        tool = metrics.snapshot()["tools"]["execute_sql"]
+        assert tool["calls"] == 2
+        assert tool["errors"] == 1
+        assert tool["rows"] == 6
+        assert tool["bytes"] == len("a\n1\n2\n3") + len("Error: nope")
+        assert tool["latency"]["count"] == 2
+        assert set(tool["phases"]) == {"execute", "fetch", "serialize"}
+
+    @pytest.mark.asyncio
+    async def test_exception_counts_as_error(self):
+        """Test a handler that raises is recorded as an error and re-raises"""
+        metrics = Metrics()
+
+        @metrics.instrument
+        async def broken() -> str:
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await broken()
+        assert metrics.snapshot()["tools"]["broken"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_tool_name_reaches_worker_thread(self):
+        """Test phases recorded on an executor thread are attributed to the calling tool"""
+        metrics = Metrics()
+
+        def blocking():
+            metrics.phase("execute", 0.01)
+
+        @metrics.instrument
+        async def describe_table() -> str:
+            from src.mssql.executor import DatabaseExecutor
+            executor = DatabaseExecutor(max_workers=1)
+            await executor.run(blocking)
+            executor.shutdown()
+            return "ok"
+
+        await describe_table()
+        assert "execute" in metrics.snapshot()["tools"]["describe_table"]["phases"]
+
+    def test_prometheus_text(self):
+        """Test the Prometheus exposition has histogram, counter and collector gauge lines"""
+        metrics = Metrics(buckets=[0.1, 1.0])
+        metrics.observe("tool_seconds", 0.5, tool="execute_sql")
+        metrics.inc("calls", tool="execute_sql", status="ok")
+        metrics.register("pool", lambda: {"in_use": 2, "name": "ignored"})
+        text = metrics.prometheus()
+        assert "# TYPE mssql_mcp_tool_seconds histogram" in text
+        assert 'mssql_mcp_tool_seconds_bucket{tool="execute_sql",le="0.1"} 0' in text
+        assert 'mssql_mcp_tool_seconds_bucket{tool="execute_sql",le="+Inf"} 1' in text
+        assert 'mssql_mcp_tool_seconds_count{tool="execute_sql"} 1' in text
+        assert 'mssql_mcp_calls_total{status="ok",tool="execute_sql"} 1' in text
+        assert "mssql_mcp_pool_in_use 2" in text
+        assert "ignored" not in text
+
+    def test_large_counters_keep_every_digit(self):
+        """Test counters above a million are exported exactly, not rounded to 6 digits"""
+        metrics = Metrics()
+        metrics.inc("bytes", 12345679, tool="execute_sql")
+        metrics.inc("bytes", 1, tool="execute_sql")
+        metrics.inc("plan_seconds", 0.25)
+        text = metrics.prometheus()
+        assert 'mssql_mcp_bytes_total{tool="execute_sql"} 12345680' in text
+        assert "mssql_mcp_plan_seconds_total 0.25" in text
+
+    def test_failing_collector_does_not_break_snapshot(self):
+        """Test a collector that raises is reported instead of failing the snapshot"""
+        metrics = Metrics()
+        metrics.register("pool", lambda: 1 / 0)
+        assert "error" in metrics.snapshot()["pool"]
+        assert "mssql_mcp_pool" not in metrics.prometheus()
+
+class TestMetricsResource:
+    def test_metrics_resource_after_query(self):
+        """Test mssql://metrics reports execute_sql phases and cache stats"""
+        from fastmcp import Client
+        from src.mssql.server import mcp
+
+        async def run():
+            async with Client(mcp) as client:
+                await client.call_tool("execute_sql", {"query": "SELECT TOP 5 * FROM SalesLT.Product", "use_cache": False})
+                result = await client.read_resource("mssql://metrics")
+                return json.loads(result[0].text)
+
+        snapshot = asyncio.run(run())
+        tool = snapshot["tools"]["execute_sql"]
+        assert tool["rows"] >= 5
+        assert {"acquire", "execute", "fetch", "serialize"} <= set(tool["phases"])
+        assert "hit_rate" in snapshot["result_cache"]
+        assert "in_use" in snapshot["pool"]
@@ -128,13 +128,16 @@ class TestPhase4Complete:
             assert "TEST MODE" in messages[0]["content"]
             assert "production" in messages[0]["content"]
     
-    def test_process_message_requires_connection(self):
+    @pytest.mark.asyncio
+    async def test_process_message_requires_connection(self):
         """Test process_message returns error when not connected"""
         with patch.dict(os.environ, {'TEST_MODE': 'true'}, clear=True):
             client = PocketDBAClient()
             client.connected = False
             
-            result, textbox = client.process_message("test", [])
+            updates = [update async for update in client.process_message("test", [])]
+            assert len(updates) == 1
+            result, textbox = updates[0]
             
             assert len(result) == 2
             assert result[1]["role"] == "assistant"
@@ -0,0 +1,163 @@
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.backend import create_backend
+from src.mssql.plans import PlanEstimate, estimate_plan, parse_showplan
+
+CROSS_JOIN = "SELECT c.CustomerID FROM SalesLT.Customer c CROSS JOIN SalesLT.Product p CROSS JOIN SalesLT.ProductCategory k"
+
+SHOWPLAN = """<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564">
+<BatchSequence><Batch><Statements>
+<StmtSimple StatementText="SELECT ..." StatementType="SELECT" StatementSubTreeCost="41.5" StatementEstRows="250000">
+<QueryPlan>
+<RelOp NodeId="0" PhysicalOp="Nested Loops" LogicalOp="Inner Join" EstimateRows="250000" EstimatedTotalSubtreeCost="41.5">
+<Warnings NoJoinPredicate="true" />
+<NestedLoops>
+<RelOp NodeId="1" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan" EstimateRows="847" EstimatedTotalSubtreeCost="0.5">
+<IndexScan><Object Database="[AdventureWorksLT]" Schema="[SalesLT]" Table="[Customer]" Index="[PK_Customer]" /></IndexScan>
+</RelOp>
+<RelOp NodeId="2" PhysicalOp="Table Spool" LogicalOp="Lazy Spool" EstimateRows="295" EstimatedTotalSubtreeCost="38">
+<Spool><RelOp NodeId="3" PhysicalOp="Index Scan" LogicalOp="Index Scan" EstimateRows="295" EstimatedTotalSubtreeCost="0.25">
+<IndexScan><Object Schema="[SalesLT]" Table="[Product]" /></IndexScan>
+</RelOp></Spool>
+</RelOp>
+</NestedLoops>
+</RelOp>
+</QueryPlan>
+</StmtSimple>
+</Statements></Batch></BatchSequence>
+</ShowPlanXML>"""
+
+@pytest.fixture(scope="module")
+def backend():
+    backend = create_backend("sqlite")
+    yield backend
+    backend.close()
+
+class TestParseShowplan:
+    def test_totals_operators_and_warnings(self):
+        """Test statement cost and rows, per-operator own cost and warnings are extracted"""
+        estimate = parse_showplan([SHOWPLAN])
+        assert estimate.cost == 41.5
+        assert estimate.rows == 250000
+        assert estimate.warnings == ["NoJoinPredicate"]
+        costs = {op.name: op.cost for op in estimate.operators}
+        assert costs["Table Spool (Lazy Spool)"] == pytest.approx(37.75)
+        assert costs["Nested Loops (Inner Join)"] == pytest.approx(3.0)
+        assert costs["Clustered Index Scan [SalesLT].[Customer]"] == pytest.approx(0.5)
+
+    def test_summary_lists_costliest_operators(self):
+        """Test the summary names the most expensive operators first"""
+        summary = parse_showplan([SHOWPLAN]).summary(top=2)
+        lines = summary.splitlines()
+        assert lines[0] == "Estimated plan: cost 41.5, 250,000 rows"
+        assert lines[1].startswith("  Table Spool (Lazy Spool): cost 37.75 (91%)")
+        assert "Nested Loops" in lines[2]
+        assert lines[3] == "  Warnings: NoJoinPredicate"
+
+    def test_exceeds(self):
+        """Test limits of 0 are disabled and the first limit exceeded is described"""
+        estimate = PlanEstimate(cost=120.0, rows=5000)
+        assert estimate.exceeds(0, 0) is None
+        assert estimate.exceeds(100, 0) == "estimated cost 120 exceeds the limit of 100"
+        assert estimate.exceeds(200, 1000) == "estimated 5,000 rows exceed the limit of 1,000"
+
+class TestSqliteShowplan:
+    def test_estimate_without_running(self, backend):
+        """Test SHOWPLAN_XML on the stand-in returns an estimate and switches back off"""
+        conn = backend.connect()
+        estimate = estimate_plan(conn, CROSS_JOIN)
+        assert estimate.rows == 847 * 295 * 41
+        assert estimate.cost > 100
+        assert any("ProductCategory" in op.name for op in estimate.operators)
+
+        cursor = conn.cursor()
+        cursor.execute("SELECT TOP 1 CustomerID FROM SalesLT.Customer ORDER BY CustomerID")
+        assert cursor.fetchall() == [(1,)]
+
+    def test_row_goal_makes_top_cheap(self, backend):
+        """Test TOP without ORDER BY is estimated cheap, but not with a sort"""
+        conn = backend.connect()
+        assert estimate_plan(conn, CROSS_JOIN.replace("SELECT", "SELECT TOP 10")).cost < 1
+        assert estimate_plan(conn, CROSS_JOIN.replace("SELECT", "SELECT TOP 10") + " ORDER BY p.Name").cost > 100
+
+class TestAdmissionControl:
+    def test_off_by_default(self):
+        """Test the cost check does nothing unless enabled"""
+        from src.mssql.server import check_query_cost
+        assert check_query_cost(CROSS_JOIN, 100) == (CROSS_JOIN, 100, [], None)
+
+    def test_reject_returns_plan_summary(self, monkeypatch):
+        """Test reject mode refuses an expensive query and explains its plan"""
+        from src.mssql import server
+        monkeypatch.setitem(server.COST_LIMITS, "mode", "reject")
+        result = server.execute_sql_raw(CROSS_JOIN, use_cache=False)
+        assert result.startswith("Error: Query rejected before execution: estimated cost")
+        assert "Estimated plan: cost" in result
+        assert "ProductCategory" in result
+
+        assert "Error" not in server.execute_sql_raw("SELECT TOP 5 * FROM SalesLT.Customer", use_cache=False)
+
+    def test_cap_rewrites_expensive_query(self, monkeypatch):
+        """Test cap mode runs an expensive query with a row cap and reports it"""
+        from src.mssql import server
+        monkeypatch.setitem(server.COST_LIMITS, "mode", "cap")
+        monkeypatch.setitem(server.COST_LIMITS, "cap_rows", 20)
+        result = server.execute_sql_raw(CROSS_JOIN, use_cache=False)
+        lines = result.splitlines()
+        assert lines[0] == "CustomerID"
+        assert len([line for line in lines if not line.startswith("-- ")]) == 21
+        assert "-- Query capped to 20 rows: estimated cost" in result
+        assert "TOP (21)" in result
+
+    def test_cap_lowers_existing_top(self, monkeypatch):
+        """Test cap mode lowers a TOP that is above the cap, including one added by server_limit"""
+        from src.mssql import server
+        monkeypatch.setitem(server.COST_LIMITS, "mode", "cap")
+        monkeypatch.setitem(server.COST_LIMITS, "cap_rows", 20)
+        monkeypatch.setitem(server.COST_LIMITS, "max_rows", 1000)
+        result = server.execute_sql_raw(CROSS_JOIN.replace("SELECT", "SELECT TOP 5000", 1), use_cache=False)
+        assert "-- Query capped to 20 rows" in result
+        assert "TOP 21" in result
+        
+        result = server.execute_sql_raw(CROSS_JOIN, use_cache=False, server_limit=True)
+        assert "-- Query capped to 20 rows" in result
+        assert "TOP (21)" in result
+
+    def test_cap_rejects_when_cap_does_not_help(self, monkeypatch):
+        """Test cap mode still rejects a query whose capped plan is too expensive"""
+        from src.mssql import server
+        monkeypatch.setitem(server.COST_LIMITS, "mode", "cap")
+        result = server.execute_sql_raw(CROSS_JOIN + " ORDER BY p.Name", use_cache=False)
+        assert result.startswith("Error: Query rejected before execution:")
+        assert "(also with a row cap)" in result
+
+    def test_plan_estimates_are_cached(self, monkeypatch):
+        """Test repeated checks of the same query reuse the cached estimate"""
+        from src.mssql import server
+        monkeypatch.setitem(server.COST_LIMITS, "mode", "reject")
+        query = "SELECT TOP 3 ProductID FROM SalesLT.Product WHERE Color = 'Red'"
+        server.check_query_cost(query, 100)
+        calls = []
+        monkeypatch.setattr(server, "estimate_plan", lambda conn, sql: calls.append(sql))
+        assert server.check_query_cost(query, 100)[3] is None
+        assert calls == []
+
+    def test_cap_runs_capped_query_when_its_plan_fails(self, monkeypatch):
+        """Test a showplan failure on the capped query falls back to running it capped"""
+        from src.mssql import server
+        monkeypatch.setitem(server.COST_LIMITS, "mode", "cap")
+        monkeypatch.setitem(server.COST_LIMITS, "cap_rows", 20)
+        estimate = server.get_plan_estimate
+
+        def fail_on_capped(sql):
+            if "TOP (21)" in sql:
+                raise RuntimeError("SHOWPLAN permission denied")
+            return estimate(sql)
+
+        monkeypatch.setattr(server, "get_plan_estimate", fail_on_capped)
+        result = server.execute_sql_raw(CROSS_JOIN + " ORDER BY p.Name", use_cache=False)
+        assert not result.startswith("Error")
+        assert "-- Query capped to 20 rows" in result
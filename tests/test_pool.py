@@ -0,0 +1,224 @@
+import pytest
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.pool import ConnectionPool, PoolTimeoutError
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.cancelled = False
+
+    def execute(self, query, *params):
+        if self.conn.broken:
+            raise RuntimeError("connection is dead")
+        self.conn.queries.append(query)
+
+    def fetchall(self):
+        return [(1,)]
+
+    def cancel(self):
+        self.cancelled = True
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+        self.rollbacks = 0
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise RuntimeError("connection is dead")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+class FakeConnector:
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        conn = FakeConnection()
+        self.connections.append(conn)
+        return conn
+
+class TestConnectionPool:
+    def test_reuses_released_connection(self):
+        """Test a released connection is handed out again instead of reconnecting"""
+        connect = FakeConnector()
+        pool = ConnectionPool(connect, max_size=2)
+
+        with pool.acquire() as conn:
+            first = conn.raw
+        with pool.acquire() as conn:
+            second = conn.raw
+
+        assert first is second
+        assert len(connect.connections) == 1
+        assert first.rollbacks == 2
+        assert pool.stats()["acquired"] == 2
+
+    def test_close_returns_to_pool(self):
+        """Test close() on a pooled connection releases instead of closing"""
+        connect = FakeConnector()
+        pool = ConnectionPool(connect, max_size=1)
+
+        conn = pool.acquire()
+        conn.close()
+        conn.close()  # double close is harmless
+
+        assert connect.connections[0].closed == False
+        assert pool.stats()["idle"] == 1
+
+    def test_delegates_to_driver_connection(self):
+        """Test pooled connections expose the driver connection API"""
+        pool = ConnectionPool(FakeConnector(), max_size=1)
+        with pool.acquire() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            assert conn.queries == ["SELECT 1"]
+
+    def test_acquire_times_out_when_exhausted(self):
+        """Test callers give up after the acquire timeout"""
+        pool = ConnectionPool(FakeConnector(), max_size=1, acquire_timeout=0.05)
+        held = pool.acquire()
+
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+        assert pool.stats()["timeouts"] == 1
+        held.close()
+
+    def test_waiter_gets_released_connection(self):
+        """Test a waiting caller is woken when a connection is released"""
+        pool = ConnectionPool(FakeConnector(), max_size=1, acquire_timeout=2)
+        held = pool.acquire()
+        threading.Timer(0.05, held.close).start()
+
+        with pool.acquire() as conn:
+            assert conn is not None
+
+        stats = pool.stats()
+        assert stats["waited"] == 1
+        assert stats["wait_seconds_max"] > 0
+        assert stats["created"] == 1
+
+    def test_idle_connections_are_evicted(self):
+        """Test idle connections above min_size are closed after idle_timeout"""
+        connect = FakeConnector()
+        pool = ConnectionPool(connect, min_size=0, max_size=2, idle_timeout=0.01)
+        pool.acquire().close()
+        time.sleep(0.02)
+
+        with pool.acquire() as conn:
+            assert conn.raw is not connect.connections[0]
+        assert connect.connections[0].closed == True
+
+    def test_min_size_connections_survive_idle_timeout(self):
+        """Test min_size idle connections are kept past idle_timeout"""
+        connect = FakeConnector()
+        pool = ConnectionPool(connect, min_size=1, max_size=2, idle_timeout=0.01)
+        pool.acquire().close()
+        time.sleep(0.02)
+
+        with pool.acquire() as conn:
+            assert conn.raw is connect.connections[0]
+
+    def test_min_size_connections_are_prewarmed(self):
+        """Test the first acquire opens min_size connections in the background"""
+        connect = FakeConnector()
+        pool = ConnectionPool(connect, min_size=3, max_size=5)
+        assert connect.connections == []
+
+        first = pool.acquire()
+        deadline = time.monotonic() + 2
+        while pool.stats()["idle"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert pool.stats()["prewarmed"] == 2
+
+        with pool.acquire() as second, pool.acquire() as third:
+            assert len(connect.connections) == 3
+        first.close()
+        assert pool.stats()["size"] == 3
+
+    def test_max_lifetime_replaces_connection(self):
+        """Test connections older than max_lifetime are not reused"""
+        connect = FakeConnector()
+        pool = ConnectionPool(connect, max_size=1, max_lifetime=0.01)
+        pool.acquire().close()
+        time.sleep(0.02)
+
+        with pool.acquire() as conn:
+            assert conn.raw is connect.connections[-1]
+        assert len(connect.connections) == 2
+        assert connect.connections[0].closed == True
+
+    def test_dead_connection_fails_health_check(self):
+        """Test a connection that fails the liveness probe is replaced"""
+        connect = FakeConnector()
+        pool = ConnectionPool(connect, max_size=1, health_check_interval=0)
+        pool.acquire().close()
+        connect.connections[0].broken = True
+
+        with pool.acquire() as conn:
+            assert conn.raw is connect.connections[1]
+        assert pool.stats()["health_check_failures"] == 1
+
+    def test_discarded_connection_is_closed(self):
+        """Test connections flagged for discard are closed on release"""
+        connect = FakeConnector()
+        pool = ConnectionPool(connect, max_size=1)
+        conn = pool.acquire()
+        conn.discard = True
+        conn.close()
+
+        assert connect.connections[0].closed == True
+        assert pool.stats()["size"] == 0
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failing connect does not leak a pool slot"""
+        def broken_connect():
+            raise RuntimeError("login failed")
+
+        pool = ConnectionPool(broken_connect, max_size=1)
+        with pytest.raises(RuntimeError, match="login failed"):
+            pool.acquire()
+        assert pool.stats()["size"] == 0
+
+    def test_cancel_stops_cursors_and_discards(self):
+        """Test cancel() cancels open cursors and the connection is not reused"""
+        connector = FakeConnector()
+        pool = ConnectionPool(connector, min_size=0, max_size=1)
+        conn = pool.acquire()
+        cursor = conn.cursor()
+
+        assert conn.cancel() == True
+        conn.close()
+
+        assert cursor.cancelled == True
+        assert connector.connections[0].closed == True
+        assert pool.acquire().raw is not connector.connections[0]
+
+    def test_cancel_after_release_is_ignored(self):
+        """Test a late cancel cannot reach the next borrower's statements"""
+        connector = FakeConnector()
+        pool = ConnectionPool(connector, min_size=0, max_size=1)
+        conn = pool.acquire()
+        conn.cursor()
+        conn.close()
+
+        second = pool.acquire()
+        cursor = second.cursor()
+        assert conn.cancel() == False
+        assert cursor.cancelled == False
+        assert second.discard == False
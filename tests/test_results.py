@@ -0,0 +1,122 @@
+import pytest
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.results import ResultStream, stream_result
+
+class FakeCursor:
+    """Cursor over in-memory rows that records how it was read"""
+    def __init__(self, columns, rows):
+        self.description = [(name,) for name in columns]
+        self.rows = list(rows)
+        self.position = 0
+        self.fetch_sizes = []
+        self.cancelled = False
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch = self.rows[self.position:self.position + size]
+        self.position += len(batch)
+        return batch
+
+    def fetchone(self):
+        batch = self.fetchmany(1)
+        return batch[0] if batch else None
+
+    def fetchall(self):
+        raise AssertionError("stream_result must not call fetchall()")
+
+    def cancel(self):
+        self.cancelled = True
+
+class TestStreamResult:
+    def test_small_result_is_complete(self):
+        """Test results within budget are returned whole"""
+        cursor = FakeCursor(["id", "name"], [(1, "a"), (2, "b")])
+        result = stream_result(cursor, max_rows=100, max_bytes=10000)
+
+        assert result == "id,name\n1,a\n2,b"
+        assert cursor.cancelled == False
+
+    def test_reads_in_batches(self):
+        """Test rows are fetched with fetchmany in batches"""
+        cursor = FakeCursor(["id"], [(i,) for i in range(25)])
+        result = stream_result(cursor, max_rows=100, max_bytes=10000, batch_size=10)
+
+        assert len(result.split("\n")) == 26
+        assert cursor.fetch_sizes[:3] == [10, 10, 10]
+
+    def test_row_budget_truncates_and_cancels(self):
+        """Test the row limit stops fetching, cancels and reports truncation"""
+        cursor = FakeCursor(["id"], [(i,) for i in range(1000)])
+        result = stream_result(cursor, max_rows=5, max_bytes=10000, batch_size=2)
+        lines = result.split("\n")
+
+        assert lines[:6] == ["id", "0", "1", "2", "3", "4"]
+        assert lines[-1].startswith("-- Output truncated: row limit of 5 rows")
+        assert cursor.cancelled == True
+        assert cursor.position <= 6
+
+    def test_json_format_reports_truncation(self):
+        """Test JSON output flags truncation in a field instead of a comment line"""
+        cursor = FakeCursor(["id"], [(i,) for i in range(10)])
+        result = json.loads(stream_result(cursor, max_rows=3, max_bytes=10000, fmt="json"))
+
+        assert result["rows"] == [[0], [1], [2]]
+        assert result["truncated"] == True
+        assert "row limit" in result["notes"][0]
+
+    def test_exact_row_budget_is_not_truncated(self):
+        """Test a result with exactly max_rows rows is not flagged"""
+        cursor = FakeCursor(["id"], [(i,) for i in range(5)])
+        result = stream_result(cursor, max_rows=5, max_bytes=10000)
+
+        assert "truncated" not in result
+        assert cursor.cancelled == False
+
+    def test_byte_budget_truncates(self):
+        """Test the byte limit cuts output inside a batch"""
+        cursor = FakeCursor(["value"], [("x" * 10,) for _ in range(100)])
+        result = stream_result(cursor, max_rows=1000, max_bytes=60, batch_size=50)
+        lines = result.split("\n")
+
+        assert lines[-1].startswith("-- Output truncated: output limit of 60 bytes")
+        data = "\n".join(lines[:-1])
+        assert len(data.encode("utf-8")) <= 60
+        assert cursor.cancelled == True
+
+class TestResultStream:
+    def test_pages_do_not_lose_rows(self):
+        """Test reading page by page returns every row exactly once"""
+        cursor = FakeCursor(["id"], [(i,) for i in range(10)])
+        stream = ResultStream(cursor, batch_size=3)
+        seen = []
+        while True:
+            _, pieces, _ = stream.read(max_rows=4, max_bytes=10000)
+            seen.extend(pieces)
+            if not stream.has_more():
+                break
+
+        assert seen == [str(i) for i in range(10)]
+
+    def test_byte_budget_keeps_unsent_rows(self):
+        """Test rows cut by the byte budget are returned by the next read"""
+        cursor = FakeCursor(["v"], [("x" * 10,) for _ in range(6)])
+        stream = ResultStream(cursor, batch_size=6)
+
+        first, _, reason = stream.read(max_rows=6, max_bytes=25)
+        rest, _, _ = stream.read(max_rows=6, max_bytes=1000)
+
+        assert len(first) == 2
+        assert "bytes" in reason
+        assert len(first) + len(rest) == 6
+
+    def test_min_rows_forces_progress(self):
+        """Test min_rows emits rows larger than the byte budget"""
+        cursor = FakeCursor(["v"], [("x" * 100,)])
+        stream = ResultStream(cursor)
+
+        rows, _, _ = stream.read(max_rows=5, max_bytes=10, min_rows=1)
+        assert len(rows) == 1
@@ -0,0 +1,118 @@
+import pytest
+import csv
+import datetime
+import decimal
+import io
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.serialization import csv_field, get_writer
+
+DESCRIPTION = [
+    ("id", int),
+    ("name", str),
+    ("price", decimal.Decimal),
+    ("modified", datetime.datetime),
+    ("thumbnail", bytes),
+]
+ROWS = [
+    (1, 'Road Bike, "Pro"', decimal.Decimal("1431.50"), datetime.datetime(2008, 3, 11, 10, 1, 36), b"\x01\xff"),
+    (2, "line one\nline two", None, None, None),
+    (3, "", decimal.Decimal("0.0001"), datetime.datetime(2024, 1, 1), b""),
+]
+
+def render(fmt, rows=ROWS, notes=(), meta=None):
+    writer = get_writer(fmt, DESCRIPTION)
+    return writer.render(rows, writer.encode_rows(rows), list(notes), meta)
+
+class TestCsvWriter:
+    def test_round_trips_through_csv_parser(self):
+        """Test embedded commas, quotes and newlines survive RFC 4180 parsing"""
+        parsed = list(csv.reader(io.StringIO(render("csv"))))
+
+        assert parsed[0] == ["id", "name", "price", "modified", "thumbnail"]
+        assert parsed[1][1] == 'Road Bike, "Pro"'
+        assert parsed[2][1] == "line one\nline two"
+        assert len(parsed) == 4
+
+    def test_null_differs_from_empty_string(self):
+        """Test NULL is an empty field while an empty string is quoted"""
+        lines = render("csv").split("\n")
+        assert lines[-1].split(",")[1] == '""'
+        assert "None" not in render("csv")
+
+    def test_binary_as_hex(self):
+        """Test binary values are written as 0x hex literals"""
+        assert "0x01FF" in render("csv")
+
+    def test_notes_appended_as_comment_lines(self):
+        """Test notes become trailing '-- ' lines"""
+        assert render("csv", notes=["Output truncated"]).endswith("\n-- Output truncated")
+
+    def test_multiline_note_is_prefixed_per_line(self):
+        """Test every line of a multi-line note gets the '-- ' prefix"""
+        assert render("csv", notes=["Executed:\nSELECT TOP (11)\nFROM t"]).endswith("\n-- Executed:\n-- SELECT TOP (11)\n-- FROM t")
+
+    def test_values_looking_like_notes_are_quoted(self):
+        """Test a value starting with '-- ' cannot be mistaken for a note"""
+        assert csv_field("-- not a note") == '"-- not a note"'
+
+class TestJsonWriter:
+    def test_compact_rows(self):
+        """Test row-oriented JSON output"""
+        doc = json.loads(render("json", meta={"truncated": True}, notes=["note"]))
+
+        assert doc["columns"] == ["id", "name", "price", "modified", "thumbnail"]
+        assert doc["rows"][0][0] == 1
+        assert doc["rows"][0][2] == "1431.50"
+        assert doc["rows"][0][3] == "2008-03-11T10:01:36"
+        assert doc["rows"][1][2] is None
+        assert doc["truncated"] == True
+        assert doc["notes"] == ["note"]
+
+class TestTypedWriter:
+    def test_columnar_with_types(self):
+        """Test column-oriented output keeps type information losslessly"""
+        doc = json.loads(render("typed"))
+        columns = {col["name"]: col for col in doc["columns"]}
+
+        assert doc["row_count"] == 3
+        assert columns["id"]["type"] == "int"
+        assert columns["price"]["type"] == "decimal"
+        assert columns["price"]["values"] == ["1431.50", None, "0.0001"]
+        assert columns["modified"]["type"] == "datetime"
+        assert columns["thumbnail"]["type"] == "binary"
+        assert columns["thumbnail"]["values"][0] == "Af8="
+
+    def test_render_subset_of_encoded_rows(self):
+        """Test rendering only the rows that fit a budget, after encoding in batches"""
+        writer = get_writer("typed", DESCRIPTION)
+        pieces = writer.encode_rows(ROWS[:2]) + writer.encode_rows(ROWS[2:])
+        doc = json.loads(writer.render(ROWS[:2], pieces[:2], []))
+
+        assert doc["row_count"] == 2
+        assert doc["columns"][0]["values"] == [1, 2]
+        assert json.loads(pieces[2]) == [3, "", "0.0001", "2024-01-01T00:00:00", ""]
+
+    def test_value_of_unexpected_type(self):
+        """Test a column whose values do not all have the reported type still encodes"""
+        writer = get_writer("typed", [("a", int), ("b", float)])
+        rows = [(1, 0.5), ("two", float("inf"))]
+        doc = json.loads(writer.render(rows, writer.encode_rows(rows), []))
+        assert doc["columns"][0]["values"] == [1, "two"]
+        assert doc["columns"][1]["values"] == [0.5, float("inf")]
+
+class TestGetWriter:
+    def test_unknown_format(self):
+        """Test unknown formats are rejected"""
+        with pytest.raises(ValueError, match="Unknown output format"):
+            get_writer("xml", DESCRIPTION)
+
+    def test_description_without_types(self):
+        """Test drivers that report no column types still serialize"""
+        writer = get_writer("typed", [("a",), ("b",)])
+        doc = json.loads(writer.render([(1, "x")], writer.encode_rows([(1, "x")]), []))
+        assert doc["columns"][0]["type"] == "string"
+        assert doc["columns"][0]["values"] == [1]
@@ -3,7 +3,10 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.mssql.server import get_connection, is_read_only_query, execute_sql_raw, list_tables_raw, get_table_data_raw, describe_table_raw, get_relationships_raw
+from src.mssql.server import get_connection, is_read_only_query, execute_sql_raw, list_tables_raw, get_table_data_raw, describe_table_raw, get_relationships_raw, describe_tables_raw, get_relationships_bulk_raw, get_catalog, preview_query, table_stats_raw, get_indexes_raw
+
+# Exact values of the SQLite stand-in's fixture data; a real AdventureWorksLT differs
+stand_in_only = pytest.mark.skipif(os.getenv("MSSQL_BACKEND") != "sqlite", reason="needs the SQLite stand-in")
 
 class TestDatabaseConnection:
     def test_connection(self):
@@ -129,4 +132,144 @@ class TestGetRelationships:
     def test_get_relationships_invalid_format(self):
         """Test getting relationships with invalid table name format"""
         result = get_relationships_raw("'; DROP TABLE users; --")
-        assert "Error: Invalid table name format" in result
\ No newline at end of file
+        assert "Error: Invalid table name format" in result
+
+class TestBulkSchema:
+    def test_describe_tables_grouped_by_table(self):
+        """Test several tables are described in one result, grouped per table"""
+        result = describe_tables_raw(["SalesLT.Customer", "Product", "customer"])
+        lines = result.splitlines()
+        assert lines[0] == "TABLE_NAME,COLUMN_NAME,DATA_TYPE,IS_NULLABLE,COLUMN_DEFAULT,MAX_LENGTH,PRECISION,SCALE"
+        tables = [line.split(",")[0] for line in lines[1:]]
+        assert tables == sorted(tables, key=["SalesLT.Customer", "SalesLT.Product"].index)
+        assert "SalesLT.Product,ProductID,int" in result
+        assert "Error" not in result
+
+    def test_describe_tables_notes_missing_names(self):
+        """Test unknown and invalid names are listed in a note instead of failing the call"""
+        result = describe_tables_raw(["SalesLT.Address", "NonExistentTable", "'; DROP TABLE users; --"])
+        assert result.startswith("TABLE_NAME,")
+        assert result.splitlines()[-1] == "-- Not found: NonExistentTable, '; DROP TABLE users; --"
+
+    def test_describe_tables_none_found(self):
+        """Test an error when no requested table exists"""
+        assert describe_tables_raw(["NonExistentTable"]) == "Error: Tables not found: NonExistentTable"
+        assert describe_tables_raw([]).startswith("Error:")
+
+    def test_get_relationships_bulk(self):
+        """Test foreign keys of several tables in one result"""
+        result = get_relationships_bulk_raw(["SalesLT.SalesOrderHeader", "SalesLT.Product"])
+        assert result.splitlines()[0] == "TABLE_NAME,CONSTRAINT_NAME,COLUMN_NAME,REFERENCED_TABLE,REFERENCED_COLUMN"
+        assert "SalesLT.SalesOrderHeader,FK_SalesOrderHeader_Customer_CustomerID,CustomerID,SalesLT.Customer,CustomerID" in result
+        assert "SalesLT.Product,FK_Product_ProductCategory_ProductCategoryID" in result
+
+class TestTablePreview:
+    def test_large_columns_cut_or_left_out(self):
+        """Test default previews truncate large text columns and drop large binary ones"""
+        result = get_table_data_raw("SalesLT.Product", max_rows=3)
+        lines = result.splitlines()
+        assert "ThumbNailPhoto" not in lines[0]
+        assert "ThumbnailPhotoFileName" in lines[0]
+        assert len(lines) == 1 + 3 + 2
+        assert lines[-2] == "-- Large binary columns left out: ThumbNailPhoto (varbinary)"
+
+        table = get_catalog().find("SalesLT.ProductModel")[0]
+        query, notes = preview_query(table, None, 10, None)
+        assert "SUBSTRING(CAST([CatalogDescription] AS nvarchar(max)), 1, 200) AS [CatalogDescription]" in query
+        assert notes[0] == "Large text columns cut to 200 characters: CatalogDescription"
+
+    def test_column_projection(self):
+        """Test named columns are returned in full and in the requested order"""
+        result = get_table_data_raw("SalesLT.Product", ["name", "ThumbNailPhoto", "ProductID"], 2)
+        lines = result.splitlines()
+        assert lines[0] == "Name,ThumbNailPhoto,ProductID"
+        assert len(lines) == 3
+        assert get_table_data_raw("SalesLT.Product", "ProductID, Color", 1).startswith("ProductID,Color\n")
+
+    def test_unknown_column_and_bad_arguments(self):
+        """Test errors for unknown columns, ambiguous names and out-of-range arguments"""
+        assert get_table_data_raw("SalesLT.Product", ["ProductID", "Nope"]) == \
+            "Error: Unknown columns in SalesLT.Product: Nope"
+        assert get_table_data_raw("NonExistentTable") == "Error: Table 'NonExistentTable' not found"
+        assert get_table_data_raw("SalesLT.Product", max_rows=0).startswith("Error:")
+        assert get_table_data_raw("SalesLT.Product", sample_percent=150).startswith("Error:")
+
+    def test_sample_mode(self):
+        """Test sample_percent adds TABLESAMPLE and shuffles the sampled rows"""
+        table = get_catalog().find("SalesLT.Customer")[0]
+        query, notes = preview_query(table, ["CustomerID"], 5, 10)
+        assert query == "SELECT TOP (5) [CustomerID] FROM [SalesLT].[Customer] TABLESAMPLE SYSTEM (10 PERCENT) ORDER BY NEWID()"
+        result = get_table_data_raw("SalesLT.Customer", ["CustomerID"], 5, 10)
+        assert result.splitlines()[0] == "CustomerID"
+        assert result.splitlines()[-1] == "-- Random sample of about 10% of the table's pages"
+
+class TestTableStats:
+    def test_all_tables(self):
+        """Test every user table gets a row count and a size from partition stats"""
+        lines = table_stats_raw().splitlines()
+        assert lines[0] == "TABLE_NAME,ROW_COUNT,RESERVED_KB,USED_KB,CREATED,LAST_SCHEMA_CHANGE"
+        stats = {line.split(",")[0]: line.split(",") for line in lines[1:]}
+        assert len(stats) == len(lines) - 1
+        assert set(stats) == {table.full_name for table in get_catalog().tables()}
+        for name, row_count, reserved, used, *_ in stats.values():
+            assert int(row_count) >= 0
+            assert int(reserved) >= int(used) >= 0
+
+    def test_one_table(self):
+        """Test a single table, matched case-insensitively, and errors for views and bad names"""
+        lines = table_stats_raw("saleslt.product").splitlines()
+        assert len(lines) == 2
+        assert lines[1].startswith("SalesLT.Product,")
+        assert int(lines[1].split(",")[1]) > 0
+        assert table_stats_raw("vGetAllCategories") == "Error: Table 'vGetAllCategories' not found"
+        assert table_stats_raw("'; DROP TABLE users; --") == "Error: Invalid table name format"
+
+    @stand_in_only
+    def test_stand_in_values(self):
+        """Test row counts and sizes of the stand-in's fixture tables"""
+        stats = {line.split(",")[0]: line.split(",") for line in table_stats_raw().splitlines()[1:]}
+        assert stats["SalesLT.Customer"][1] == "847"
+        assert stats["SalesLT.Product"][1] == "295"
+        assert stats["dbo.ErrorLog"][1:4] == ["0", "0", "0"]
+        assert int(stats["SalesLT.Customer"][2]) >= int(stats["SalesLT.Customer"][3]) > 0
+
+class TestIndexes:
+    def test_indexes_from_catalog(self):
+        """Test a table's indexes include its primary key with its key column"""
+        lines = get_indexes_raw("SalesLT.Customer").splitlines()
+        assert lines[0] == "INDEX_NAME,TYPE,IS_UNIQUE,IS_PRIMARY_KEY,KEY_COLUMNS,INCLUDED_COLUMNS,FILTER,STATS_UPDATED"
+        primary_keys = [line.split(",") for line in lines[1:] if line.split(",")[3] == "YES"]
+        assert len(primary_keys) == 1
+        assert primary_keys[0][2] == "YES" and primary_keys[0][4] == "CustomerID"
+
+    def test_fragmentation_on_request(self):
+        """Test fragmentation and page counts are added only when asked for"""
+        lines = get_indexes_raw("SalesLT.Product", True).splitlines()
+        assert lines[0].endswith(",STATS_UPDATED,FRAGMENTATION_PERCENT,PAGE_COUNT")
+        assert "FRAGMENTATION" not in get_indexes_raw("SalesLT.Product")
+
+    def test_keyword_arguments_share_cache_entry(self):
+        """Test keyword and positional calls are accepted and served from one cache entry"""
+        from unittest.mock import patch
+        from src.mssql import server
+
+        by_keyword = get_indexes_raw("SalesLT.Customer", include_fragmentation=True)
+        with patch.object(server, "get_catalog", side_effect=AssertionError("not cached")):
+            assert get_indexes_raw("saleslt.customer", True) == by_keyword
+            assert get_indexes_raw(table_name="SalesLT.Customer", include_fragmentation=True) == by_keyword
+        assert get_indexes_raw("SalesLT.Customer", include_fragmentation=False) == get_indexes_raw("SalesLT.Customer")
+
+    @stand_in_only
+    def test_stand_in_values(self):
+        """Test the stand-in's fixture indexes, statistics dates and fragmentation"""
+        lines = get_indexes_raw("SalesLT.Customer").splitlines()
+        assert lines[1] == "PK_Customer_CustomerID,CLUSTERED,YES,YES,CustomerID,,,2008-06-01 00:00:00.000"
+        assert lines[2].startswith("IX_Customer_EmailAddress,NONCLUSTERED,NO,NO,EmailAddress,")
+        assert len(lines) == 3
+        percent, pages = get_indexes_raw("SalesLT.Product", True).splitlines()[1].split(",")[-2:]
+        assert 0 <= float(percent) <= 100 and int(pages) > 0
+
+    def test_errors(self):
+        """Test unknown and invalid table names"""
+        assert get_indexes_raw("NonExistentTable") == "Error: Table 'NonExistentTable' not found"
+        assert get_indexes_raw("'; DROP TABLE users; --") == "Error: Invalid table name format"
@@ -0,0 +1,123 @@
+import pytest
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.backend import create_backend
+from src.mssql.catalog import CatalogSnapshot
+from src.mssql.sqlite_backend import translate
+
+@pytest.fixture(scope="module")
+def backend():
+    backend = create_backend("sqlite")
+    yield backend
+    backend.close()
+
+class TestTranslate:
+    def test_top_becomes_limit(self):
+        """Test TOP n and TOP (n) turn into LIMIT at the end of their SELECT"""
+        assert translate("SELECT TOP 10 * FROM t ORDER BY a").endswith("ORDER BY a LIMIT 10")
+        assert translate("SELECT (SELECT TOP (1) a FROM u) FROM t") == "SELECT (SELECT  a FROM u LIMIT 1) FROM t"
+
+    def test_offset_fetch_becomes_limit_offset(self):
+        """Test OFFSET/FETCH is rewritten to LIMIT/OFFSET"""
+        assert translate("SELECT a FROM t ORDER BY a OFFSET 10 ROWS FETCH NEXT 5 ROWS ONLY") == \
+            "SELECT a FROM t ORDER BY a LIMIT 5 OFFSET 10"
+
+    def test_identifiers_strings_and_functions(self):
+        """Test brackets, N'' literals and T-SQL function names are converted"""
+        assert translate("SELECT ISNULL([Database Version], N'x') FROM dbo.BuildVersion") == \
+            "SELECT IFNULL(\"Database Version\", 'x') FROM dbo.BuildVersion"
+
+    def test_max_lengths_and_tablesample_dropped(self):
+        """Test (max) type lengths and TABLESAMPLE clauses are removed, NEWID() becomes RANDOM()"""
+        assert translate("SELECT CAST([x] AS nvarchar(max)) FROM t TABLESAMPLE SYSTEM (10 PERCENT) ORDER BY NEWID()") == \
+            "SELECT CAST(\"x\" AS nvarchar) FROM t  ORDER BY RANDOM()"
+
+    def test_table_functions_lose_their_arguments(self):
+        """Test dynamic management functions read their emulation tables"""
+        assert translate("SELECT * FROM sys.dm_db_index_physical_stats(DB_ID(), 5, NULL, NULL, 'LIMITED') ips") == \
+            "SELECT * FROM sys.dm_db_index_physical_stats ips"
+
+class TestSqliteBackend:
+    def test_schema_qualified_queries(self, backend):
+        """Test SalesLT tables resolve by schema-qualified name"""
+        cursor = backend.connect().cursor()
+        cursor.execute("SELECT TOP 5 CustomerID, LastName FROM SalesLT.Customer ORDER BY CustomerID")
+        assert cursor.description[0][:2] == ("CustomerID", int)
+        assert [row[0] for row in cursor.fetchall()] == [1, 2, 3, 4, 5]
+
+    def test_catalog_snapshot_loads(self, backend):
+        """Test the emulated sys views feed CatalogSnapshot"""
+        snapshot = CatalogSnapshot.load(backend.connect())
+        header = snapshot.find("SalesLT.SalesOrderHeader")[0]
+
+        assert header.primary_key == ["SalesOrderID"]
+        assert "FK_SalesOrderHeader_Customer_CustomerID" in {fk.name for fk in header.foreign_keys}
+        assert snapshot.find("BuildVersion")[0].schema == "dbo"
+
+    def test_information_schema(self, backend):
+        """Test INFORMATION_SCHEMA.COLUMNS reports SQL Server types"""
+        cursor = backend.connect().cursor()
+        cursor.execute(
+            "SELECT DATA_TYPE, CHARACTER_MAXIMUM_LENGTH FROM INFORMATION_SCHEMA.COLUMNS "
+            "WHERE TABLE_NAME = 'Customer' AND COLUMN_NAME = 'FirstName'"
+        )
+        assert cursor.fetchone() == ("nvarchar", 50)
+
+    def test_read_only(self, backend):
+        """Test writes are refused"""
+        with pytest.raises(Exception, match="readonly"):
+            backend.connect().cursor().execute("DELETE FROM SalesLT.Customer")
+
+    def test_row_scale(self):
+        """Test row_scale multiplies the customer and sales tables"""
+        backend = create_backend("sqlite", row_scale=3)
+        cursor = backend.connect().cursor()
+        cursor.execute("SELECT COUNT(*) FROM SalesLT.Customer")
+        assert cursor.fetchone()[0] == 847 * 3
+        backend.close()
+
+    def test_extra_tables(self):
+        """Test extra_tables adds synthetic tables to the catalog, chained by foreign keys"""
+        backend = create_backend("sqlite", extra_tables=3)
+        snapshot = CatalogSnapshot.load(backend.connect())
+        table = snapshot.find("dbo.Synthetic00003")[0]
+        assert len(table.columns) == 20
+        assert [fk.referenced_table for fk in table.foreign_keys] == ["dbo.Synthetic00002"]
+        assert len(snapshot.tables()) == 13
+        backend.close()
+
+    def test_latency_per_round_trip(self):
+        """Test latency is added to execute and each fetch"""
+        backend = create_backend("sqlite", latency=0.05)
+        cursor = backend.connect().cursor()
+        start = time.monotonic()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        assert time.monotonic() - start >= 0.1
+        backend.close()
+
+    def test_cancel_interrupts_statement(self):
+        """Test cancel() from another thread stops a running statement"""
+        backend = create_backend("sqlite", latency=5)
+        cursor = backend.connect().cursor()
+        threading.Timer(0.1, cursor.cancel).start()
+        start = time.monotonic()
+        with pytest.raises(Exception, match="canceled"):
+            cursor.execute("SELECT 1")
+        assert time.monotonic() - start < 2
+        backend.close()
+
+    def test_timeout_interrupts_statement(self, backend):
+        """Test the connection timeout aborts long statements"""
+        conn = backend.connect()
+        conn.timeout = 1
+        query = (
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+            "SELECT COUNT(*) FROM n"
+        )
+        with pytest.raises(Exception, match="timeout"):
+            conn.cursor().execute(query)
@@ -0,0 +1,168 @@
+import pytest
+import random
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mssql.tsql import INVALID, apply_row_limit, fingerprint, is_read_only, tokenize
+from benchmarks.bench_validator import legacy_is_read_only_query
+
+SAFE_QUERIES = [
+    "SELECT * FROM SalesLT.Customer",
+    "SELECT TOP 5 Name, ListPrice FROM SalesLT.Product ORDER BY ListPrice DESC",
+    "WITH c AS (SELECT CustomerID FROM SalesLT.Customer) SELECT COUNT(*) FROM c",
+    "DECLARE @n INT = 3 SELECT TOP (@n) * FROM SalesLT.Product",
+]
+PAYLOADS = [
+    "DROP TABLE SalesLT.Customer",
+    "DELETE FROM SalesLT.Customer",
+    "UPDATE SalesLT.Product SET ListPrice = 0",
+    "INSERT INTO SalesLT.Address (City) VALUES ('x')",
+    "EXEC sp_configure",
+    "TRUNCATE TABLE SalesLT.Product",
+    "ALTER TABLE SalesLT.Product DROP COLUMN Color",
+    "GRANT SELECT ON SalesLT.Product TO public",
+]
+
+def fuzz_corpus(seed=1234, size=500):
+    """Queries whose verdict is known by construction
+
+    A payload placed inside a literal, comment or bracketed alias is inert;
+    the same payload placed as a statement is not.
+    """
+    rng = random.Random(seed)
+    inert = [
+        lambda p: f"{rng.choice(SAFE_QUERIES)} -- {p}",
+        lambda p: f"/* {p} */ {rng.choice(SAFE_QUERIES)}",
+        lambda p: f"SELECT '{p.replace(chr(39), chr(39) * 2)}' AS note",
+        lambda p: f"SELECT 1 AS [{p}]",
+        lambda p: "SELECT ListPrice AS " + p.split()[0] + "_DATE FROM SalesLT.Product",
+    ]
+    live = [
+        lambda p: f"{rng.choice(SAFE_QUERIES)}; {p}",
+        lambda p: f"{rng.choice(SAFE_QUERIES)}\n{p}",
+        lambda p: f"{rng.choice(SAFE_QUERIES)} /* note */ ;{p}",
+        lambda p: f"SELECT 1 {p}",
+    ]
+    cases = []
+    for _ in range(size):
+        payload = rng.choice(PAYLOADS)
+        if rng.random() < 0.5:
+            cases.append((rng.choice(inert)(payload), True))
+        else:
+            cases.append((rng.choice(live)(payload), False))
+    return cases
+
+class TestTokenize:
+    def test_skips_comments_and_keeps_literals(self):
+        """Test comments are dropped and literals stay single tokens"""
+        tokens = list(tokenize("SELECT /* a /* nested */ b */ 'it''s' -- tail\n, [x y]"))
+        assert tokens == [("word", "SELECT"), ("string", "'it''s'"), ("punct", ","), ("identifier", "[x y]")]
+
+    def test_number_does_not_swallow_keyword(self):
+        """Test '1FROM' lexes as a number followed by a keyword"""
+        assert list(tokenize("SELECT 1FROM t")) == [("word", "SELECT"), ("number", "1"), ("word", "FROM"), ("word", "t")]
+
+    def test_unterminated_input(self):
+        """Test unterminated literals and comments produce an invalid token"""
+        for sql in ["SELECT 'abc", "SELECT [abc", "SELECT 1 /* open"]:
+            assert list(tokenize(sql))[-1][0] == INVALID
+
+class TestIsReadOnly:
+    def test_identifiers_resembling_keywords(self):
+        """Test names that contain forbidden words are accepted"""
+        queries = [
+            "SELECT UPDATE_DATE, REPLACE(Name, 'a', 'b') FROM t",
+            "SELECT sp_name FROM t",
+            "SELECT [Delete], \"Drop\" FROM t",
+            "SELECT 'DROP TABLE t; --' AS x;",
+            "DECLARE @x INT; SET @x = 1; SELECT @x",
+        ]
+        for query in queries:
+            assert is_read_only(query) == True, query
+
+    def test_rejects_writes_and_side_effects(self):
+        """Test statements that write or escape the database are rejected"""
+        queries = [
+            "SELECT * INTO t2 FROM t",
+            "SELECT 1;sp_who",
+            "SELECT 1FROM t DELETE FROM t",
+            "SELECT * FROM OPENROWSET('SQLNCLI', 'x', 'SELECT 1')",
+            "SET NOCOUNT ON",
+            "SELECT 1 SET CONTEXT_INFO 0x01",
+            "SELECT 'unterminated",
+            "",
+            "-- only a comment",
+        ]
+        for query in queries:
+            assert is_read_only(query) == False, query
+
+    def test_verdicts_are_memoized(self):
+        """Test repeated queries are answered from the memo"""
+        query = "SELECT 42 AS memo_probe"
+        is_read_only(query)
+        hits = is_read_only.cache_info().hits
+        is_read_only(query)
+        assert is_read_only.cache_info().hits == hits + 1
+
+class TestFuzzCorpus:
+    def test_matches_ground_truth(self):
+        """Test every fuzzed query gets the verdict it was built to have"""
+        for query, expected in fuzz_corpus():
+            assert is_read_only(query) == expected, query
+
+    def test_fixes_legacy_false_positives(self):
+        """Test queries the old validator wrongly rejected are now accepted, and no unsafe one slips through"""
+        corpus = fuzz_corpus()
+        fixed = [q for q, expected in corpus if expected and not legacy_is_read_only_query(q)]
+        assert fixed
+        assert all(is_read_only(q) for q in fixed)
+        assert not any(is_read_only(q) for q, expected in corpus if not expected)
+
+class TestFingerprint:
+    def test_token_normalization(self):
+        """Test fingerprints ignore spacing, comments and keyword case"""
+        assert fingerprint("select  a,b\nfrom t; -- x") == fingerprint("SELECT a , b FROM T")
+        assert fingerprint("SELECT 'Ab'") != fingerprint("SELECT 'AB'")
+
+class TestApplyRowLimit:
+    def test_injects_top(self):
+        """Test TOP goes into the outermost SELECT, after DISTINCT"""
+        assert apply_row_limit("SELECT * FROM t ORDER BY x", 11) == "SELECT TOP (11) * FROM t ORDER BY x"
+        assert apply_row_limit("select distinct name from t;", 5) == "select distinct TOP (5) name from t;"
+
+    def test_cte_targets_main_query(self):
+        """Test the SELECT after the CTE is limited, not the CTE body"""
+        result = apply_row_limit("WITH c AS (SELECT a FROM t) SELECT a FROM c", 10)
+        assert result == "WITH c AS (SELECT a FROM t) SELECT TOP (10) a FROM c"
+
+    def test_union_with_order_by_uses_offset_fetch(self):
+        """Test set operations are limited with OFFSET/FETCH before OPTION"""
+        result = apply_row_limit("SELECT a FROM t UNION ALL SELECT a FROM u ORDER BY a OPTION (RECOMPILE)", 10)
+        assert result == "SELECT a FROM t UNION ALL SELECT a FROM u ORDER BY a OFFSET 0 ROWS FETCH NEXT 10 ROWS ONLY OPTION (RECOMPILE)"
+        assert apply_row_limit("SELECT a FROM t ORDER BY a OFFSET 10 ROWS", 5).endswith("OFFSET 10 ROWS FETCH NEXT 5 ROWS ONLY")
+
+    def test_leaves_other_queries_alone(self):
+        """Test queries that limit themselves or cannot be rewritten are untouched"""
+        queries = [
+            "SELECT TOP 5 * FROM t",
+            "SELECT a FROM t ORDER BY a OFFSET 0 ROWS FETCH NEXT 5 ROWS ONLY",
+            "SELECT a FROM t UNION SELECT a FROM u",
+            "SELECT @x = 1",
+            "DECLARE @x INT SELECT 1",
+            "SELECT 1; SELECT 2",
+            "SELECT * FROM t FOR JSON AUTO",
+        ]
+        for query in queries:
+            assert apply_row_limit(query, 10) is None, query
+
+    def test_lower_existing_limit(self):
+        """Test lower_existing lowers a larger literal TOP or FETCH and keeps a smaller one"""
+        assert apply_row_limit("SELECT TOP 500 * FROM t", 10, lower_existing=True) == "SELECT TOP 10 * FROM t"
+        assert apply_row_limit("SELECT DISTINCT TOP (500) a FROM t", 10, lower_existing=True) == \
+            "SELECT DISTINCT TOP (10) a FROM t"
+        assert apply_row_limit("SELECT a FROM t ORDER BY a OFFSET 5 ROWS FETCH NEXT 100 ROWS ONLY", 10,
+                               lower_existing=True).endswith("FETCH NEXT 10 ROWS ONLY")
+        assert apply_row_limit("SELECT TOP 5 * FROM t", 10, lower_existing=True) == "SELECT TOP 5 * FROM t"
+        for query in ("SELECT TOP 50 PERCENT * FROM t", "SELECT TOP (@n) * FROM t"):
+            assert apply_row_limit(query, 10, lower_existing=True) is None, query